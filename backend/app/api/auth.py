@@ -1,17 +1,18 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 
 from app.api.deps import get_db, get_current_user
 from app.models.user import User
-from app.schemas.auth import UserCreate, Token
-from app.core.security import hash_password, verify_password, create_access_token
+from app.schemas.auth import UserCreate, UserShort, Token
+from app.core.security import hash_password, verify_and_update_password_async, create_access_token
 
 ALLOWED_ROLES = {"admin", "ceo", "manager", "employee"}
 
 router = APIRouter(prefix="/auth", tags=["auth"])
 
 
-@router.post("/register")
+@router.post("/register", response_model=UserShort)
 def register(
     data: UserCreate,
     db: Session = Depends(get_db),
@@ -44,19 +45,46 @@ def register(
     }
 
 
+def _find_user(db: Session, username: str) -> tuple[dict, str] | None:
+    """Token claims and password hash, read in the threadpool.
+
+    The endpoint itself never touches the ORM object: after a commit its
+    attributes would be reloaded lazily on the event loop thread.
+    """
+    user = db.query(User).filter(User.username == username).first()
+    if not user:
+        return None
+    claims = {
+        "sub": user.username,
+        "role": user.role,
+        "uid": user.id,
+        "ver": user.token_version,
+    }
+    return claims, user.password_hash
+
+
+def _store_rehash(db: Session, user_id: int, new_hash: str) -> None:
+    db.query(User).filter(User.id == user_id).update({"password_hash": new_hash})
+    db.commit()
+
+
 @router.post("/login", response_model=Token)
-def login(data: UserCreate, db: Session = Depends(get_db)):
-    user = db.query(User).filter(User.username == data.username).first()
+async def login(data: UserCreate, db: Session = Depends(get_db)):
+    # async: БД — в общем пуле потоков, проверка хеша — в своём ограниченном пуле
+    found = await run_in_threadpool(_find_user, db, data.username)
+
+    valid = False
+    if found:
+        claims, password_hash = found
+        valid, new_hash = await verify_and_update_password_async(data.password, password_hash)
+        if valid and new_hash:
+            # схема или стоимость хеша сменились в настройках — тихо перехешируем
+            await run_in_threadpool(_store_rehash, db, claims["uid"], new_hash)
 
-    if not user or not verify_password(data.password, user.password_hash):
+    if not valid:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid credentials"
         )
 
-    token = create_access_token({
-        "sub": user.username,
-        "role": user.role
-    })
-
-    return {"access_token": token}
+    return {"access_token": create_access_token(claims)}
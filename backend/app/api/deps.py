@@ -1,15 +1,57 @@
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime
+
 from fastapi import Depends, HTTPException, status
 from jose import JWTError, jwt
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from fastapi.security import OAuth2PasswordBearer
+from starlette.concurrency import run_in_threadpool
 
-from app.db.session import SessionLocal
+from app.db.session import AsyncSessionLocal, SessionLocal, begin_read_snapshot
 from app.models.user import User
-from app.core.config import SECRET_KEY, ALGORITHM
+from app.core.cache import MISSING, LRUCache
+from app.core.config import SECRET_KEY, ALGORITHM, AUTH_CACHE_SIZE, AUTH_CACHE_TTL_SECONDS
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
 
 
+@dataclass(frozen=True)
+class CurrentUser:
+    """Detached snapshot of the authenticated user, safe to share between requests.
+
+    `created_at` is None when the snapshot was built from token claims.
+    """
+
+    id: int
+    username: str
+    role: str
+    created_at: datetime | None
+
+
+class AuthStats:
+    """Cumulative auth cost: `seconds / requests` is the mean per-request latency."""
+
+    def __init__(self):
+        self.requests = 0
+        self.seconds = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float) -> None:
+        with self._lock:
+            self.requests += 1
+            self.seconds += seconds
+
+
+# token -> CurrentUser; запись живёт не дольше exp токена
+token_cache = LRUCache(maxsize=AUTH_CACHE_SIZE, ttl=AUTH_CACHE_TTL_SECONDS)
+# user id -> users.token_version для проверки токенов без чтения пользователя
+token_versions = LRUCache(maxsize=AUTH_CACHE_SIZE, ttl=AUTH_CACHE_TTL_SECONDS)
+auth_stats = AuthStats()
+
+
 def get_db():
     db = SessionLocal()
     try:
@@ -18,10 +60,83 @@ def get_db():
         db.close()
 
 
-def get_current_user(
-    token: str = Depends(oauth2_scheme),
-    db: Session = Depends(get_db),
-):
+class AsyncDb:
+    """Runs sync ORM code `fn(session, *args)` from `async def` endpoints.
+
+    With an async driver the function runs through AsyncSession.run_sync and
+    no thread is held while waiting on the database; without one (DB_ASYNC=0
+    or the driver is not installed) it runs on a Session in the threadpool.
+    """
+
+    def __init__(self, session: AsyncSession | Session):
+        self.session = session
+
+    async def run(self, fn, *args):
+        if isinstance(self.session, AsyncSession):
+            return await self.session.run_sync(fn, *args)
+        return await run_in_threadpool(fn, self.session, *args)
+
+    async def run_threaded(self, fn, *args):
+        """Runs `fn` on a sync Session in the threadpool even with an async driver.
+
+        run_sync executes the whole function (ORM hydration, building the
+        response) on the event loop thread; work that grows with the data,
+        such as an unpaginated board, goes here instead. The request's own
+        transaction is ended first, so the request holds one pooled
+        connection, and all reads of `fn` see one snapshot.
+        """
+        def run_on(session: Session):
+            begin_read_snapshot(session)
+            return fn(session, *args)
+
+        if not isinstance(self.session, AsyncSession):
+            def call():
+                # транзакция проверки токена завершается: снимок берётся заново
+                self.session.close()
+                return run_on(self.session)
+
+            return await run_in_threadpool(call)
+
+        # соединение AsyncSession (проверка токена) возвращается в пул до
+        # того, как поток возьмёт своё
+        await self.session.close()
+
+        def call():
+            with SessionLocal() as session:
+                return run_on(session)
+
+        return await run_in_threadpool(call)
+
+
+async def get_async_db():
+    if AsyncSessionLocal is not None:
+        async with AsyncSessionLocal() as session:
+            yield AsyncDb(session)
+        return
+
+    session = SessionLocal()
+    try:
+        yield AsyncDb(session)
+    finally:
+        session.close()
+
+
+def invalidate_user_tokens(user_id: int) -> None:
+    """Forgets cached tokens of a user whose username, role or password changed."""
+    token_cache.pop_matching(lambda cached: cached.id == user_id)
+    token_versions.pop(user_id)
+
+
+def _token_version(user_id: int, db: Session, fresh: bool = False) -> int | None:
+    version = MISSING if fresh else token_versions.get(user_id)
+    if version is MISSING:
+        version = db.query(User.token_version).filter(User.id == user_id).scalar()
+        if version is not None:
+            token_versions.set(user_id, version)
+    return version
+
+
+def _verify_token(token: str, db: Session, fresh: bool = False) -> CurrentUser:
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         username: str | None = payload.get("sub")
@@ -30,8 +145,63 @@ def get_current_user(
     except JWTError:
         raise HTTPException(status_code=401)
 
-    user = db.query(User).filter(User.username == username).first()
-    if not user:
-        raise HTTPException(status_code=401)
+    user_id = payload.get("uid")
+    version = payload.get("ver")
+    role = payload.get("role")
+    if user_id is not None and version is not None and role is not None:
+        # токен с uid/ver: пользователь собирается из claims, из БД
+        # (или кэша) читается только текущая версия токенов
+        if _token_version(user_id, db, fresh) != version:
+            raise HTTPException(status_code=401)
+        current = CurrentUser(id=user_id, username=username, role=role, created_at=None)
+    else:
+        # токены, выданные до появления uid/ver
+        user = db.query(User).filter(User.username == username).first()
+        if not user:
+            raise HTTPException(status_code=401)
+
+        current = CurrentUser(
+            id=user.id,
+            username=user.username,
+            role=user.role,
+            created_at=user.created_at,
+        )
+
+    ttl = min(AUTH_CACHE_TTL_SECONDS, payload.get("exp", 0) - time.time())
+    if ttl > 0:
+        token_cache.set(token, current, ttl=ttl)
+    return current
+
 
-    return user
+def user_from_token(token: str, db: Session, fresh: bool = False) -> CurrentUser:
+    """`fresh=True` skips the per-process caches: the version is read from the database."""
+    started = time.perf_counter()
+    try:
+        current = MISSING if fresh else token_cache.get(token)
+        if current is MISSING:
+            current = _verify_token(token, db, fresh)
+        return current
+    finally:
+        auth_stats.record(time.perf_counter() - started)
+
+
+def get_current_user(
+    token: str = Depends(oauth2_scheme),
+    db: Session = Depends(get_db),
+):
+    return user_from_token(token, db)
+
+
+async def get_current_user_async(
+    token: str = Depends(oauth2_scheme),
+    db: AsyncDb = Depends(get_async_db),
+):
+    started = time.perf_counter()
+    try:
+        # попадание в кэш не требует ни БД, ни потока
+        current = token_cache.get(token)
+        if current is MISSING:
+            current = await db.run(lambda session: _verify_token(token, session))
+        return current
+    finally:
+        auth_stats.record(time.perf_counter() - started)
@@ -1,61 +1,160 @@
-from fastapi import APIRouter, Depends, HTTPException
+import asyncio
+import logging
+from contextlib import suppress
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, WebSocket, WebSocketDisconnect, status
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import func
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 
-from app.api.deps import get_db, get_current_user
-from app.api.tasks import _can_view_task
+from app.api.deps import AsyncDb, get_async_db, get_current_user, get_current_user_async, get_db, user_from_token
+from app.api.tasks import REVALIDATE, _get_visible_task
+from app.core.config import WS_RECHECK_SECONDS
+from app.core.etag import etag_matches, make_etag, not_modified
+from app.core.hub import get_hub, task_messages_topic
+from app.core.metrics import CHAT_POLLS
+from app.db.session import SessionLocal
 from app.models.message import Message
-from app.models.task import Task
 from app.models.user import User
-from app.schemas.message import MessageCreate
+from app.schemas.common import Created
+from app.schemas.message import MessageCreate, MessageOut
 
 router = APIRouter(prefix="/tasks/{task_id}/messages", tags=["messages"])
+logger = logging.getLogger(__name__)
+
+
+def _filter_messages(query, task_id: int, since_id: int | None, before_id: int | None):
+    query = query.filter(Message.task_id == task_id)
+    if since_id is not None:
+        query = query.filter(Message.id > since_id)
+    if before_id is not None:
+        query = query.filter(Message.id < before_id)
+    return query
 
 
-@router.get("/")
-def get_messages(
+def _messages_etag(
+    db: Session,
+    user: User,
     task_id: int,
-    db: Session = Depends(get_db),
-    user: User = Depends(get_current_user),
-):
-    task = db.query(Task).filter(Task.id == task_id).first()
-    if not task:
-        raise HTTPException(status_code=404, detail="Task not found")
+    since_id: int | None,
+    before_id: int | None,
+    limit: int | None,
+) -> str:
+    """Validator of a chat range: its size, newest id and the authors' versions.
+
+    Messages are only appended, so count and max(id) identify the range;
+    token_version only grows and is bumped on rename, so the sum changes
+    when an author shown in the range is renamed. The body takes author
+    names from the same `users` rows (no per-process cache), and the
+    validator is computed first, so a response never carries an ETag
+    newer than its body.
+    """
+    _get_visible_task(db, user, task_id)
+
+    query = (
+        db.query(func.count(Message.id), func.max(Message.id), func.sum(User.token_version))
+        .join(User, User.id == Message.user_id)
+    )
+    count, last_id, versions = _filter_messages(query, task_id, since_id, before_id).one()
+    return make_etag("messages", task_id, count, last_id, versions, since_id, before_id, limit)
 
+
+def _list_messages(
+    db: Session,
+    user: User,
+    task_id: int,
+    since_id: int | None,
+    before_id: int | None,
+    limit: int | None,
+) -> list[dict]:
     # доступ к сообщениям только если видна задача
-    if not _can_view_task(user, task, db):
-        raise HTTPException(status_code=403, detail="Access denied")
-
-    messages = (
-        db.query(Message)
-        .filter(Message.task_id == task_id)
-        .order_by(Message.created_at)
-        .all()
+    _get_visible_task(db, user, task_id)
+
+    # имя автора берётся тем же запросом, что и сообщения: переименование
+    # видно сразу в любом воркере и согласовано с ETag (_messages_etag)
+    query = _filter_messages(
+        db.query(Message, User.username).outerjoin(User, User.id == Message.user_id),
+        task_id, since_id, before_id,
     )
+    newest_first = limit is not None and since_id is None
+    query = query.order_by(Message.id.desc() if newest_first else Message.id)
+    if limit is not None:
+        query = query.limit(limit)
+    rows = query.all()
+    if newest_first:
+        rows.reverse()
 
     return [
         {
             "id": m.id,
-            "user": db.query(User).get(m.user_id).username,
+            "user": username,
             "content": m.content,
             "created_at": m.created_at,
         }
-        for m in messages
+        for m, username in rows
     ]
 
 
-@router.post("/", status_code=201)
+def _messages_snapshot(
+    db: Session,
+    user: User,
+    task_id: int,
+    since_id: int | None,
+    before_id: int | None,
+    limit: int | None,
+    matches,
+) -> tuple[str, list[dict] | None]:
+    """Chat ETag and, unless `matches(etag)`, the messages, read in one session."""
+    etag = _messages_etag(db, user, task_id, since_id, before_id, limit)
+    if matches(etag):
+        return etag, None
+    return etag, _list_messages(db, user, task_id, since_id, before_id, limit)
+
+
+@router.get("/", response_model=list[MessageOut])
+async def get_messages(
+    task_id: int,
+    request: Request,
+    response: Response,
+    since_id: int | None = Query(default=None, description="только сообщения с id > since_id"),
+    before_id: int | None = Query(default=None, description="только сообщения с id < before_id"),
+    limit: int | None = Query(default=None, ge=1, le=500),
+    db: AsyncDb = Depends(get_async_db),
+    user: User = Depends(get_current_user_async),
+):
+    """Chat history in ascending id order.
+
+    With `limit` and no `since_id` the newest `limit` messages (before
+    `before_id`, if given) are returned, so older history is loaded page by
+    page; with `since_id` the oldest `limit` new messages are returned.
+    """
+    # без limit — вся история чата: собираем её в пуле потоков, не в event loop
+    run = db.run if limit is not None else db.run_threaded
+    etag, result = await run(
+        _messages_snapshot, user, task_id, since_id, before_id, limit,
+        lambda etag: etag_matches(request, etag),
+    )
+    if result is None:
+        if since_id is not None:
+            CHAT_POLLS.inc("not_modified")
+        return not_modified(etag, REVALIDATE)
+    if since_id is not None:
+        CHAT_POLLS.inc("ok")
+
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = REVALIDATE
+    return result
+
+
+@router.post("/", status_code=201, response_model=Created)
 def create_message(
     task_id: int,
     data: MessageCreate,
     db: Session = Depends(get_db),
     user: User = Depends(get_current_user),
 ):
-    task = db.query(Task).filter(Task.id == task_id).first()
-    if not task:
-        raise HTTPException(status_code=404, detail="Task not found")
-
-    if not _can_view_task(user, task, db):
-        raise HTTPException(status_code=403, detail="Access denied")
+    _get_visible_task(db, user, task_id)
 
     message = Message(
         content=data.content,
@@ -67,4 +166,75 @@ def create_message(
     db.commit()
     db.refresh(message)
 
+    get_hub().publish(
+        task_messages_topic(task_id),
+        jsonable_encoder({
+            "id": message.id,
+            "user": user.username,
+            "content": message.content,
+            "created_at": message.created_at,
+        }),
+    )
+
     return {"id": message.id}
+
+
+def _authorize_socket(task_id: int, token: str, fresh: bool = False) -> None:
+    db = SessionLocal()
+    try:
+        user = user_from_token(token, db, fresh)
+        _get_visible_task(db, user, task_id)
+    finally:
+        db.close()
+
+
+@router.websocket("/ws")
+async def messages_socket(websocket: WebSocket, task_id: int, token: str = Query(...)):
+    """Pushes new messages of a visible task as JSON frames.
+
+    Access is checked again (bypassing the token caches) before every pushed
+    message and at least every WS_RECHECK_SECONDS: once the task is
+    reassigned away from the user or the token is revoked or expired, the
+    socket is closed with 1008.
+    """
+    # браузерный WebSocket не умеет заголовки, поэтому JWT передаётся в ?token=
+    try:
+        await run_in_threadpool(_authorize_socket, task_id, token)
+    except HTTPException as exc:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason=str(exc.detail))
+        return
+
+    await websocket.accept()
+
+    async with get_hub().subscribe(task_messages_topic(task_id)) as queue:
+        async def forward():
+            try:
+                while True:
+                    try:
+                        payload = await asyncio.wait_for(queue.get(), WS_RECHECK_SECONDS)
+                    except asyncio.TimeoutError:
+                        payload = None
+                    await run_in_threadpool(_authorize_socket, task_id, token, True)
+                    if payload is not None:
+                        await websocket.send_json(payload)
+            except HTTPException as exc:
+                # задачу переназначили, токен отозван или истёк
+                code, reason = status.WS_1008_POLICY_VIOLATION, str(exc.detail)
+            except WebSocketDisconnect:
+                return
+            except Exception:
+                logger.exception("chat socket of task %s failed", task_id)
+                code, reason = status.WS_1011_INTERNAL_ERROR, ""
+            # клиент мог уйти одновременно с закрытием
+            with suppress(RuntimeError, OSError, WebSocketDisconnect):
+                await websocket.close(code=code, reason=reason)
+
+        sender = asyncio.create_task(forward())
+        try:
+            # входящие кадры не нужны, ждём только закрытия соединения
+            while True:
+                await websocket.receive_text()
+        except WebSocketDisconnect:
+            pass
+        finally:
+            sender.cancel()
@@ -0,0 +1,70 @@
+import hmac
+
+from fastapi import APIRouter, HTTPException, Request, Response
+from sqlalchemy.pool import QueuePool
+
+from app.api.deps import auth_stats, token_cache, token_versions
+from app.api.statuses import status_catalog
+from app.core.config import METRICS_DIR, METRICS_TOKEN
+from app.core.metrics import CONTENT_TYPE, collect, registry, render
+from app.db.session import async_engine, engine
+
+router = APIRouter(tags=["metrics"])
+
+CACHES = {
+    "token_cache": token_cache,
+    "token_versions": token_versions,
+    "status_catalog": status_catalog,
+}
+ENGINES = {"sync": engine, "async": async_engine.sync_engine if async_engine is not None else None}
+
+
+def _pool_connections() -> dict:
+    values = {}
+    for label, eng in ENGINES.items():
+        pool = eng.pool if eng is not None else None
+        # у in-memory SQLite пул без размера
+        if not isinstance(pool, QueuePool):
+            continue
+        values[(label, "size")] = pool.size()
+        values[(label, "checked_out")] = pool.checkedout()
+        values[(label, "checked_in")] = pool.checkedin()
+        values[(label, "overflow")] = max(pool.overflow(), 0)
+    return values
+
+
+# счётчики, которые уже ведут кэши и auth, читаются только при снимке;
+# hit ratio = rate(cache_hits_total) / (rate(cache_hits_total) + rate(cache_misses_total))
+registry.callback(
+    "cache_hits_total", "Cache hits.", ("cache",),
+    lambda: {(name,): cache.hits for name, cache in CACHES.items()}, type="counter",
+)
+registry.callback(
+    "cache_misses_total", "Cache misses.", ("cache",),
+    lambda: {(name,): cache.misses for name, cache in CACHES.items()}, type="counter",
+)
+registry.callback(
+    "cache_entries", "Entries in LRU caches.", ("cache",),
+    lambda: {(name,): len(cache) for name, cache in CACHES.items() if hasattr(cache, "__len__")},
+)
+registry.callback(
+    "db_pool_connections", "Connection pool size and usage.", ("engine", "state"), _pool_connections,
+)
+registry.callback(
+    "auth_token_checks_total", "Bearer token checks in get_current_user.", (),
+    lambda: {(): auth_stats.requests}, type="counter",
+)
+registry.callback(
+    "auth_token_check_seconds_total", "Time spent checking bearer tokens.", (),
+    lambda: {(): auth_stats.seconds}, type="counter",
+)
+
+
+@router.get("/metrics", include_in_schema=False)
+def metrics(request: Request):
+    """Prometheus text format; summed over workers when METRICS_DIR is set."""
+    if METRICS_TOKEN:
+        supplied = request.headers.get("Authorization", "").removeprefix("Bearer ")
+        if not hmac.compare_digest(supplied.encode(), METRICS_TOKEN.encode()):
+            raise HTTPException(status_code=401)
+    return Response(render(collect(METRICS_DIR)), media_type=CONTENT_TYPE)
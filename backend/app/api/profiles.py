@@ -0,0 +1,49 @@
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import FileResponse
+from fastapi.security.utils import get_authorization_scheme_param
+
+from app.api.deps import get_current_user, user_from_token
+from app.core.config import PROFILE_DIR, PROFILE_FORMAT, PROFILE_KEEP
+from app.core.profiler import ProfileStore
+from app.db.session import SessionLocal
+from app.models.user import User
+from app.schemas.profile import ProfileOut
+
+router = APIRouter(prefix="/profiles", tags=["profiles"])
+
+profile_store = ProfileStore(PROFILE_DIR, PROFILE_FORMAT, PROFILE_KEEP)
+
+
+def header_user_is_admin(authorization: str) -> bool:
+    """For ProfilerMiddleware: whether `Authorization` belongs to an admin."""
+    scheme, token = get_authorization_scheme_param(authorization)
+    if scheme.lower() != "bearer" or not token:
+        return False
+    db = SessionLocal()
+    try:
+        return user_from_token(token, db).role == "admin"
+    except HTTPException:
+        return False
+    finally:
+        db.close()
+
+
+def _require_admin(user: User) -> None:
+    if user.role != "admin":
+        raise HTTPException(status_code=403, detail="Only admin can view profiles")
+
+
+@router.get("/", response_model=list[ProfileOut])
+def list_profiles(user: User = Depends(get_current_user)):
+    """Captured request profiles, newest first (see PROFILING in the README)."""
+    _require_admin(user)
+    return profile_store.list()
+
+
+@router.get("/{route}/{name}")
+def get_profile(route: str, name: str, user: User = Depends(get_current_user)):
+    _require_admin(user)
+    path = profile_store.path(route, name)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return FileResponse(path, media_type="application/json" if name.endswith(".json") else "text/plain")
@@ -0,0 +1,145 @@
+import re
+
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy import column, func, literal, literal_column, null, select, table, union_all
+from sqlalchemy.orm import Session
+
+from app.api.deps import get_current_user, get_db
+from app.api.statuses import status_catalog
+from app.api.tasks import _visibility_filter
+from app.db.migrations import MESSAGE_SEARCH_TEXT, MESSAGE_TSVECTOR, TASK_SEARCH_TEXT, TASK_TSVECTOR
+from app.models.message import Message
+from app.models.task import Task
+from app.models.user import User
+from app.schemas.search import SearchPage
+
+router = APIRouter(prefix="/search", tags=["search"])
+
+# не больше стольких слов из запроса
+MAX_TERMS = 8
+
+tasks_fts = table("tasks_fts", column("rowid"))
+messages_fts = table("messages_fts", column("rowid"))
+
+
+def _terms(q: str) -> list[str]:
+    # только буквы/цифры: синтаксис FTS5 и tsquery из ввода не пропускаем;
+    # "ё" -> "е", как в индексе (см. миграцию 7)
+    return re.findall(r"\w+", q.lower().replace("ё", "е"))[:MAX_TERMS]
+
+
+def _sqlite_hits(user: User, terms: list[str]):
+    match = " ".join(f'"{term}"*' for term in terms)
+    task_hits = (
+        select(
+            literal("task").label("kind"),
+            Task.id.label("task_id"),
+            null().label("message_id"),
+            # bm25 тем меньше, чем лучше совпадение, — меняем знак;
+            # веса колонок: title, short_description, description
+            (-func.bm25(literal_column("tasks_fts"), 10.0, 5.0, 1.0)).label("rank"),
+            func.snippet(literal_column("tasks_fts"), -1, "[", "]", "…", 12).label("snippet"),
+        )
+        .select_from(tasks_fts.join(Task, Task.id == tasks_fts.c.rowid))
+        .where(literal_column("tasks_fts").op("MATCH")(match), _visibility_filter(user))
+    )
+    message_hits = (
+        select(
+            literal("message").label("kind"),
+            Task.id.label("task_id"),
+            Message.id.label("message_id"),
+            (-func.bm25(literal_column("messages_fts"))).label("rank"),
+            func.snippet(literal_column("messages_fts"), 0, "[", "]", "…", 12).label("snippet"),
+        )
+        .select_from(
+            messages_fts
+            .join(Message, Message.id == messages_fts.c.rowid)
+            .join(Task, Task.id == Message.task_id)
+        )
+        .where(literal_column("messages_fts").op("MATCH")(match), _visibility_filter(user))
+    )
+    return union_all(task_hits, message_hits).subquery("hits")
+
+
+def _postgres_hits(user: User, terms: list[str]):
+    # выражения совпадают с GIN-индексами из миграции 7
+    query = func.to_tsquery("simple", " & ".join(f"{term}:*" for term in terms))
+    task_doc = literal_column(TASK_TSVECTOR)
+    message_doc = literal_column(MESSAGE_TSVECTOR)
+    headline = "StartSel=[, StopSel=], MaxWords=12, MinWords=4"
+    task_hits = (
+        select(
+            literal("task").label("kind"),
+            Task.id.label("task_id"),
+            null().label("message_id"),
+            func.ts_rank(task_doc, query).label("rank"),
+            func.ts_headline("simple", literal_column(TASK_SEARCH_TEXT), query, headline).label("snippet"),
+        )
+        .where(task_doc.op("@@")(query), _visibility_filter(user))
+    )
+    message_hits = (
+        select(
+            literal("message").label("kind"),
+            Task.id.label("task_id"),
+            Message.id.label("message_id"),
+            func.ts_rank(message_doc, query).label("rank"),
+            func.ts_headline("simple", literal_column(MESSAGE_SEARCH_TEXT), query, headline).label("snippet"),
+        )
+        .select_from(Message)
+        .join(Task, Task.id == Message.task_id)
+        .where(message_doc.op("@@")(query), _visibility_filter(user))
+    )
+    return union_all(task_hits, message_hits).subquery("hits")
+
+
+@router.get("/", response_model=SearchPage)
+def search(
+    q: str = Query(min_length=1, max_length=200),
+    limit: int = Query(default=20, ge=1, le=100),
+    offset: int = Query(default=0, ge=0),
+    db: Session = Depends(get_db),
+    user: User = Depends(get_current_user),
+):
+    """Tasks and chat messages matching every word of `q` (as prefixes).
+
+    Only visible tasks and their messages are searched. Hits are ordered by
+    relevance, higher `rank` first; `next_offset` is null on the last page.
+    """
+    terms = _terms(q)
+    if not terms:
+        return {"items": [], "next_offset": None}
+
+    if db.get_bind().dialect.name == "postgresql":
+        hits = _postgres_hits(user, terms)
+    else:
+        hits = _sqlite_hits(user, terms)
+
+    rows = db.execute(
+        select(hits, Task.title, Task.status_id)
+        .join(Task, Task.id == hits.c.task_id)
+        .order_by(hits.c.rank.desc(), hits.c.task_id, hits.c.message_id)
+        .limit(limit + 1)
+        .offset(offset)
+    ).all()
+
+    next_offset = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_offset = offset + limit
+
+    status_names = status_catalog.get(db).by_id
+    return {
+        "items": [
+            {
+                "kind": row.kind,
+                "task_id": row.task_id,
+                "message_id": row.message_id,
+                "title": row.title,
+                "status": status_names.get(row.status_id),
+                "snippet": row.snippet,
+                "rank": row.rank,
+            }
+            for row in rows
+        ],
+        "next_offset": next_offset,
+    }
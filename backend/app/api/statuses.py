@@ -1,12 +1,94 @@
-from fastapi import APIRouter, Depends
+import threading
+import time
+from dataclasses import dataclass
+
+from fastapi import APIRouter, Depends, Request, Response
 from sqlalchemy.orm import Session
 
 from app.api.deps import get_db
+from app.core.config import STATUS_CATALOG_TTL_SECONDS
+from app.core.etag import etag_matches, make_etag, not_modified
 from app.models.status import Status
+from app.schemas.status import StatusOut
 
 router = APIRouter(prefix="/statuses", tags=["statuses"])
 
 
-@router.get("/")
-def get_statuses(db: Session = Depends(get_db)):
-    return db.query(Status).order_by(Status.order_index).all()
+@dataclass(frozen=True)
+class StatusSnapshot:
+    statuses: tuple[dict, ...]  # по order_index
+    by_id: dict[int, str]
+    by_name: dict[str, int]
+    etag: str
+
+
+class StatusCatalog:
+    """Process-wide copy of the `statuses` table.
+
+    The table is re-read at most once per `ttl` seconds (or right away on a
+    lookup miss) and the snapshot is replaced only when the rows differ, so
+    its ETag stays stable while nothing changes.
+    """
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._snapshot: StatusSnapshot | None = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+        # промах — любое чтение таблицы; без блокировки, счётчики приблизительные
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, db: Session) -> StatusSnapshot:
+        snapshot = self._snapshot
+        if snapshot is not None and time.monotonic() - self._checked_at < self.ttl:
+            self.hits += 1
+            return snapshot
+        return self.refresh(db)
+
+    def refresh(self, db: Session) -> StatusSnapshot:
+        self.misses += 1
+        rows = db.query(Status.id, Status.name, Status.order_index).order_by(Status.order_index).all()
+        statuses = tuple({"id": r.id, "name": r.name, "order_index": r.order_index} for r in rows)
+        etag = make_etag(statuses, weak=False)
+
+        with self._lock:
+            if self._snapshot is None or self._snapshot.etag != etag:
+                self._snapshot = StatusSnapshot(
+                    statuses=statuses,
+                    by_id={s["id"]: s["name"] for s in statuses},
+                    by_name={s["name"]: s["id"] for s in statuses},
+                    etag=etag,
+                )
+            self._checked_at = time.monotonic()
+            return self._snapshot
+
+    def invalidate(self) -> None:
+        self._checked_at = 0.0
+
+    def name(self, db: Session, status_id: int) -> str | None:
+        snapshot = self.get(db)
+        if status_id not in snapshot.by_id:
+            snapshot = self.refresh(db)
+        return snapshot.by_id.get(status_id)
+
+    def id_by_name(self, db: Session, name: str) -> int | None:
+        snapshot = self.get(db)
+        if name not in snapshot.by_name:
+            snapshot = self.refresh(db)
+        return snapshot.by_name.get(name)
+
+
+status_catalog = StatusCatalog(ttl=STATUS_CATALOG_TTL_SECONDS)
+
+
+@router.get("/", response_model=list[StatusOut])
+def get_statuses(request: Request, response: Response, db: Session = Depends(get_db)):
+    snapshot = status_catalog.get(db)
+    cache_control = f"public, max-age={int(STATUS_CATALOG_TTL_SECONDS)}"
+    if etag_matches(request, snapshot.etag):
+        return not_modified(snapshot.etag, cache_control)
+
+    response.headers["ETag"] = snapshot.etag
+    response.headers["Cache-Control"] = cache_control
+    return list(snapshot.statuses)
@@ -1,10 +1,26 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+import base64
+import binascii
 
-from app.api.deps import get_db, get_current_user
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from sqlalchemy import func, not_, or_, select, tuple_
+from sqlalchemy.orm import Session, aliased
+
+from app.api.deps import AsyncDb, get_async_db, get_current_user, get_current_user_async, get_db
+from app.api.statuses import status_catalog
+from app.core.etag import etag_matches, make_etag, not_modified
+from app.models.change import TaskTombstone, current_change_seq, next_change_seq, tombstone_horizon
 from app.models.task import Task
-from app.models.status import Status
-from app.schemas.task import TaskCreate, TaskStatusUpdate, TaskUpdate
+from app.schemas.common import Created, Result
+from app.schemas.task import (
+    TaskBatchResult,
+    TaskBatchUpdate,
+    TaskBoardItem,
+    TaskChanges,
+    TaskCreate,
+    TaskDetail,
+    TaskStatusUpdate,
+    TaskUpdate,
+)
 from app.models.user import User
 
 ROLE_RANK = {
@@ -15,7 +31,7 @@ ROLE_RANK = {
 }
 
 
-def _can_view_task(current_user: User, task: Task, db: Session) -> bool:
+def _is_visible(current_user: User, task: Task, assignee: User | None) -> bool:
     # задачи без исполнителя видят все
     if task.assignee_id is None:
         return True
@@ -24,87 +40,443 @@ def _can_view_task(current_user: User, task: Task, db: Session) -> bool:
     if task.assignee_id == current_user.id or task.created_by == current_user.id:
         return True
 
-    assignee = db.query(User).get(task.assignee_id) if task.assignee_id else None
     assignee_rank = ROLE_RANK.get(assignee.role, -1) if assignee else -1
     user_rank = ROLE_RANK.get(current_user.role, -1)
 
     # higher or equal level can view lower-level tasks
     return user_rank >= assignee_rank and assignee_rank != -1
 
-router = APIRouter(prefix="/tasks", tags=["tasks"])
 
+def _can_view_task(current_user: User, task: Task, db: Session) -> bool:
+    assignee = None
+    if task.assignee_id is not None and current_user.id not in (task.assignee_id, task.created_by):
+        assignee = db.query(User).get(task.assignee_id)
+    return _is_visible(current_user, task, assignee)
+
+
+def _visibility_filter(current_user: User):
+    """SQL counterpart of `_is_visible`, usable in WHERE or as a selected column."""
+    visible_roles = [
+        role for role, rank in ROLE_RANK.items()
+        if rank <= ROLE_RANK.get(current_user.role, -1)
+    ]
+    return or_(
+        Task.assignee_id.is_(None),
+        Task.assignee_id == current_user.id,
+        Task.created_by == current_user.id,
+        Task.assignee_id.in_(select(User.id).where(User.role.in_(visible_roles))),
+    )
 
-@router.get("/")
-def get_tasks(
-    db: Session = Depends(get_db),
-    user: User = Depends(get_current_user),
-):
-    tasks = db.query(Task).all()
 
-    result = []
-    for t in tasks:
-        if not _can_view_task(user, t, db):
-            continue
+def _get_visible_task(db: Session, current_user: User, task_id: int) -> Task:
+    """Loads a task and checks visibility in one query: 404 if missing, 403 if hidden."""
+    row = (
+        db.query(Task, _visibility_filter(current_user))
+        .filter(Task.id == task_id)
+        .first()
+    )
+    if not row:
+        raise HTTPException(status_code=404, detail="Task not found")
+
+    task, visible = row
+    if not visible:
+        raise HTTPException(status_code=403, detail="Access denied")
+    return task
+
+
+Assignee = aliased(User, name="assignee")
+Creator = aliased(User, name="creator")
+
+
+def _board_query(db: Session):
+    """Tasks with assignee and creator username in a single SELECT.
+
+    Status names are not joined: they come from `status_catalog`.
+    """
+    return (
+        db.query(Task, Assignee, Creator.username)
+        .outerjoin(Assignee, Assignee.id == Task.assignee_id)
+        .outerjoin(Creator, Creator.id == Task.created_by)
+    )
+
+
+BOARD_FIELDS = (
+    "id",
+    "title",
+    "short_description",
+    "status",
+    "assignee",
+    "assignee_id",
+    "assignee_role",
+    "created_by",
+    "is_mine",
+    "is_lower",
+)
+
+
+def _encode_cursor(status_id: int, task_id: int) -> str:
+    return base64.urlsafe_b64encode(f"{status_id}:{task_id}".encode()).decode()
+
+
+def _decode_cursor(cursor: str) -> tuple[int, int]:
+    try:
+        status_id, task_id = base64.urlsafe_b64decode(cursor.encode()).decode().split(":")
+        return int(status_id), int(task_id)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def _parse_fields(fields: str | None) -> tuple[str, ...]:
+    if not fields:
+        return BOARD_FIELDS
+
+    requested = {f.strip() for f in fields.split(",") if f.strip()}
+    unknown = requested - set(BOARD_FIELDS)
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(sorted(unknown))}")
+
+    # id нужен клиенту всегда (ключи карточек, drag&drop)
+    requested.add("id")
+    return tuple(f for f in BOARD_FIELDS if f in requested)
+
+
+def _status_names(db: Session, tasks) -> dict[int, str]:
+    snapshot = status_catalog.get(db)
+    if any(t.status_id not in snapshot.by_id for t in tasks):
+        # статус мог появиться после последней загрузки каталога
+        snapshot = status_catalog.refresh(db)
+    return snapshot.by_id
+
+
+def _board_item(
+    current_user: User,
+    task: Task,
+    status_name: str | None,
+    assignee: User | None,
+    creator_name: str | None,
+) -> dict:
+    is_mine = task.assignee_id == current_user.id or task.assignee_id is None
+    assignee_rank = ROLE_RANK.get(assignee.role, -1) if assignee else -1
+    user_rank = ROLE_RANK.get(current_user.role, -1)
+    is_lower = assignee is not None and user_rank > assignee_rank and not is_mine
+
+    return {
+        "id": task.id,
+        "title": task.title,
+        "short_description": task.short_description,
+        "status": status_name,
+        "assignee": assignee.username if assignee else None,
+        "assignee_id": assignee.id if assignee else None,
+        "assignee_role": assignee.role if assignee else None,
+        "created_by": creator_name,
+        "is_mine": is_mine,
+        "is_lower": is_lower,
+    }
+
+
+def _encode_sync_token(seq: int, current_user: User) -> str:
+    # роль входит в токен: при её смене меняется вся видимая доска
+    raw = f"{seq}:{current_user.id}:{current_user.role}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def _decode_sync_token(token: str | None, current_user: User) -> int | None:
+    """Returns the change number, or None when a full reload is required."""
+    if not token:
+        return None
+    try:
+        seq, user_id, role = base64.urlsafe_b64decode(token.encode()).decode().split(":", 2)
+        seq, user_id = int(seq), int(user_id)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        return None
+    if user_id != current_user.id or role != current_user.role:
+        return None
+    return seq
+
+
+def _touch_user_tasks(db: Session, user_id: int) -> None:
+    """Marks tasks whose board card shows this user as changed (rename/role change)."""
+    seq = next_change_seq(db.connection())
+    (
+        db.query(Task)
+        .filter(or_(Task.assignee_id == user_id, Task.created_by == user_id))
+        .update({Task.change_seq: seq}, synchronize_session=False)
+    )
+
+
+router = APIRouter(prefix="/tasks", tags=["tasks"])
 
-        status_name = db.query(Status).get(t.status_id).name
-        assignee = db.query(User).get(t.assignee_id) if t.assignee_id else None
-        creator = db.query(User).get(t.created_by) if t.created_by else None
-
-        is_mine = t.assignee_id == user.id or t.assignee_id is None
-        assignee_rank = ROLE_RANK.get(assignee.role, -1) if assignee else -1
-        user_rank = ROLE_RANK.get(user.role, -1)
-        is_lower = assignee is not None and user_rank > assignee_rank and not is_mine
-
-        result.append({
-            "id": t.id,
-            "title": t.title,
-            "short_description": t.short_description,
-            "status": status_name,
-            "assignee": assignee.username if assignee else None,
-            "assignee_id": assignee.id if assignee else None,
-            "assignee_role": assignee.role if assignee else None,
-            "created_by": creator.username if creator else None,
-            "is_mine": is_mine,
-            "is_lower": is_lower,
-        })
+# ответы с ETag браузер хранит, но перед использованием перепроверяет
+REVALIDATE = "private, no-cache"
 
+
+def _filter_board(
+    query,
+    user: User,
+    status_id: int | None,
+    assignee_id: int | None,
+    created_by: int | None,
+    is_mine: bool | None,
+):
+    query = query.filter(_visibility_filter(user))
+    if status_id is not None:
+        query = query.filter(Task.status_id == status_id)
+    if assignee_id is not None:
+        query = query.filter(
+            Task.assignee_id.is_(None) if assignee_id == 0 else Task.assignee_id == assignee_id
+        )
+    if created_by is not None:
+        query = query.filter(Task.created_by == created_by)
+    if is_mine is not None:
+        mine = or_(Task.assignee_id == user.id, Task.assignee_id.is_(None))
+        query = query.filter(mine if is_mine else not_(mine))
+    return query
+
+
+def _board_etag(
+    db: Session,
+    user: User,
+    status_id: int | None,
+    assignee_id: int | None,
+    created_by: int | None,
+    is_mine: bool | None,
+    params: tuple,
+) -> str:
+    """Validator of the visible board without loading it.
+
+    Every task write takes the next `change_seq` (in commit order), so within
+    the same filters max(change_seq) moves when a task appears or changes and
+    count(*) drops when one is deleted or becomes hidden.
+    """
+    query = db.query(func.max(Task.change_seq), func.count(Task.id))
+    seq, count = _filter_board(query, user, status_id, assignee_id, created_by, is_mine).one()
+    # is_mine / is_lower зависят от пользователя и его роли
+    return make_etag("board", user.id, user.role, seq, count, status_catalog.get(db).etag, params)
+
+
+def _list_tasks(
+    db: Session,
+    user: User,
+    status_id: int | None,
+    assignee_id: int | None,
+    created_by: int | None,
+    is_mine: bool | None,
+    selected: tuple[str, ...],
+    limit: int | None,
+    cursor: str | None,
+) -> tuple[list[dict], str | None]:
+    query = _filter_board(_board_query(db), user, status_id, assignee_id, created_by, is_mine)
+
+    # keyset-пагинация по (status_id, id): стоимость страницы не зависит от глубины
+    if cursor is not None:
+        query = query.filter(tuple_(Task.status_id, Task.id) > _decode_cursor(cursor))
+
+    query = query.order_by(Task.status_id, Task.id)
+    if limit is not None:
+        query = query.limit(limit + 1)
+    rows = query.all()
+
+    next_cursor = None
+    if limit is not None and len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1][0]
+        next_cursor = _encode_cursor(last.status_id, last.id)
+
+    status_names = _status_names(db, (row[0] for row in rows))
+    result = []
+    for t, assignee, creator_name in rows:
+        item = _board_item(user, t, status_names.get(t.status_id), assignee, creator_name)
+        if selected is not BOARD_FIELDS:
+            item = {f: item[f] for f in selected}
+        result.append(item)
+
+    return result, next_cursor
+
+
+def _board_snapshot(
+    db: Session,
+    user: User,
+    status_id: int | None,
+    assignee_id: int | None,
+    created_by: int | None,
+    is_mine: bool | None,
+    selected: tuple[str, ...],
+    limit: int | None,
+    cursor: str | None,
+    matches,
+) -> tuple[str, tuple[list[dict], str | None] | None]:
+    """Board ETag and, unless `matches(etag)`, the page, read in one session.
+
+    The ETag is computed before the rows: if data changes in between, the
+    client gets a newer body under the older ETag and simply refetches it.
+    """
+    etag = _board_etag(db, user, status_id, assignee_id, created_by, is_mine, (selected, limit, cursor))
+    if matches(etag):
+        return etag, None
+    return etag, _list_tasks(db, user, status_id, assignee_id, created_by, is_mine, selected, limit, cursor)
+
+
+@router.get("/", response_model=list[TaskBoardItem], response_model_exclude_unset=True)
+async def get_tasks(
+    request: Request,
+    response: Response,
+    status_id: int | None = None,
+    assignee_id: int | None = Query(default=None, description="0 — задачи без исполнителя"),
+    created_by: int | None = None,
+    is_mine: bool | None = None,
+    fields: str | None = Query(default=None, description="Comma-separated subset of task fields"),
+    limit: int | None = Query(default=None, ge=1, le=500),
+    cursor: str | None = Query(default=None, description="X-Next-Cursor from the previous page"),
+    db: AsyncDb = Depends(get_async_db),
+    user: User = Depends(get_current_user_async),
+):
+    selected = _parse_fields(fields)
+    # страница ограничена limit; вся доска — десятки тысяч строк, их разбор
+    # не должен занимать поток event loop
+    run = db.run if limit is not None else db.run_threaded
+    etag, page = await run(
+        _board_snapshot, user, status_id, assignee_id, created_by, is_mine, selected, limit, cursor,
+        lambda etag: etag_matches(request, etag),
+    )
+    if page is None:
+        return not_modified(etag, REVALIDATE)
+
+    result, next_cursor = page
+    if next_cursor is not None:
+        response.headers["X-Next-Cursor"] = next_cursor
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = REVALIDATE
     return result
 
-@router.get("/{task_id}")
-def get_task(
-    task_id: int,
+
+@router.get("/changes", response_model=TaskChanges, response_model_exclude_unset=True)
+def get_task_changes(
+    since: str | None = Query(default=None, description="token из предыдущего ответа"),
     db: Session = Depends(get_db),
     user: User = Depends(get_current_user),
 ):
-    task = db.query(Task).filter(Task.id == task_id).first()
-    if not task:
+    """Board delta since a sync token.
+
+    `reset: true` means the token was missing or no longer valid for this
+    user (e.g. their role changed) or older than the kept tombstones
+    (SYNC_TOMBSTONE_RETENTION), and `changes` holds the whole board.
+    Tasks that changed but are not visible are returned in `deleted`.
+    """
+    # читаем счётчик до выборки: изменения, закоммиченные между ними,
+    # придут ещё раз в следующей дельте, но не потеряются
+    token = _encode_sync_token(current_change_seq(db.connection()), user)
+    since_seq = _decode_sync_token(since, user)
+    if since_seq is not None and since_seq < tombstone_horizon(db.connection()):
+        # удаления после since_seq уже частично забыты — дельта была бы неполной
+        since_seq = None
+
+    if since_seq is None:
+        rows = (
+            _board_query(db)
+            .filter(_visibility_filter(user))
+            .order_by(Task.status_id, Task.id)
+            .all()
+        )
+        status_names = _status_names(db, (row[0] for row in rows))
+        return {
+            "token": token,
+            "reset": True,
+            "changes": [
+                _board_item(user, t, status_names.get(t.status_id), assignee, creator_name)
+                for t, assignee, creator_name in rows
+            ],
+            "deleted": [],
+        }
+
+    rows = (
+        _board_query(db)
+        .add_columns(_visibility_filter(user))
+        .filter(Task.change_seq > since_seq)
+        .order_by(Task.change_seq, Task.id)
+        .all()
+    )
+    status_names = _status_names(db, (row[0] for row in rows))
+    changes = []
+    deleted = []
+    for t, assignee, creator_name, visible in rows:
+        if visible:
+            changes.append(_board_item(user, t, status_names.get(t.status_id), assignee, creator_name))
+        else:
+            deleted.append(t.id)
+
+    deleted.extend(
+        task_id for (task_id,) in
+        db.query(TaskTombstone.task_id).filter(TaskTombstone.change_seq > since_seq)
+    )
+
+    return {"token": token, "reset": False, "changes": changes, "deleted": deleted}
+
+
+def _task_etag(db: Session, user: User, task_id: int) -> str:
+    row = (
+        db.query(Task.change_seq, _visibility_filter(user))
+        .filter(Task.id == task_id)
+        .first()
+    )
+    if not row:
         raise HTTPException(status_code=404, detail="Task not found")
 
-    if not _can_view_task(user, task, db):
+    seq, visible = row
+    if not visible:
         raise HTTPException(status_code=403, detail="Access denied")
+    return make_etag("task", task_id, seq, status_catalog.get(db).etag)
 
-    status_obj = db.query(Status).filter(Status.id == task.status_id).first()
-    if not status_obj:
-        raise HTTPException(status_code=500, detail="Task has invalid status_id")
 
-    assignee = db.query(User).get(task.assignee_id) if task.assignee_id else None
-    creator = db.query(User).get(task.created_by) if task.created_by else None
+def _task_detail(db: Session, user: User, task_id: int) -> dict:
+    row = (
+        _board_query(db)
+        .add_columns(_visibility_filter(user))
+        .filter(Task.id == task_id)
+        .first()
+    )
+    if not row:
+        raise HTTPException(status_code=404, detail="Task not found")
+
+    task, assignee, creator_name, visible = row
+    if not visible:
+        raise HTTPException(status_code=403, detail="Access denied")
+
+    status_name = status_catalog.name(db, task.status_id)
+    if status_name is None:
+        raise HTTPException(status_code=500, detail="Task has invalid status_id")
 
     return {
         "id": task.id,
         "title": task.title,
         "short_description": task.short_description,
         "description": task.description,
-        "status": status_obj.name,
+        "status": status_name,
         "assignee": assignee.username if assignee else None,
         "assignee_id": assignee.id if assignee else None,
         "assignee_role": assignee.role if assignee else None,
-        "created_by": creator.username if creator else None,
+        "created_by": creator_name,
         "created_at": task.created_at,
         "updated_at": task.updated_at,
     }
 
-@router.post("/", status_code=201)
+
+@router.get("/{task_id}", response_model=TaskDetail)
+async def get_task(
+    task_id: int,
+    request: Request,
+    response: Response,
+    db: AsyncDb = Depends(get_async_db),
+    user: User = Depends(get_current_user_async),
+):
+    etag = await db.run(_task_etag, user, task_id)
+    if etag_matches(request, etag):
+        return not_modified(etag, REVALIDATE)
+
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = REVALIDATE
+    return await db.run(_task_detail, user, task_id)
+
+@router.post("/", status_code=201, response_model=Created)
 def create_task(
     data: TaskCreate,
     db: Session = Depends(get_db),
@@ -114,8 +486,7 @@ def create_task(
         raise HTTPException(status_code=403, detail="Access denied")
 
     # ✅ статус теперь берём из запроса
-    status_obj = db.query(Status).filter(Status.id == data.status_id).first()
-    if not status_obj:
+    if status_catalog.name(db, data.status_id) is None:
         raise HTTPException(status_code=400, detail="Invalid status_id")
 
     assignee_id = None
@@ -129,7 +500,7 @@ def create_task(
         title=data.title,
         short_description=data.short_description,
         description=data.description,
-        status_id=status_obj.id,
+        status_id=data.status_id,
         created_by=user.id,   # ← ВОТ ЭТОГО НЕ ХВАТАЛО
         assignee_id=assignee_id,
     )
@@ -142,31 +513,99 @@ def create_task(
 
 
 
-@router.patch("/{task_id}/status")
+def _batch_error(task_id: int, code: int, detail: str) -> dict:
+    return {"id": task_id, "status": "error", "code": code, "detail": detail}
+
+
+# до /{task_id}: иначе "batch" попадёт в task_id
+@router.patch("/batch", response_model=list[TaskBatchResult], response_model_exclude_none=True)
+def update_tasks_batch(
+    data: TaskBatchUpdate,
+    db: Session = Depends(get_db),
+    user: User = Depends(get_current_user),
+):
+    """Applies many task changes in one transaction.
+
+    Items follow the rules of PATCH /tasks/{id}/status (`status` by name) and
+    PATCH /tasks/{id} (other fields). Failed items are reported with their
+    HTTP code and skipped; the rest are committed together.
+    """
+    ids = {item.id for item in data.items}
+    # существование и видимость — одним запросом на весь пакет
+    tasks = {
+        task.id: (task, visible)
+        for task, visible in db.query(Task, _visibility_filter(user)).filter(Task.id.in_(ids))
+    }
+    assignee_ids = {item.assignee_id for item in data.items if item.assignee_id}
+    known_users = {
+        user_id for (user_id,) in db.query(User.id).filter(User.id.in_(assignee_ids))
+    } if assignee_ids else set()
+    can_edit = user.role in ("manager", "ceo", "admin")
+
+    results = []
+    for item in data.items:
+        found = tasks.get(item.id)
+        if found is None:
+            results.append(_batch_error(item.id, 404, "Task not found"))
+            continue
+        task, visible = found
+        if not visible:
+            results.append(_batch_error(item.id, 403, "Access denied"))
+            continue
+        if item.model_dump(exclude_none=True, exclude={"id", "status"}) and not can_edit:
+            results.append(_batch_error(item.id, 403, "Access denied"))
+            continue
+        if item.status is not None and item.status_id is not None:
+            results.append(_batch_error(item.id, 400, "Use either status or status_id"))
+            continue
+
+        status_id = item.status_id
+        if item.status is not None:
+            status_id = status_catalog.id_by_name(db, item.status)
+            if status_id is None:
+                results.append(_batch_error(item.id, 400, "Invalid status"))
+                continue
+        elif status_id is not None and status_catalog.name(db, status_id) is None:
+            results.append(_batch_error(item.id, 400, "Invalid status_id"))
+            continue
+        if item.assignee_id and item.assignee_id not in known_users:
+            results.append(_batch_error(item.id, 400, "Invalid assignee_id"))
+            continue
+
+        if status_id is not None:
+            task.status_id = status_id
+        if item.assignee_id is not None:
+            task.assignee_id = item.assignee_id or None
+        for field in ("title", "short_description", "description"):
+            value = getattr(item, field)
+            if value is not None:
+                setattr(task, field, value)
+        results.append({"id": item.id, "status": "updated"})
+
+    db.commit()
+    return results
+
+
+@router.patch("/{task_id}/status", response_model=Result)
 def update_task_status(
     task_id: int,
     data: TaskStatusUpdate,
     db: Session = Depends(get_db),
     user: User = Depends(get_current_user),
 ):
-    task = db.query(Task).filter(Task.id == task_id).first()
-    if not task:
-        raise HTTPException(status_code=404, detail="Task not found")
-
-    if not _can_view_task(user, task, db):
-        raise HTTPException(status_code=403, detail="Access denied")
+    task = _get_visible_task(db, user, task_id)
 
-    status_obj = db.query(Status).filter(Status.name == data.status).first()
-    if not status_obj:
+    status_id = status_catalog.id_by_name(db, data.status)
+    if status_id is None:
         raise HTTPException(status_code=400, detail="Invalid status")
 
-    task.status_id = status_obj.id
+    task.status_id = status_id
     db.commit()
 
     return {"status": "updated"}
 
 
-@router.patch("/{task_id}")
+@router.patch("/{task_id}", response_model=Result)
 def update_task(
     task_id: int,
     data: TaskUpdate,
@@ -176,19 +615,13 @@ def update_task(
     if user.role not in ("manager", "ceo", "admin"):
         raise HTTPException(status_code=403, detail="Access denied")
 
-    task = db.query(Task).filter(Task.id == task_id).first()
-    if not task:
-        raise HTTPException(status_code=404, detail="Task not found")
-
     # Проверка видимости для менеджеров/ниже
-    if not _can_view_task(user, task, db):
-        raise HTTPException(status_code=403, detail="Access denied")
+    task = _get_visible_task(db, user, task_id)
 
     if data.status_id is not None:
-        status_obj = db.query(Status).filter(Status.id == data.status_id).first()
-        if not status_obj:
+        if status_catalog.name(db, data.status_id) is None:
             raise HTTPException(status_code=400, detail="Invalid status_id")
-        task.status_id = status_obj.id
+        task.status_id = data.status_id
 
     if data.assignee_id is not None:
         if data.assignee_id == 0:
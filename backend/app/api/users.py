@@ -1,21 +1,45 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from sqlalchemy import func
 from sqlalchemy.orm import Session
 
-from app.api.deps import get_db, get_current_user
+from app.api.deps import (
+    AsyncDb,
+    get_async_db,
+    get_current_user,
+    get_current_user_async,
+    get_db,
+    invalidate_user_tokens,
+)
+from app.api.tasks import REVALIDATE, _touch_user_tasks
 from app.models.user import User
-from app.schemas.auth import PasswordChange, UserUpdate
+from app.schemas.auth import PasswordChange, UserListItem, UserOut, UserUpdate
+from app.schemas.common import Result
+from app.core.etag import etag_matches, make_etag, not_modified
 from app.core.security import hash_password
 
 router = APIRouter(prefix="/users", tags=["users"])
 
 
-@router.get("/")
+@router.get("/", response_model=list[UserListItem], response_model_exclude_unset=True)
 def list_users(
+    request: Request,
+    response: Response,
     db: Session = Depends(get_db),
     user: User = Depends(get_current_user),
 ):
     show_sensitive = user.role in ("admin", "ceo")
 
+    # пользователи только добавляются, а смена логина/роли/пароля увеличивает
+    # token_version; тихий перехеш при входе (см. auth.login) ETag не меняет
+    count, last_id, versions = db.query(
+        func.count(User.id), func.max(User.id), func.sum(User.token_version)
+    ).one()
+    etag = make_etag("users", show_sensitive, count, last_id, versions)
+    if etag_matches(request, etag):
+        return not_modified(etag, REVALIDATE)
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = REVALIDATE
+
     users = db.query(User).order_by(User.username).all()
     result = []
     for u in users:
@@ -32,19 +56,30 @@ def list_users(
     return result
 
 
-@router.get("/me")
-def get_me(user: User = Depends(get_current_user)):
+@router.get("/me", response_model=UserOut)
+async def get_me(
+    db: AsyncDb = Depends(get_async_db),
+    user: User = Depends(get_current_user_async),
+):
     if not user:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED)
+
+    created_at = user.created_at
+    if created_at is None:
+        # пользователь собран из claims токена, дата регистрации в нём не хранится
+        created_at = await db.run(
+            lambda session: session.query(User.created_at).filter(User.id == user.id).scalar()
+        )
+
     return {
         "id": user.id,
         "username": user.username,
         "role": user.role,
-        "created_at": user.created_at,
+        "created_at": created_at,
     }
 
 
-@router.patch("/{user_id}")
+@router.patch("/{user_id}", response_model=Result)
 def update_user(
     user_id: int,
     data: UserUpdate,
@@ -73,5 +108,17 @@ def update_user(
         user.password_hash = hash_password(data.password)
         user.password_plain = data.password
 
+    if data.username or data.role:
+        # имя/роль видны на карточках доски — отдаём их в следующей дельте
+        _touch_user_tasks(db, user.id)
+
+    if data.username or data.role or data.password:
+        # выданные ранее токены несут старые логин/роль — отзываем их
+        user.token_version = (user.token_version or 0) + 1
+
     db.commit()
+
+    if data.username or data.role or data.password:
+        invalidate_user_tokens(user.id)
+
     return {"status": "ok"}
@@ -0,0 +1,168 @@
+"""Response compression (gzip, optionally brotli) as ASGI middleware.
+
+Only responses whose Content-Type starts with an allowlisted prefix and
+whose body is at least `minimum_size` bytes are compressed; 1xx, 204 and
+304 responses and already encoded bodies pass through untouched. Brotli is
+used only when the `brotli` package is installed and the client accepts it.
+"""
+import gzip
+import zlib
+
+import anyio.to_thread
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:  # brotli — необязательная зависимость
+    brotli = None
+
+# тела больше этого сжимаются в потоке, чтобы не держать event loop
+THREAD_MIN_SIZE = 256 * 1024
+
+
+def available_encodings(preferred: list[str]) -> list[str]:
+    supported = {"gzip"} | ({"br"} if brotli is not None else set())
+    return [e for e in preferred if e in supported]
+
+
+def _accepted(accept_encoding: str) -> set[str]:
+    accepted = set()
+    for item in accept_encoding.split(","):
+        coding, _, params = item.strip().partition(";")
+        q = params.strip()
+        if q.startswith("q="):
+            try:
+                if float(q[2:]) == 0:
+                    continue
+            except ValueError:
+                continue
+        accepted.add(coding.strip().lower())
+    return accepted
+
+
+class _Encoder:
+    def __init__(self, encoding: str, level: int):
+        self.encoding = encoding
+        self.level = level
+        if encoding == "br":
+            self._stream = brotli.Compressor(quality=level)
+        else:
+            self._stream = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress_all(self, body: bytes) -> bytes:
+        if self.encoding == "br":
+            return brotli.compress(body, quality=self.level)
+        return gzip.compress(body, compresslevel=self.level, mtime=0)
+
+    def process(self, chunk: bytes) -> bytes:
+        if self.encoding == "br":
+            return self._stream.process(chunk)
+        return self._stream.compress(chunk)
+
+    def finish(self) -> bytes:
+        if self.encoding == "br":
+            return self._stream.finish()
+        return self._stream.flush()
+
+
+class CompressionMiddleware:
+    def __init__(
+        self,
+        app: ASGIApp,
+        *,
+        encodings: list[str],
+        minimum_size: int = 1024,
+        gzip_level: int = 6,
+        brotli_quality: int = 4,
+        content_types: tuple[str, ...] = ("application/json", "text/"),
+    ) -> None:
+        self.app = app
+        self.encodings = available_encodings(encodings)
+        self.minimum_size = minimum_size
+        self.levels = {"gzip": gzip_level, "br": brotli_quality}
+        self.content_types = tuple(content_types)
+
+    def _choose(self, scope: Scope) -> str | None:
+        accepted = _accepted(Headers(scope=scope).get("accept-encoding", ""))
+        for encoding in self.encodings:
+            if encoding in accepted:
+                return encoding
+        return None
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        encoding = self._choose(scope) if scope["type"] == "http" else None
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start: Message | None = None
+        encoder: _Encoder | None = None
+        passthrough = False
+
+        async def send_compressed(message: Message) -> None:
+            nonlocal start, encoder, passthrough
+
+            if message["type"] == "http.response.start":
+                start = {**message, "headers": list(message.get("headers", []))}
+                headers = Headers(raw=start["headers"])
+                content_type = headers.get("content-type", "")
+                passthrough = (
+                    message["status"] < 200
+                    or message["status"] in (204, 304)
+                    or "content-encoding" in headers
+                    or not content_type.startswith(self.content_types)
+                )
+                if passthrough:
+                    await send(start)
+                return
+
+            if passthrough or message["type"] != "http.response.body":
+                if not passthrough and encoder is None:
+                    # тело идёт не через http.response.body (например,
+                    # http.response.pathsend у FileResponse): сжать его нельзя,
+                    # отложенный start уходит первым и без изменений
+                    passthrough = True
+                    await send(start)
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            headers = MutableHeaders(raw=start["headers"])
+
+            if encoder is None:
+                if not more_body and len(body) < self.minimum_size:
+                    passthrough = True
+                    await send(start)
+                    await send(message)
+                    return
+
+                encoder = _Encoder(encoding, self.levels[encoding])
+                headers["Content-Encoding"] = encoding
+                headers.add_vary_header("Accept-Encoding")
+                etag = headers.get("etag")
+                if etag and not etag.startswith("W/"):
+                    # сжатое тело уже не совпадает байт в байт с несжатым
+                    headers["ETag"] = "W/" + etag
+
+                if not more_body:
+                    if len(body) >= THREAD_MIN_SIZE:
+                        body = await anyio.to_thread.run_sync(encoder.compress_all, body)
+                    else:
+                        body = encoder.compress_all(body)
+                    headers["Content-Length"] = str(len(body))
+                    await send(start)
+                    await send({"type": "http.response.body", "body": body})
+                    return
+
+                # потоковый ответ: длина заранее неизвестна
+                del headers["Content-Length"]
+                await send(start)
+
+            chunk = encoder.process(body)
+            if not more_body:
+                chunk += encoder.finish()
+            await send({"type": "http.response.body", "body": chunk, "more_body": more_body})
+
+        await self.app(scope, receive, send_compressed)
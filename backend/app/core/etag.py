@@ -0,0 +1,28 @@
+"""ETag helpers for conditional GET (If-None-Match -> 304)."""
+import hashlib
+
+from fastapi import Request, Response
+
+
+def make_etag(*parts, weak: bool = True) -> str:
+    """Opaque validator from the given parts (versions, counts, request params)."""
+    digest = hashlib.sha1(repr(parts).encode()).hexdigest()[:16]
+    return f'W/"{digest}"' if weak else f'"{digest}"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    # If-None-Match сравнивается слабо (RFC 9110, 13.1.2): префикс W/ не важен
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == opaque for tag in header.split(","))
+
+
+def not_modified(etag: str, cache_control: str | None = None) -> Response:
+    headers = {"ETag": etag}
+    if cache_control:
+        headers["Cache-Control"] = cache_control
+    return Response(status_code=304, headers=headers)
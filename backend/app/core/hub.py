@@ -0,0 +1,70 @@
+"""Pub/sub for pushing chat messages to open WebSocket connections.
+
+`LocalHub` only reaches subscribers of the current process. With several
+uvicorn workers install a broker-backed `Hub` (Redis, Postgres
+LISTEN/NOTIFY, ...) through `set_hub` at startup.
+"""
+import asyncio
+import threading
+from abc import ABC, abstractmethod
+from collections import defaultdict
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
+
+class Hub(ABC):
+    @abstractmethod
+    def publish(self, topic: str, payload: dict) -> None:
+        """Called from sync endpoints (threadpool) after the data is committed."""
+
+    @abstractmethod
+    def subscribe(self, topic: str) -> "AsyncIterator[asyncio.Queue]":
+        """Async context manager yielding a queue of payloads for `topic`."""
+
+
+class LocalHub(Hub):
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers: dict[str, set] = defaultdict(set)
+
+    def publish(self, topic: str, payload: dict) -> None:
+        with self._lock:
+            targets = list(self._subscribers.get(topic, ()))
+
+        for loop, queue in targets:
+            try:
+                loop.call_soon_threadsafe(queue.put_nowait, payload)
+            except RuntimeError:
+                # event loop подписчика уже закрыт
+                pass
+
+    @asynccontextmanager
+    async def subscribe(self, topic: str):
+        entry = (asyncio.get_running_loop(), asyncio.Queue())
+        with self._lock:
+            self._subscribers[topic].add(entry)
+        try:
+            yield entry[1]
+        finally:
+            with self._lock:
+                subscribers = self._subscribers.get(topic)
+                if subscribers is not None:
+                    subscribers.discard(entry)
+                    if not subscribers:
+                        del self._subscribers[topic]
+
+
+_hub: Hub = LocalHub()
+
+
+def get_hub() -> Hub:
+    return _hub
+
+
+def set_hub(hub: Hub) -> None:
+    global _hub
+    _hub = hub
+
+
+def task_messages_topic(task_id: int) -> str:
+    return f"task:{task_id}:messages"
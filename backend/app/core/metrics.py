@@ -0,0 +1,325 @@
+"""Prometheus metrics without extra dependencies.
+
+Counters, gauges and histograms are kept in process memory (`registry`) and
+rendered in the Prometheus text format 0.0.4. Callback metrics read
+existing counters (caches, pools) only when a snapshot is taken, so they
+cost nothing on the request path.
+
+Several worker processes: set METRICS_DIR to a directory shared by the
+workers and empty it before starting them. Every worker writes a snapshot
+of its metrics there (`<pid>.json`) every METRICS_FLUSH_SECONDS, and the
+worker that serves /metrics sums all snapshots. Counters and histograms of
+exited workers are kept, gauges are summed over live workers only.
+"""
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from pathlib import Path
+
+from app.core.query_stats import route_template
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# ожидание соединения: в норме доли миллисекунды, потолок — DB_POOL_TIMEOUT
+POOL_WAIT_BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0)
+PASSWORD_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+
+class Metric:
+    type = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: dict[tuple, object] = {}
+        self._lock = threading.Lock()
+
+    def samples(self) -> list[list]:
+        """[[label values, value], ...]; JSON-friendly for snapshots."""
+        with self._lock:
+            return [[list(labels), value] for labels, value in self._values.items()]
+
+
+class Counter(Metric):
+    type = "counter"
+
+    def inc(self, *labelvalues: str, amount: float = 1.0) -> None:
+        with self._lock:
+            self._values[labelvalues] = self._values.get(labelvalues, 0.0) + amount
+
+
+class Gauge(Metric):
+    type = "gauge"
+
+    def inc(self, *labelvalues: str, amount: float = 1.0) -> None:
+        with self._lock:
+            self._values[labelvalues] = self._values.get(labelvalues, 0.0) + amount
+
+    def dec(self, *labelvalues: str, amount: float = 1.0) -> None:
+        self.inc(*labelvalues, amount=-amount)
+
+    def set(self, value: float, *labelvalues: str) -> None:
+        with self._lock:
+            self._values[labelvalues] = float(value)
+
+
+class Histogram(Metric):
+    """Values are [count per bucket..., count above the last bucket, sum]."""
+
+    type = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = (), buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, *labelvalues: str) -> None:
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            counts = self._values.get(labelvalues)
+            if counts is None:
+                counts = self._values[labelvalues] = [0] * (len(self.buckets) + 1) + [0.0]
+            counts[index] += 1
+            counts[-1] += value
+
+    def samples(self) -> list[list]:
+        with self._lock:
+            return [[list(labels), list(counts)] for labels, counts in self._values.items()]
+
+
+class Callback(Metric):
+    """Counter or gauge whose values `fn()` returns as {label values tuple: value}."""
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...], fn, type: str = "gauge"):
+        super().__init__(name, documentation, labelnames)
+        self.type = type
+        self.fn = fn
+
+    def samples(self) -> list[list]:
+        return [[list(labels), float(value)] for labels, value in self.fn().items()]
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: dict[str, Metric] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: Metric) -> Metric:
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"metric {metric.name} is already registered")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: tuple[str, ...] = (), buckets=LATENCY_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def callback(self, name: str, documentation: str, labelnames: tuple[str, ...], fn, type: str = "gauge") -> Callback:
+        return self.register(Callback(name, documentation, labelnames, fn, type))
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return {
+            metric.name: {
+                "type": metric.type,
+                "help": metric.documentation,
+                "labelnames": list(metric.labelnames),
+                "buckets": list(getattr(metric, "buckets", ())),
+                "samples": metric.samples(),
+            }
+            for metric in metrics
+        }
+
+
+registry = Registry()
+
+
+# =========================
+# Метрики приложения
+# =========================
+HTTP_REQUESTS = registry.counter(
+    "http_requests_total", "HTTP requests by route template and status.", ("method", "route", "status")
+)
+HTTP_REQUEST_DURATION = registry.histogram(
+    "http_request_duration_seconds", "HTTP request latency by route template.", ("method", "route")
+)
+HTTP_IN_PROGRESS = registry.gauge(
+    "http_requests_in_progress", "HTTP requests being processed.", ("method",)
+)
+DB_POOL_CHECKOUT = registry.histogram(
+    "db_pool_checkout_seconds", "Time spent waiting for a pooled connection.", ("engine",), POOL_WAIT_BUCKETS
+)
+PASSWORD_VERIFY = registry.histogram(
+    "auth_password_verify_seconds", "Password hash verification time at login.", ("scheme",), PASSWORD_BUCKETS
+)
+CHAT_POLLS = registry.counter(
+    "chat_polls_total", "Chat polls (GET messages with since_id) by result.", ("result",)
+)
+
+
+# =========================
+# Несколько воркеров
+# =========================
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def write_snapshot(directory: str | os.PathLike, snapshot: dict | None = None) -> None:
+    path = Path(directory) / f"{os.getpid()}.json"
+    # поток записи и /metrics могут писать одновременно
+    tmp = path.with_name(f"{os.getpid()}.{threading.get_ident()}.tmp")
+    tmp.write_text(json.dumps(snapshot or registry.snapshot()))
+    # читатель видит либо старый, либо новый файл целиком
+    os.replace(tmp, path)
+
+
+def _merge(target: dict, snapshot: dict, live: bool) -> None:
+    for name, metric in snapshot.items():
+        if metric["type"] == "gauge" and not live:
+            continue
+        merged = target.setdefault(name, {**metric, "samples": []})
+        values = {tuple(labels): value for labels, value in merged["samples"]}
+        for labels, value in metric["samples"]:
+            key = tuple(labels)
+            if key not in values:
+                values[key] = value
+            elif isinstance(value, list):
+                values[key] = [a + b for a, b in zip(values[key], value)]
+            else:
+                values[key] += value
+        merged["samples"] = [[list(labels), value] for labels, value in values.items()]
+
+
+def collect(directory: str | os.PathLike | None = None) -> dict:
+    """This process's metrics, summed with other workers' snapshots in `directory`."""
+    snapshot = registry.snapshot()
+    if directory is None:
+        return snapshot
+
+    write_snapshot(directory, snapshot)
+    merged: dict = {}
+    _merge(merged, snapshot, live=True)
+    for path in Path(directory).glob("*.json"):
+        if not path.stem.isdigit() or int(path.stem) == os.getpid():
+            continue
+        try:
+            other = json.loads(path.read_text())
+        except (OSError, ValueError):
+            continue
+        _merge(merged, other, live=_pid_alive(int(path.stem)))
+    return merged
+
+
+class SnapshotWriter:
+    """Background thread writing this worker's snapshot to `directory`."""
+
+    def __init__(self, directory: str | os.PathLike, interval: float):
+        self.directory = Path(directory)
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def start(self) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._thread = threading.Thread(target=self._run, name="metrics-snapshot", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        write_snapshot(self.directory)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                write_snapshot(self.directory)
+            except OSError:
+                pass
+
+
+# =========================
+# Текстовый формат
+# =========================
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names, values, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+def render(snapshot: dict) -> str:
+    lines = []
+    for name, metric in sorted(snapshot.items()):
+        lines.append(f"# HELP {name} {metric['help']}")
+        lines.append(f"# TYPE {name} {metric['type']}")
+        names = metric["labelnames"]
+        for labels, value in sorted(metric["samples"], key=lambda s: s[0]):
+            if metric["type"] != "histogram":
+                lines.append(f"{name}{_labels(names, labels)} {_number(value)}")
+                continue
+            cumulative = 0
+            for bound, count in zip([*metric["buckets"], float("inf")], value[:-1]):
+                cumulative += count
+                le = f'le="{_number(bound)}"'
+                lines.append(f"{name}_bucket{_labels(names, labels, le)} {cumulative}")
+            lines.append(f"{name}_sum{_labels(names, labels)} {_number(value[-1])}")
+            lines.append(f"{name}_count{_labels(names, labels)} {cumulative}")
+    return "\n".join(lines) + "\n"
+
+
+class MetricsMiddleware:
+    """Request count, latency by route template and requests in progress."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status_code = 500
+
+        async def send_with_status(message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        HTTP_IN_PROGRESS.inc(method)
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            route = route_template(scope)
+            HTTP_REQUEST_DURATION.observe(time.perf_counter() - started, method, route)
+            HTTP_REQUESTS.inc(method, route, str(status_code))
+            HTTP_IN_PROGRESS.dec(method)
@@ -0,0 +1,320 @@
+"""Opt-in sampling profiler for single requests.
+
+With PROFILING=1 `ProfilerMiddleware` profiles a PROFILE_SAMPLE_RATE
+fraction of requests (optionally only PROFILE_ROUTES) and every request
+of an admin sent with `X-Profile: 1`. With PROFILING=0 the middleware is
+not installed at all.
+
+A background thread takes a sample of each profiled request every
+PROFILE_INTERVAL_MS. The sample follows the request's asyncio task, not a
+thread: while the task runs, the event loop thread's stack is used; while
+it waits, its await chain is used, continued into the threadpool worker
+(sync endpoints, run_in_threadpool) or the SQLAlchemy greenlet
+(AsyncSession.run_sync) that it waits for. Samples are weighted by wall
+time, so waiting on the database shows up as time spent in the driver.
+
+Each profile is written to PROFILE_DIR/<route>/ as a speedscope JSON
+(https://www.speedscope.app) or as collapsed stacks for flamegraph.pl;
+only the newest PROFILE_KEEP files per route are kept.
+"""
+import asyncio
+import json
+import os
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+
+from starlette.concurrency import run_in_threadpool
+from starlette.routing import compile_path
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.query_stats import route_template
+
+try:
+    from greenlet import getcurrent as current_greenlet
+except ImportError:  # greenlet ставится вместе с sqlalchemy[asyncio]
+    current_greenlet = None
+
+BACKEND_DIR = Path(__file__).resolve().parents[2]
+FORMATS = {"speedscope": ".speedscope.json", "collapsed": ".collapsed.txt"}
+
+# корутины, ожидающие работу в другом потоке или гринлете, и их локальная
+# переменная с этим потоком (anyio) / гринлетом (SQLAlchemy)
+_BRIDGES = {
+    "run_sync_in_worker_thread": "worker",
+    "greenlet_spawn": "context",
+}
+
+
+def _walk(frame) -> list:
+    """Frames from the outermost to `frame`."""
+    frames = []
+    while frame is not None:
+        frames.append(frame)
+        frame = frame.f_back
+    frames.reverse()
+    return frames
+
+
+def _await_chain(coro) -> list:
+    frames = []
+    while coro is not None:
+        frame = getattr(coro, "cr_frame", None) or getattr(coro, "gi_frame", None)
+        if frame is None:
+            break
+        frames.append(frame)
+        coro = getattr(coro, "cr_await", None) or getattr(coro, "gi_yieldfrom", None)
+    return frames
+
+
+def _below(frames: list, code) -> list:
+    """Frames after the last frame running `code` (all of them if there is none)."""
+    for index in range(len(frames) - 1, -1, -1):
+        if frames[index].f_code is code:
+            return frames[index + 1:]
+    return frames
+
+
+class Profile:
+    def __init__(self, method: str, path: str, root_code):
+        self.method = method
+        self.path = path
+        self.task = asyncio.current_task()
+        self.loop = asyncio.get_running_loop()
+        self.loop_thread = threading.get_ident()
+        self.main_greenlet = current_greenlet() if current_greenlet is not None else None
+        self.root_code = root_code
+        self.started = time.perf_counter()
+        self.last_sample = self.started
+        # стек (кортеж ключей кадров) -> секунды
+        self.stacks: Counter = Counter()
+
+    def sample(self, frames: dict, now: float) -> None:
+        stack = self._stack(frames)
+        if stack:
+            key = tuple(
+                (f.f_code.co_qualname, f.f_code.co_filename, f.f_code.co_firstlineno) for f in stack
+            )
+            self.stacks[key] += now - self.last_sample
+        self.last_sample = now
+
+    def _stack(self, frames: dict) -> list:
+        if asyncio.current_task(self.loop) is self.task:
+            stack = _walk(frames.get(self.loop_thread))
+            if any(f.f_code is self.root_code for f in stack):
+                return _below(stack, self.root_code)
+            # поток цикла внутри гринлета SQLAlchemy: начало стека —
+            # в главном гринлете, переключившемся в него
+            parent = getattr(self.main_greenlet, "gr_frame", None)
+            return _below(_walk(parent), self.root_code) + stack
+
+        chain = _below(_await_chain(self.task.get_coro()), self.root_code)
+        for index, frame in enumerate(chain):
+            local = _BRIDGES.get(frame.f_code.co_name)
+            if local is None:
+                continue
+            target = frame.f_locals.get(local)
+            if isinstance(target, threading.Thread):
+                worker = _below(_walk(frames.get(target.ident)), type(target).run.__code__)
+                return chain[:index + 1] + worker
+            if getattr(target, "gr_frame", None) is not None:
+                return chain[:index + 1] + _walk(target.gr_frame) + chain[index + 1:]
+        return chain
+
+
+class Sampler:
+    """One thread sampling all active profiles; it exits when there are none."""
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._profiles: set[Profile] = set()
+        self._lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+
+    def add(self, profile: Profile) -> None:
+        with self._lock:
+            self._profiles.add(profile)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="profiler", daemon=True)
+                self._thread.start()
+
+    def remove(self, profile: Profile) -> None:
+        # ждёт конца текущего снимка: после remove профиль больше не меняется
+        with self._lock:
+            self._profiles.discard(profile)
+
+    def _run(self) -> None:
+        while True:
+            time.sleep(self.interval)
+            with self._lock:
+                if not self._profiles:
+                    self._thread = None
+                    return
+                frames = sys._current_frames()
+                now = time.perf_counter()
+                for profile in self._profiles:
+                    profile.sample(frames, now)
+                del frames
+
+
+def _frame_name(name: str, filename: str, line: int) -> str:
+    return f"{name} ({_short_path(filename)}:{line})"
+
+
+def _short_path(filename: str) -> str:
+    marker = "site-packages" + os.sep
+    if marker in filename:
+        return filename.split(marker, 1)[1]
+    path = Path(filename)
+    return str(path.relative_to(BACKEND_DIR)) if path.is_relative_to(BACKEND_DIR) else filename
+
+
+def to_collapsed(profile: Profile) -> str:
+    """`frame;frame;frame microseconds` per line (flamegraph.pl, speedscope)."""
+    lines = [
+        ";".join(_frame_name(*key) for key in stack) + f" {round(seconds * 1_000_000)}"
+        for stack, seconds in profile.stacks.items()
+    ]
+    return "\n".join(lines) + "\n"
+
+
+def to_speedscope(profile: Profile, name: str, duration: float) -> str:
+    frames: dict[tuple, int] = {}
+    samples = []
+    weights = []
+    for stack, seconds in profile.stacks.items():
+        samples.append([frames.setdefault(key, len(frames)) for key in stack])
+        weights.append(seconds)
+    return json.dumps({
+        "$schema": "https://www.speedscope.app/file-format-schema.json",
+        "name": name,
+        "exporter": "task-manager profiler",
+        "activeProfileIndex": 0,
+        "shared": {
+            "frames": [
+                {"name": qualname, "file": _short_path(filename), "line": line}
+                for qualname, filename, line in frames
+            ],
+        },
+        "profiles": [{
+            "type": "sampled",
+            "name": name,
+            "unit": "seconds",
+            "startValue": 0,
+            "endValue": duration,
+            "samples": samples,
+            "weights": weights,
+        }],
+    })
+
+
+def route_dir_name(route: str) -> str:
+    return re.sub(r"[^\w{}-]+", "_", route.strip("/")) or "root"
+
+
+class ProfileStore:
+    def __init__(self, directory: str | os.PathLike, fmt: str = "speedscope", keep: int = 50):
+        if fmt not in FORMATS:
+            raise ValueError(f"unknown profile format {fmt!r}, expected one of {', '.join(FORMATS)}")
+        self.directory = Path(directory)
+        self.format = fmt
+        self.keep = keep
+
+    def save(self, profile: Profile, route: str, status_code: int, duration: float) -> Path:
+        directory = self.directory / route_dir_name(route)
+        directory.mkdir(parents=True, exist_ok=True)
+        stamp = datetime.now().strftime("%Y%m%dT%H%M%S%f")
+        path = directory / f"{stamp}-{profile.method}-{status_code}-{round(duration * 1000)}ms{FORMATS[self.format]}"
+
+        if self.format == "speedscope":
+            path.write_text(to_speedscope(profile, f"{profile.method} {profile.path} ({route})", duration))
+        else:
+            path.write_text(to_collapsed(profile))
+
+        old = sorted(directory.iterdir(), key=lambda p: p.name, reverse=True)[self.keep:]
+        for stale in old:
+            stale.unlink(missing_ok=True)
+        return path
+
+    def list(self) -> list[dict]:
+        if not self.directory.is_dir():
+            return []
+        profiles = []
+        for route_dir in self.directory.iterdir():
+            if not route_dir.is_dir():
+                continue
+            for path in route_dir.iterdir():
+                stat = path.stat()
+                profiles.append({
+                    "route": route_dir.name,
+                    "name": path.name,
+                    "bytes": stat.st_size,
+                    "created_at": datetime.fromtimestamp(stat.st_mtime),
+                })
+        profiles.sort(key=lambda p: p["name"], reverse=True)
+        return profiles
+
+    def path(self, route: str, name: str) -> Path | None:
+        path = (self.directory / route / name).resolve()
+        if path.parent.parent != self.directory.resolve() or not path.is_file():
+            return None
+        return path
+
+
+class ProfilerMiddleware:
+    def __init__(
+        self,
+        app: ASGIApp,
+        *,
+        store: ProfileStore,
+        interval: float,
+        sample_rate: float = 0.0,
+        routes: tuple[str, ...] = (),
+        is_admin=None,
+    ) -> None:
+        self.app = app
+        self.store = store
+        self.sampler = Sampler(interval)
+        self.sample_rate = sample_rate
+        # PROFILE_ROUTES: решение нужно до роутинга, поэтому путь сверяется
+        # с шаблонами так же, как это делает Starlette
+        self.route_patterns = [compile_path(route)[0] for route in routes]
+        # is_admin(authorization) -> bool, вызывается в пуле потоков
+        self.is_admin = is_admin
+
+    async def _should_profile(self, scope: Scope) -> bool:
+        if self.is_admin is not None:
+            headers = dict(scope["headers"])
+            if headers.get(b"x-profile") == b"1":
+                authorization = headers.get(b"authorization", b"").decode("latin-1")
+                return await run_in_threadpool(self.is_admin, authorization)
+        if not self.sample_rate or random.random() >= self.sample_rate:
+            return False
+        return not self.route_patterns or any(p.match(scope["path"]) for p in self.route_patterns)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not await self._should_profile(scope):
+            await self.app(scope, receive, send)
+            return
+
+        profile = Profile(scope["method"], scope["path"], type(self).__call__.__code__)
+        status_code = 500
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        self.sampler.add(profile)
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            self.sampler.remove(profile)
+            duration = time.perf_counter() - profile.started
+            await run_in_threadpool(self.store.save, profile, route_template(scope), status_code, duration)
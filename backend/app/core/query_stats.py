@@ -0,0 +1,129 @@
+"""Per-request SQL statistics: statement count, DB time and the slowest statement.
+
+`instrument_engine` hooks the cursor events of an engine; the middleware
+puts a fresh `QueryStats` into a context variable for every HTTP request,
+so statements run by that request (in the event loop, in the thread pool
+or through AsyncSession) are counted into it. After the response the
+middleware writes one JSON log line to the `app.requests` logger: INFO for
+every request, WARNING when the request ran more than `threshold`
+statements. In debug mode the numbers are also sent as X-DB-* headers.
+"""
+import json
+import logging
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+logger = logging.getLogger("app.requests")
+
+# в лог попадает только начало SQL
+STATEMENT_LOG_LENGTH = 300
+
+
+@dataclass
+class QueryStats:
+    count: int = 0
+    seconds: float = 0.0
+    slowest_seconds: float = 0.0
+    slowest_statement: str | None = None
+
+    def record(self, statement: str, seconds: float) -> None:
+        self.count += 1
+        self.seconds += seconds
+        if seconds > self.slowest_seconds:
+            self.slowest_seconds = seconds
+            self.slowest_statement = statement
+
+
+_current: ContextVar[QueryStats | None] = ContextVar("query_stats", default=None)
+
+
+def current_stats() -> QueryStats | None:
+    return _current.get()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    # время старта — на контексте выполнения, а не на соединении: у упавшего
+    # запроса after_cursor_execute не вызывается, и его отметка пропадает
+    # вместе с контекстом, не попадая в замеры следующих запросов из пула
+    if _current.get() is not None and context is not None:
+        context._query_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current.get()
+    started = getattr(context, "_query_started", None)
+    if stats is not None and started is not None:
+        stats.record(statement, time.perf_counter() - started)
+
+
+def instrument_engine(engine: Engine) -> None:
+    """Counts statements of `engine` (for AsyncEngine pass `.sync_engine`)."""
+    if not event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+def route_template(scope: Scope) -> str:
+    route = scope.get("route")
+    return getattr(route, "path", None) or "<unmatched>"
+
+
+class QueryStatsMiddleware:
+    def __init__(self, app: ASGIApp, *, threshold: int, debug_headers: bool = False) -> None:
+        self.app = app
+        self.threshold = threshold
+        self.debug_headers = debug_headers
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = QueryStats()
+        token = _current.set(stats)
+        started = time.perf_counter()
+        status_code = 500
+
+        async def send_with_stats(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                if self.debug_headers:
+                    headers = MutableHeaders(scope=message)
+                    headers["X-DB-Queries"] = str(stats.count)
+                    headers["X-DB-Time-Ms"] = f"{stats.seconds * 1000:.2f}"
+                    headers["X-DB-Slowest-Ms"] = f"{stats.slowest_seconds * 1000:.2f}"
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_stats)
+        finally:
+            _current.reset(token)
+            self._log(scope, status_code, time.perf_counter() - started, stats)
+
+    def _log(self, scope: Scope, status_code: int, seconds: float, stats: QueryStats) -> None:
+        over_threshold = stats.count > self.threshold
+        level = logging.WARNING if over_threshold else logging.INFO
+        if not logger.isEnabledFor(level):
+            return
+
+        record = {
+            "event": "request",
+            "method": scope["method"],
+            "route": route_template(scope),
+            "status": status_code,
+            "duration_ms": round(seconds * 1000, 2),
+            "db_queries": stats.count,
+            "db_ms": round(stats.seconds * 1000, 2),
+            "db_slowest_ms": round(stats.slowest_seconds * 1000, 2),
+            "db_slowest_sql": (stats.slowest_statement or "")[:STATEMENT_LOG_LENGTH] or None,
+        }
+        if over_threshold:
+            record["query_threshold"] = self.threshold
+        logger.log(level, json.dumps(record, ensure_ascii=False))
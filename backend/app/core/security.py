@@ -1,10 +1,34 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from jose import jwt
 from passlib.context import CryptContext
 
-from app.core.config import SECRET_KEY, ALGORITHM, ACCESS_TOKEN_EXPIRE_MINUTES
+from app.core.config import (
+    SECRET_KEY,
+    ALGORITHM,
+    ACCESS_TOKEN_EXPIRE_MINUTES,
+    PASSWORD_SCHEMES,
+    PASSWORD_ROUNDS,
+    PASSWORD_VERIFY_WORKERS,
+)
+from app.core.metrics import PASSWORD_VERIFY
 
-pwd_context = CryptContext(schemes=["sha256_crypt"], deprecated="auto")
+
+def build_pwd_context(schemes: list[str], rounds: dict[str, int] | None = None) -> CryptContext:
+    settings = {f"{scheme}__rounds": value for scheme, value in (rounds or {}).items()}
+    return CryptContext(schemes=schemes, deprecated="auto", **settings)
+
+
+pwd_context = build_pwd_context(PASSWORD_SCHEMES, PASSWORD_ROUNDS)
+
+# проверка пароля занимает CPU десятки миллисекунд; отдельный ограниченный пул
+# не даёт волне логинов занять все потоки, на которых работают остальные эндпоинты
+_verify_executor = ThreadPoolExecutor(
+    max_workers=PASSWORD_VERIFY_WORKERS,
+    thread_name_prefix="password-verify",
+)
 
 
 def hash_password(password: str) -> str:
@@ -15,6 +39,21 @@ def verify_password(password: str, hashed: str) -> bool:
     return pwd_context.verify(password, hashed)
 
 
+def verify_and_update_password(password: str, hashed: str) -> tuple[bool, str | None]:
+    """Returns (valid, new_hash); new_hash is set when the scheme or cost changed."""
+    started = time.perf_counter()
+    try:
+        return pwd_context.verify_and_update(password, hashed)
+    finally:
+        scheme = pwd_context.identify(hashed, required=False) or "unknown"
+        PASSWORD_VERIFY.observe(time.perf_counter() - started, scheme)
+
+
+async def verify_and_update_password_async(password: str, hashed: str) -> tuple[bool, str | None]:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_verify_executor, verify_and_update_password, password, hashed)
+
+
 def create_access_token(data: dict) -> str:
     to_encode = data.copy()
     expire = datetime.utcnow() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
@@ -0,0 +1,191 @@
+"""Ordered schema migrations with a stored schema version.
+
+At startup `run_migrations` reads one number from `schema_version` and
+returns immediately when it matches the last migration. Otherwise it takes
+a database-wide lock (BEGIN IMMEDIATE on SQLite, an advisory lock on
+PostgreSQL), re-reads the version and applies the pending migrations in
+the same transaction, so workers starting together apply them once.
+
+Migrations up to 6 reproduce the former startup column checks and are
+idempotent, because databases created before this runner have no
+version row and start from 0; migration 8 replaces the former startup
+status seeding and skips databases that already have statuses. New migrations are appended with the next
+number and may assume every earlier one has run.
+"""
+from typing import Callable
+
+from sqlalchemy import Column, Integer, MetaData, Table, inspect, select, text
+from sqlalchemy.engine import Connection, Engine
+
+from app.db.base import Base
+# create_all и сидинг работают по Base.metadata: таблицы должны быть
+# зарегистрированы, даже если вызывающий код не импортировал модели
+from app.models import change, message, status, task, user  # noqa: F401
+
+# произвольный ключ pg_advisory_xact_lock для миграций
+_PG_LOCK_KEY = 7_413_001
+
+schema_version = Table(
+    "schema_version",
+    MetaData(),
+    Column("version", Integer, nullable=False),
+)
+
+
+def _column_names(conn: Connection, table: str) -> set[str]:
+    return {column["name"] for column in inspect(conn).get_columns(table)}
+
+
+def _add_column(table: str, column: str, ddl: str) -> Callable[[Connection], None]:
+    def migrate(conn: Connection) -> None:
+        if column not in _column_names(conn, table):
+            conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {ddl}"))
+
+    return migrate
+
+
+def _create_tables(conn: Connection) -> None:
+    Base.metadata.create_all(bind=conn)
+
+
+def _create_indexes(conn: Connection) -> None:
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=conn, checkfirst=True)
+
+
+# полнотекстовый поиск (GET /search/). unicode61 приводит к нижнему регистру
+# и кириллицу, но "ё" для него отдельная буква: в индекс попадает текст с
+# "ё" -> "е" (то же делает app.api.search с запросом), поэтому у FTS5-таблиц
+# своё содержимое, синхронизируемое триггерами
+_YO = "replace(replace({}, 'ё', 'е'), 'Ё', 'Е')"
+_TASK_FTS_VALUES = ", ".join(_YO.format(f"{{0}}.{c}") for c in ("title", "short_description", "description"))
+_MESSAGE_FTS_VALUES = _YO.format("{0}.content")
+
+_SQLITE_SEARCH_DDL = [
+    """CREATE VIRTUAL TABLE IF NOT EXISTS tasks_fts USING fts5(
+        title, short_description, description,
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+    )""",
+    f"""CREATE TRIGGER IF NOT EXISTS tasks_fts_ai AFTER INSERT ON tasks BEGIN
+        INSERT INTO tasks_fts(rowid, title, short_description, description)
+        VALUES (new.id, {_TASK_FTS_VALUES.format("new")});
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS tasks_fts_ad AFTER DELETE ON tasks BEGIN
+        DELETE FROM tasks_fts WHERE rowid = old.id;
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS tasks_fts_au
+    AFTER UPDATE OF title, short_description, description ON tasks BEGIN
+        UPDATE tasks_fts SET (title, short_description, description) =
+            ({_TASK_FTS_VALUES.format("new")})
+        WHERE rowid = new.id;
+    END""",
+    f"""INSERT INTO tasks_fts(rowid, title, short_description, description)
+        SELECT tasks.id, {_TASK_FTS_VALUES.format("tasks")} FROM tasks""",
+    """CREATE VIRTUAL TABLE IF NOT EXISTS messages_fts USING fts5(
+        content,
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+    )""",
+    f"""CREATE TRIGGER IF NOT EXISTS messages_fts_ai AFTER INSERT ON messages BEGIN
+        INSERT INTO messages_fts(rowid, content) VALUES (new.id, {_MESSAGE_FTS_VALUES.format("new")});
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS messages_fts_ad AFTER DELETE ON messages BEGIN
+        DELETE FROM messages_fts WHERE rowid = old.id;
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS messages_fts_au AFTER UPDATE OF content ON messages BEGIN
+        UPDATE messages_fts SET content = {_MESSAGE_FTS_VALUES.format("new")} WHERE rowid = new.id;
+    END""",
+    f"""INSERT INTO messages_fts(rowid, content)
+        SELECT messages.id, {_MESSAGE_FTS_VALUES.format("messages")} FROM messages""",
+]
+
+# PostgreSQL: GIN-индексы по выражениям, совпадающим с app.api.search
+# (конфигурация simple — без стемминга, подходит для любого языка)
+TASK_SEARCH_TEXT = (
+    "translate(coalesce(title, '') || ' ' || coalesce(short_description, '') "
+    "|| ' ' || coalesce(description, ''), 'ёЁ', 'еЕ')"
+)
+MESSAGE_SEARCH_TEXT = "translate(content, 'ёЁ', 'еЕ')"
+TASK_TSVECTOR = f"to_tsvector('simple', {TASK_SEARCH_TEXT})"
+MESSAGE_TSVECTOR = f"to_tsvector('simple', {MESSAGE_SEARCH_TEXT})"
+
+
+def _create_search_index(conn: Connection) -> None:
+    if conn.dialect.name == "sqlite":
+        for statement in _SQLITE_SEARCH_DDL:
+            conn.exec_driver_sql(statement)
+    elif conn.dialect.name == "postgresql":
+        conn.exec_driver_sql(f"CREATE INDEX IF NOT EXISTS ix_tasks_search ON tasks USING gin ({TASK_TSVECTOR})")
+        conn.exec_driver_sql(
+            f"CREATE INDEX IF NOT EXISTS ix_messages_search ON messages USING gin ({MESSAGE_TSVECTOR})"
+        )
+
+
+# статусы доски; заводятся миграцией под её блокировкой, поэтому воркеры,
+# стартующие вместе на пустой БД, не вставляют их наперегонки
+DEFAULT_STATUSES = [("сделать", 1), ("в работе", 2), ("на проверке", 3), ("готово", 4)]
+
+
+def _seed_statuses(conn: Connection) -> None:
+    # в существующих БД статусы уже заведены прежним сидингом при старте
+    statuses = Base.metadata.tables["statuses"]
+    if conn.execute(select(statuses.c.id).limit(1)).first() is None:
+        conn.execute(
+            statuses.insert(),
+            [{"name": name, "order_index": order_index} for name, order_index in DEFAULT_STATUSES],
+        )
+
+
+MIGRATIONS: list[tuple[int, str, Callable[[Connection], None]]] = [
+    (1, "create tables", _create_tables),
+    (2, "tasks.assignee_id", _add_column("tasks", "assignee_id", "INTEGER REFERENCES users(id)")),
+    (3, "users.password_plain", _add_column("users", "password_plain", "TEXT")),
+    (4, "users.token_version", _add_column("users", "token_version", "INTEGER NOT NULL DEFAULT 0")),
+    (5, "tasks.change_seq", _add_column("tasks", "change_seq", "INTEGER NOT NULL DEFAULT 0")),
+    (6, "board, sync and chat indexes", _create_indexes),
+    (7, "full-text search", _create_search_index),
+    (8, "default statuses", _seed_statuses),
+    (9, "change_counter.pruned_seq", _add_column("change_counter", "pruned_seq", "INTEGER NOT NULL DEFAULT 0")),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+def _read_version(conn: Connection) -> int:
+    if not inspect(conn).has_table(schema_version.name):
+        return 0
+    return conn.execute(select(schema_version.c.version)).scalar() or 0
+
+
+def _lock(conn: Connection) -> None:
+    dialect = conn.dialect.name
+    if dialect == "sqlite":
+        # write-блокировка всей БД до конца транзакции; остальные воркеры
+        # ждут её в пределах busy_timeout
+        conn.exec_driver_sql("BEGIN IMMEDIATE")
+    elif dialect == "postgresql":
+        conn.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": _PG_LOCK_KEY})
+
+
+def run_migrations(engine: Engine) -> int:
+    """Brings the schema to LATEST_VERSION; returns the number of migrations applied."""
+    with engine.connect() as conn:
+        if _read_version(conn) == LATEST_VERSION:
+            return 0
+        conn.rollback()
+
+        _lock(conn)
+        current = _read_version(conn)
+        pending = [m for m in MIGRATIONS if m[0] > current]
+        if not pending:
+            conn.rollback()
+            return 0
+
+        schema_version.create(bind=conn, checkfirst=True)
+        for _, _, migrate in pending:
+            migrate(conn)
+
+        conn.execute(schema_version.delete())
+        conn.execute(schema_version.insert().values(version=pending[-1][0]))
+        conn.commit()
+        return len(pending)
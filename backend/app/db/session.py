@@ -1,15 +1,178 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+import time
 
-DATABASE_URL = "sqlite:///./task_manager.db"
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
 
-engine = create_engine(
+from app.core.config import (
     DATABASE_URL,
-    connect_args={"check_same_thread": False}
+    ASYNC_DATABASE_URL,
+    DB_ASYNC,
+    SQLITE_PRAGMAS,
+    DB_POOL_SIZE,
+    DB_MAX_OVERFLOW,
+    DB_POOL_TIMEOUT,
+    DB_POOL_PRE_PING,
+    DB_POOL_RECYCLE_SECONDS,
 )
+from app.core.metrics import DB_POOL_CHECKOUT
+
+
+class _TimedCheckout:
+    """Records how long a checkout waits for a connection (db_pool_checkout_seconds)."""
+
+    engine_label = "sync"
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            DB_POOL_CHECKOUT.observe(time.perf_counter() - started, self.engine_label)
+
+
+class TimedQueuePool(_TimedCheckout, QueuePool):
+    pass
+
+
+class TimedAsyncAdaptedQueuePool(_TimedCheckout, AsyncAdaptedQueuePool):
+    engine_label = "async"
+
+
+def _sqlite_pragma_listener(pragmas: dict):
+    def apply(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        # busy_timeout первым: остальные PRAGMA (journal_mode) могут ждать блокировку
+        ordered = sorted(pragmas.items(), key=lambda item: item[0] != "busy_timeout")
+        try:
+            for name, value in ordered:
+                cursor.execute(f"PRAGMA {name}={value}")
+        finally:
+            cursor.close()
+
+    return apply
+
+
+def create_db_engine(
+    url: str = DATABASE_URL,
+    *,
+    pragmas: dict | None = SQLITE_PRAGMAS,
+    pool_size: int = DB_POOL_SIZE,
+    max_overflow: int = DB_MAX_OVERFLOW,
+    pool_timeout: float = DB_POOL_TIMEOUT,
+) -> Engine:
+    """Engine with the deployment profile; `pragmas=None` keeps SQLite defaults."""
+    if not url.startswith("sqlite"):
+        return create_engine(
+            url,
+            poolclass=TimedQueuePool,
+            pool_size=pool_size,
+            max_overflow=max_overflow,
+            pool_timeout=pool_timeout,
+            pool_pre_ping=DB_POOL_PRE_PING,
+            pool_recycle=DB_POOL_RECYCLE_SECONDS,
+        )
+
+    options = {}
+    in_memory = url in ("sqlite://", "sqlite:///:memory:")
+    if not in_memory:
+        # для in-memory SQLAlchemy сам выбирает пул с одним соединением
+        options.update(
+            poolclass=TimedQueuePool,
+            pool_size=pool_size,
+            max_overflow=max_overflow,
+            pool_timeout=pool_timeout,
+        )
+
+    engine = create_engine(
+        url,
+        connect_args={"check_same_thread": False},
+        **options,
+    )
+    if pragmas:
+        event.listen(engine, "connect", _sqlite_pragma_listener(pragmas))
+    return engine
+
+
+engine = create_db_engine()
 
 SessionLocal = sessionmaker(
     autocommit=False,
     autoflush=False,
     bind=engine
 )
+
+
+def begin_read_snapshot(session: Session) -> None:
+    """Starts a transaction in which all following reads see one snapshot.
+
+    PostgreSQL's READ COMMITTED takes a snapshot per statement and pysqlite
+    does not begin a transaction before SELECT, so by default two queries
+    may see different commits. Call before the session runs any statement.
+    """
+    conn = session.connection()
+    if conn.dialect.name == "postgresql":
+        conn.exec_driver_sql("SET TRANSACTION ISOLATION LEVEL REPEATABLE READ")
+    elif conn.dialect.name == "sqlite":
+        conn.exec_driver_sql("BEGIN")
+
+
+def async_database_url(url: str) -> str:
+    """Same database through an asyncio driver."""
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    if backend == "sqlite":
+        return parsed.set(drivername="sqlite+aiosqlite").render_as_string(hide_password=False)
+    if backend == "postgresql":
+        return parsed.set(drivername="postgresql+psycopg").render_as_string(hide_password=False)
+    return url
+
+
+def create_async_db_engine(
+    url: str,
+    *,
+    pragmas: dict | None = SQLITE_PRAGMAS,
+    pool_size: int = DB_POOL_SIZE,
+    max_overflow: int = DB_MAX_OVERFLOW,
+    pool_timeout: float = DB_POOL_TIMEOUT,
+) -> AsyncEngine:
+    options = {}
+    if ":memory:" not in url and not url.endswith("://"):
+        options.update(
+            poolclass=TimedAsyncAdaptedQueuePool,
+            pool_size=pool_size,
+            max_overflow=max_overflow,
+            pool_timeout=pool_timeout,
+        )
+
+    if make_url(url).get_backend_name() != "sqlite":
+        engine = create_async_engine(
+            url,
+            pool_pre_ping=DB_POOL_PRE_PING,
+            pool_recycle=DB_POOL_RECYCLE_SECONDS,
+            **options,
+        )
+    else:
+        engine = create_async_engine(url, **options)
+        if pragmas:
+            event.listen(engine.sync_engine, "connect", _sqlite_pragma_listener(pragmas))
+    return engine
+
+
+# async-драйвер — необязательная зависимость (aiosqlite / psycopg); без него
+# async-эндпоинты работают через SessionLocal в пуле потоков
+async_engine: AsyncEngine | None = None
+AsyncSessionLocal = None
+if DB_ASYNC:
+    try:
+        async_engine = create_async_db_engine(ASYNC_DATABASE_URL or async_database_url(DATABASE_URL))
+    except ImportError:
+        async_engine = None
+    else:
+        AsyncSessionLocal = async_sessionmaker(
+            async_engine,
+            autoflush=False,
+            expire_on_commit=False,
+        )
@@ -1,18 +1,43 @@
+import logging
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from sqlalchemy import text
 
-from app.db.session import engine, SessionLocal
-from app.db.base import Base
+from app.core.compression import CompressionMiddleware
+from app.core.config import (
+    COMPRESSION_BROTLI_QUALITY,
+    COMPRESSION_CONTENT_TYPES,
+    COMPRESSION_ENCODINGS,
+    COMPRESSION_GZIP_LEVEL,
+    COMPRESSION_MIN_SIZE,
+    DEBUG,
+    METRICS_DIR,
+    METRICS_ENABLED,
+    METRICS_FLUSH_SECONDS,
+    PROFILE_INTERVAL_MS,
+    PROFILE_ROUTES,
+    PROFILE_SAMPLE_RATE,
+    PROFILING,
+    QUERY_COUNT_THRESHOLD,
+    REQUEST_LOG_LEVEL,
+)
+from app.core.metrics import MetricsMiddleware, SnapshotWriter
+from app.core.profiler import ProfilerMiddleware
+from app.core.query_stats import QueryStatsMiddleware, instrument_engine, logger as request_logger
+from app.db.session import async_engine, engine
+from app.db.migrations import run_migrations
 
-from app.models import user, status, task, message  # noqa: F401
-from app.models.status import Status
+from app.models import user, status, task, message, change  # noqa: F401
 
 from app.api.auth import router as auth_router
 from app.api.tasks import router as tasks_router
 from app.api.users import router as users_router
 from app.api.statuses import router as statuses_router
 from app.api.messages import router as messages_router
+from app.api.search import router as search_router
+from app.api.metrics import router as metrics_router
+from app.api.profiles import router as profiles_router, header_user_is_admin, profile_store
+from app.schemas.common import Result
 
 
 app = FastAPI(title="Task Manager API", version="1.0.0")
@@ -26,8 +51,56 @@ app.add_middleware(
     allow_credentials=False,  # JWT передаётся в заголовке Authorization, куки не нужны
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag", "X-DB-Queries", "X-DB-Time-Ms", "X-DB-Slowest-Ms"],
 )
 
+# =========================
+# Сжатие ответов (доска и чат — повторяющийся JSON)
+# =========================
+if COMPRESSION_ENCODINGS:
+    app.add_middleware(
+        CompressionMiddleware,
+        encodings=COMPRESSION_ENCODINGS,
+        minimum_size=COMPRESSION_MIN_SIZE,
+        gzip_level=COMPRESSION_GZIP_LEVEL,
+        brotli_quality=COMPRESSION_BROTLI_QUALITY,
+        content_types=COMPRESSION_CONTENT_TYPES,
+    )
+
+# =========================
+# Число и время SQL-запросов на запрос
+# =========================
+instrument_engine(engine)
+if async_engine is not None:
+    instrument_engine(async_engine.sync_engine)
+
+request_logger.setLevel(REQUEST_LOG_LEVEL)
+if not request_logger.handlers:
+    request_logger.addHandler(logging.StreamHandler())
+    request_logger.propagate = False
+
+app.add_middleware(QueryStatsMiddleware, threshold=QUERY_COUNT_THRESHOLD, debug_headers=DEBUG)
+
+# =========================
+# Профилирование запросов: без PROFILING middleware нет совсем
+# =========================
+if PROFILING:
+    app.add_middleware(
+        ProfilerMiddleware,
+        store=profile_store,
+        interval=PROFILE_INTERVAL_MS / 1000,
+        sample_rate=PROFILE_SAMPLE_RATE,
+        routes=PROFILE_ROUTES,
+        is_admin=header_user_is_admin,
+    )
+
+# =========================
+# Метрики Prometheus (самый внешний слой: в задержку входит всё остальное)
+# =========================
+metrics_writer = SnapshotWriter(METRICS_DIR, METRICS_FLUSH_SECONDS) if METRICS_ENABLED and METRICS_DIR else None
+if METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+
 # =========================
 # Роутеры
 # =========================
@@ -36,63 +109,41 @@ app.include_router(tasks_router)
 app.include_router(statuses_router)
 app.include_router(messages_router)
 app.include_router(users_router)
-
-# =========================
-# База данных
-# =========================
-Base.metadata.create_all(bind=engine)
+app.include_router(search_router)
+app.include_router(profiles_router)
+if METRICS_ENABLED:
+    app.include_router(metrics_router)
 
 
 # =========================
 # Healthcheck
 # =========================
-@app.get("/")
+@app.get("/", response_model=Result)
 def root():
     return {"status": "ok"}
 
 
-# =========================
-# Сидинг статусов
-# =========================
-@app.on_event("startup")
-def seed_statuses():
-    db = SessionLocal()
-    try:
-        if db.query(Status).count() == 0:
-            db.add_all(
-                [
-                    Status(name="сделать", order_index=1),
-                    Status(name="в работе", order_index=2),
-                    Status(name="на проверке", order_index=3),
-                    Status(name="готово", order_index=4),
-                ]
-            )
-            db.commit()
-    finally:
-        db.close()
+@app.on_event("shutdown")
+async def dispose_async_engine():
+    if async_engine is not None:
+        await async_engine.dispose()
 
 
 @app.on_event("startup")
-def ensure_task_assignee_column():
-    """Adds tasks.assignee_id when migrating existing SQLite DB without Alembic."""
-    db = SessionLocal()
-    try:
-        columns = [row[1] for row in db.execute(text("PRAGMA table_info(tasks);")).all()]
-        if "assignee_id" not in columns:
-            db.execute(text("ALTER TABLE tasks ADD COLUMN assignee_id INTEGER REFERENCES users(id);"))
-            db.commit()
-    finally:
-        db.close()
+def start_metrics_writer():
+    if metrics_writer is not None:
+        metrics_writer.start()
+
 
+@app.on_event("shutdown")
+def stop_metrics_writer():
+    if metrics_writer is not None:
+        metrics_writer.stop()
 
+
+# =========================
+# База данных: миграции (app/db/migrations.py), включая сидинг статусов
+# =========================
 @app.on_event("startup")
-def ensure_user_password_plain_column():
-    """Adds users.password_plain for displaying plaintext (per requirements)."""
-    db = SessionLocal()
-    try:
-        columns = [row[1] for row in db.execute(text("PRAGMA table_info(users);")).all()]
-        if "password_plain" not in columns:
-            db.execute(text("ALTER TABLE users ADD COLUMN password_plain TEXT;"))
-            db.commit()
-    finally:
-        db.close()
+def migrate():
+    run_migrations(engine)
@@ -0,0 +1,60 @@
+from sqlalchemy import Column, Integer, delete, select, update
+from sqlalchemy.engine import Connection
+
+from app.db.base import Base
+
+
+class ChangeCounter(Base):
+    """Single-row global counter behind the board sync tokens."""
+
+    __tablename__ = "change_counter"
+
+    id = Column(Integer, primary_key=True)
+    value = Column(Integer, nullable=False, default=0)
+    # надгробия с change_seq <= pruned_seq удалены: токены старше этого
+    # номера не могут получить полную дельту и требуют перезагрузки доски
+    pruned_seq = Column(Integer, nullable=False, default=0, server_default="0")
+
+
+class TaskTombstone(Base):
+    __tablename__ = "task_tombstones"
+
+    task_id = Column(Integer, primary_key=True)
+    change_seq = Column(Integer, nullable=False, index=True)
+
+
+def next_change_seq(conn: Connection) -> int:
+    """Allocates the next change number inside the caller's transaction.
+
+    The UPDATE locks the counter row until commit, so transactions commit
+    in the order of their numbers and a reader never skips a change that
+    commits late.
+    """
+    result = conn.execute(
+        update(ChangeCounter)
+        .where(ChangeCounter.id == 1)
+        .values(value=ChangeCounter.value + 1)
+    )
+    if result.rowcount == 0:
+        conn.execute(ChangeCounter.__table__.insert().values(id=1, value=1))
+    return conn.execute(select(ChangeCounter.value).where(ChangeCounter.id == 1)).scalar_one()
+
+
+def current_change_seq(conn: Connection) -> int:
+    value = conn.execute(select(ChangeCounter.value).where(ChangeCounter.id == 1)).scalar()
+    return value or 0
+
+
+def tombstone_horizon(conn: Connection) -> int:
+    value = conn.execute(select(ChangeCounter.pruned_seq).where(ChangeCounter.id == 1)).scalar()
+    return value or 0
+
+
+def prune_tombstones(conn: Connection, up_to_seq: int) -> None:
+    """Deletes tombstones with change_seq <= up_to_seq and moves the horizon there."""
+    conn.execute(delete(TaskTombstone).where(TaskTombstone.change_seq <= up_to_seq))
+    conn.execute(
+        update(ChangeCounter)
+        .where(ChangeCounter.id == 1, ChangeCounter.pruned_seq < up_to_seq)
+        .values(pruned_seq=up_to_seq)
+    )
@@ -1,11 +1,20 @@
-from sqlalchemy import Column, Integer, String, Text, ForeignKey, DateTime
+from sqlalchemy import Column, Integer, String, Text, ForeignKey, DateTime, Index, event
+from sqlalchemy.orm import Session
 from sqlalchemy.sql import func
 
 from app.db.base import Base
+from app.core.config import SYNC_TOMBSTONE_RETENTION
+from app.models.change import TaskTombstone, next_change_seq, prune_tombstones
 
 
 class Task(Base):
     __tablename__ = "tasks"
+    __table_args__ = (
+        # keyset-пагинация доски и фильтры по исполнителю/постановщику
+        Index("ix_tasks_status_id_id", "status_id", "id"),
+        Index("ix_tasks_assignee_id_status_id_id", "assignee_id", "status_id", "id"),
+        Index("ix_tasks_created_by_status_id_id", "created_by", "status_id", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String, nullable=False)
@@ -20,5 +29,28 @@ class Task(Base):
     updated_at = Column(
         DateTime(timezone=True),
         server_default=func.now(),
-        onupdate=func.now()
+        onupdate=func.now(),
+        index=True,
     )
+    # номер последнего изменения для GET /tasks/changes (см. app.models.change)
+    change_seq = Column(Integer, nullable=False, default=0, server_default="0", index=True)
+
+
+@event.listens_for(Session, "before_flush")
+def _stamp_task_changes(session, flush_context, instances):
+    changed = [
+        obj for obj in session.new | session.dirty
+        if isinstance(obj, Task) and (obj in session.new or session.is_modified(obj))
+    ]
+    deleted = [obj for obj in session.deleted if isinstance(obj, Task)]
+    if not changed and not deleted:
+        return
+
+    seq = next_change_seq(session.connection())
+    for task in changed:
+        task.change_seq = seq
+    for task in deleted:
+        session.merge(TaskTombstone(task_id=task.id, change_seq=seq))
+    if deleted and seq > SYNC_TOMBSTONE_RETENTION:
+        # старые надгробия больше не нужны: клиенты с такими токенами получат reset
+        prune_tombstones(session.connection(), seq - SYNC_TOMBSTONE_RETENTION)
@@ -12,4 +12,6 @@ class User(Base):
     password_hash = Column(String, nullable=False)
     password_plain = Column(String, nullable=True)
     role = Column(String, nullable=False, default="employee")
+    # растёт при смене логина/роли/пароля; токены со старой версией отклоняются
+    token_version = Column(Integer, nullable=False, default=0, server_default="0")
     created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -1,3 +1,4 @@
+from datetime import datetime
 from typing import Optional
 from pydantic import BaseModel, Field
 
@@ -18,6 +19,21 @@ class UserUpdate(BaseModel):
     password: Optional[str] = None
 
 
+class UserShort(BaseModel):
+    id: int
+    username: str
+    role: str
+
+
+class UserOut(UserShort):
+    created_at: Optional[datetime] = None
+
+
+class UserListItem(UserOut):
+    # только для admin/ceo (list_users использует response_model_exclude_unset)
+    password: Optional[str] = None
+
+
 class Token(BaseModel):
     access_token: str
     token_type: str = "bearer"
@@ -0,0 +1,9 @@
+from pydantic import BaseModel
+
+
+class Created(BaseModel):
+    id: int
+
+
+class Result(BaseModel):
+    status: str
@@ -0,0 +1,9 @@
+from datetime import datetime
+from pydantic import BaseModel
+
+
+class ProfileOut(BaseModel):
+    route: str
+    name: str
+    bytes: int
+    created_at: datetime
@@ -0,0 +1,17 @@
+from typing import Optional
+from pydantic import BaseModel
+
+
+class SearchHit(BaseModel):
+    kind: str  # "task" или "message"
+    task_id: int
+    message_id: Optional[int] = None
+    title: str
+    status: Optional[str] = None
+    snippet: str
+    rank: float
+
+
+class SearchPage(BaseModel):
+    items: list[SearchHit]
+    next_offset: Optional[int] = None
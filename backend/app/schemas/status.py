@@ -0,0 +1,7 @@
+from pydantic import BaseModel
+
+
+class StatusOut(BaseModel):
+    id: int
+    name: str
+    order_index: int
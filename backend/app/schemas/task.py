@@ -1,5 +1,6 @@
+from datetime import datetime
 from typing import Optional
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 
 class TaskCreate(BaseModel):
@@ -18,6 +19,42 @@ class TaskShort(BaseModel):
     status: str
 
 
+class TaskBoardItem(BaseModel):
+    # кроме id все поля необязательны: GET /tasks/?fields= отдаёт только
+    # запрошенные (роут использует response_model_exclude_unset)
+    id: int
+    title: Optional[str] = None
+    short_description: Optional[str] = None
+    status: Optional[str] = None
+    assignee: Optional[str] = None
+    assignee_id: Optional[int] = None
+    assignee_role: Optional[str] = None
+    created_by: Optional[str] = None
+    is_mine: Optional[bool] = None
+    is_lower: Optional[bool] = None
+
+
+class TaskChanges(BaseModel):
+    token: str
+    reset: bool
+    changes: list[TaskBoardItem]
+    deleted: list[int]
+
+
+class TaskDetail(BaseModel):
+    id: int
+    title: str
+    short_description: str
+    description: Optional[str] = None
+    status: str
+    assignee: Optional[str] = None
+    assignee_id: Optional[int] = None
+    assignee_role: Optional[str] = None
+    created_by: Optional[str] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+
+
 class TaskStatusUpdate(BaseModel):
     status: str
 
@@ -28,3 +65,21 @@ class TaskUpdate(BaseModel):
     description: Optional[str] = None
     status_id: Optional[int] = None
     assignee_id: Optional[int] = None
+
+
+class TaskBatchItem(TaskUpdate):
+    id: int
+    # название статуса, как в PATCH /tasks/{id}/status; менять только статус
+    # может любой, кто видит задачу, остальные поля — manager и выше
+    status: Optional[str] = None
+
+
+class TaskBatchUpdate(BaseModel):
+    items: list[TaskBatchItem] = Field(max_length=500)
+
+
+class TaskBatchResult(BaseModel):
+    id: int
+    status: str  # "updated" или "error"
+    code: Optional[int] = None
+    detail: Optional[str] = None
@@ -0,0 +1,308 @@
+"""End-to-end API latency per endpoint and role, with a regression check.
+
+The app runs in-process (TestClient) on a generated dataset (seed_demo.py
+--tasks ...) or on a copy of `--db`. For every role (admin, ceo, manager,
+employee) the script sends `--requests` sequential requests to each
+endpoint and records p50/p95/p99 latency and throughput. Visibility work
+differs by role, so each role is reported separately.
+
+Results are written to `--output` as JSON (`--json` prints them to stdout
+instead of the table). With `--baseline` every
+endpoint/role pair is compared on `--metric`, and the script exits with
+code 1 if any of them is slower than the baseline by more than
+`--threshold`. A baseline recorded on another dataset, `--requests` or
+`--board-limit` is not compared at all (exit code 3); another Python
+version or machine only prints a warning. Baselines depend on the
+machine: record one with `--save-baseline` on the machine that runs the
+comparison.
+
+Запуск из backend/:
+    python -m benchmarks.api_latency --tasks 5000 --output latest.json
+    python -m benchmarks.api_latency --baseline benchmarks/baseline/api_latency.json --threshold 0.2
+"""
+from __future__ import annotations
+
+import argparse
+import contextlib
+import json
+import os
+import platform
+import random
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+DEFAULT_BASELINE = Path(__file__).resolve().parent / "baseline" / "api_latency.json"
+ROLES = ("admin", "ceo", "manager", "employee")
+METRICS = ("p50_ms", "p95_ms", "p99_ms")
+# при расхождении этих полей meta задержки несравнимы
+COMPARABLE_META = ("dataset", "requests", "board_limit")
+# а эти лишь делают сравнение менее точным
+ENVIRONMENT_META = ("python", "machine")
+EXIT_REGRESSION = 1
+EXIT_BASELINE_MISMATCH = 3
+
+
+class BaselineMismatch(ValueError):
+    """The baseline was measured on another dataset or load."""
+
+
+def percentile(values: list[float], q: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+def summarize(latencies: list[float], errors: int) -> dict:
+    total = sum(latencies)
+    return {
+        "requests": len(latencies),
+        "rps": round(len(latencies) / total, 1) if total else 0.0,
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 2),
+        "errors": errors,
+    }
+
+
+def timed(call, count: int) -> dict:
+    latencies = []
+    errors = 0
+    for n in range(count):
+        started = time.perf_counter()
+        response = call(n)
+        latencies.append(time.perf_counter() - started)
+        if response.status_code >= 400:
+            errors += 1
+    return summarize(latencies, errors)
+
+
+def accounts(db_url: str) -> dict[str, tuple[str, str]]:
+    """First user of each role with a known password."""
+    from sqlalchemy import create_engine, text
+
+    engine = create_engine(db_url)
+    try:
+        with engine.connect() as conn:
+            rows = conn.execute(text(
+                "SELECT role, username, password_plain FROM users "
+                "WHERE password_plain IS NOT NULL ORDER BY id"
+            )).all()
+    finally:
+        engine.dispose()
+
+    result = {}
+    for role, username, password in rows:
+        result.setdefault(role, (username, password))
+    return result
+
+
+def bench_role(client, username: str, password: str, args, rng: random.Random) -> dict:
+    def login(_):
+        return client.post("/auth/login", json={"username": username, "password": password})
+
+    response = login(0)
+    response.raise_for_status()
+    headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+    board_params = {"limit": args.board_limit} if args.board_limit else {}
+    board = client.get("/tasks/", params=board_params, headers=headers).json()
+    task_ids = [t["id"] for t in board] or [1]
+    statuses = [s["name"] for s in client.get("/statuses/").json()]
+
+    requests = args.requests
+    return {
+        "POST /auth/login": timed(login, args.login_requests),
+        "GET /tasks/": timed(lambda _: client.get("/tasks/", params=board_params, headers=headers), requests),
+        "GET /tasks/{id}": timed(
+            lambda _: client.get(f"/tasks/{rng.choice(task_ids)}", headers=headers), requests
+        ),
+        "GET /tasks/{id}/messages/": timed(
+            lambda _: client.get(
+                f"/tasks/{rng.choice(task_ids)}/messages/", params={"limit": 50}, headers=headers
+            ),
+            requests,
+        ),
+        "POST /tasks/{id}/messages/": timed(
+            lambda n: client.post(
+                f"/tasks/{rng.choice(task_ids)}/messages/", json={"content": f"bench {n}"}, headers=headers
+            ),
+            requests,
+        ),
+        "PATCH /tasks/{id}/status": timed(
+            lambda n: client.patch(
+                f"/tasks/{rng.choice(task_ids)}/status",
+                json={"status": statuses[n % len(statuses)]},
+                headers=headers,
+            ),
+            requests,
+        ),
+        "GET /users/": timed(lambda _: client.get("/users/", headers=headers), requests),
+    }
+
+
+def run(args) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = Path(tmp) / "bench.db"
+        db_url = f"sqlite:///{db_path}"
+        if args.db:
+            shutil.copy(args.db, db_path)
+        # app.db.session читает DATABASE_URL при импорте
+        os.environ["DATABASE_URL"] = db_url
+
+        if not args.db:
+            import seed_demo
+
+            seed_demo.reset_db()
+            # ход генерации — в stderr, stdout остаётся для результатов (--json)
+            with contextlib.redirect_stdout(sys.stderr):
+                seed_demo.seed_generated(argparse.Namespace(
+                    users=args.users,
+                    tasks=args.tasks,
+                    messages_per_task=args.messages_per_task,
+                    seed=args.seed,
+                    chunk=10_000,
+                ))
+
+        from fastapi.testclient import TestClient
+
+        from app.main import app
+
+        by_role = accounts(db_url)
+        rng = random.Random(args.seed)
+        results = {}
+        with TestClient(app) as client:
+            for role in ROLES:
+                if role not in by_role:
+                    print(f"no user with role {role}, skipped", file=sys.stderr)
+                    continue
+                username, password = by_role[role]
+                results[role] = bench_role(client, username, password, args, rng)
+
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "dataset": args.db or {
+                "users": args.users,
+                "tasks": args.tasks,
+                "messages_per_task": args.messages_per_task,
+                "seed": args.seed,
+            },
+            "requests": args.requests,
+            "board_limit": args.board_limit,
+        },
+        "results": results,
+    }
+
+
+def meta_differences(current: dict, baseline: dict, keys: tuple[str, ...]) -> list[str]:
+    ours, theirs = current.get("meta", {}), baseline.get("meta", {})
+    return [
+        f"{key}: baseline {theirs.get(key)!r}, current {ours.get(key)!r}"
+        for key in keys
+        if ours.get(key) != theirs.get(key)
+    ]
+
+
+def compare(current: dict, baseline: dict, metric: str, threshold: float) -> list[str]:
+    """Endpoint/role pairs slower than the baseline by more than `threshold`.
+
+    Raises BaselineMismatch when the runs differ in COMPARABLE_META;
+    differences in ENVIRONMENT_META are printed to stderr as a warning.
+    """
+    mismatched = meta_differences(current, baseline, COMPARABLE_META)
+    if mismatched:
+        raise BaselineMismatch("; ".join(mismatched))
+    for line in meta_differences(current, baseline, ENVIRONMENT_META):
+        print(f"warning: baseline from another environment, {line}", file=sys.stderr)
+
+    regressions = []
+    for role, endpoints in current["results"].items():
+        for endpoint, stats in endpoints.items():
+            base = baseline.get("results", {}).get(role, {}).get(endpoint)
+            if not base or not base.get(metric):
+                continue
+            change = stats[metric] / base[metric] - 1
+            if change > threshold:
+                regressions.append(
+                    f"{role:<9}{endpoint:<30}{metric} {base[metric]} -> {stats[metric]} ms (+{change:.0%})"
+                )
+    return regressions
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="API latency per endpoint and role")
+    parser.add_argument("--db", help="SQLite file to copy instead of generating a dataset")
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--tasks", type=int, default=5000)
+    parser.add_argument("--messages-per-task", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--requests", type=int, default=200, help="requests per endpoint and role")
+    parser.add_argument("--login-requests", type=int, default=10, help="logins per role (hashing is slow)")
+    parser.add_argument("--board-limit", type=int, default=200, help="limit for GET /tasks/, 0 — whole board")
+    parser.add_argument("--output", help="write results JSON here")
+    parser.add_argument("--baseline", help=f"compare with this results JSON (e.g. {DEFAULT_BASELINE.name})")
+    parser.add_argument("--save-baseline", help="write results JSON as the new baseline")
+    parser.add_argument("--metric", choices=METRICS, default="p95_ms")
+    parser.add_argument("--threshold", type=float, default=0.2, help="allowed slowdown, 0.2 = +20%%")
+    parser.add_argument("--json", action="store_true", help="print results (and regressions) as JSON")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    report = run(args)
+
+    for path in (args.output, args.save_baseline):
+        if path:
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+            Path(path).write_text(json.dumps(report, indent=2, ensure_ascii=False) + "\n")
+
+    regressions = None
+    mismatch = None
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text())
+        try:
+            regressions = compare(report, baseline, args.metric, args.threshold)
+        except BaselineMismatch as exc:
+            mismatch = str(exc)
+
+    if args.json:
+        print(json.dumps(
+            {**report, "regressions": regressions, "baseline_mismatch": mismatch},
+            indent=2, ensure_ascii=False,
+        ))
+        if mismatch:
+            sys.exit(EXIT_BASELINE_MISMATCH)
+        if regressions:
+            sys.exit(EXIT_REGRESSION)
+        return
+
+    print(f"{'role':<9}{'endpoint':<30}{'rps':>8}{'p50':>9}{'p95':>9}{'p99':>9}{'err':>5}")
+    for role, endpoints in report["results"].items():
+        for endpoint, r in endpoints.items():
+            print(
+                f"{role:<9}{endpoint:<30}{r['rps']:>8}{r['p50_ms']:>9}"
+                f"{r['p95_ms']:>9}{r['p99_ms']:>9}{r['errors']:>5}"
+            )
+
+    if mismatch:
+        print(f"\nnot compared with {args.baseline}, runs differ: {mismatch}", file=sys.stderr)
+        sys.exit(EXIT_BASELINE_MISMATCH)
+    if regressions is None:
+        return
+    if regressions:
+        print(f"\nregressions (> +{args.threshold:.0%} {args.metric}):")
+        for line in regressions:
+            print("  " + line)
+        sys.exit(EXIT_REGRESSION)
+    print(f"\nno regressions against {args.baseline} (threshold +{args.threshold:.0%} {args.metric})")
+
+
+if __name__ == "__main__":
+    main()
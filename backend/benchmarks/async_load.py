@@ -0,0 +1,157 @@
+"""Latency of the hot read endpoints under many concurrent clients: DB_ASYNC=0 vs 1.
+
+For each mode a uvicorn server is started on a copy of the database and
+`--clients` concurrent clients request GET /tasks/, /tasks/{id},
+/tasks/{id}/messages/ and /users/me for `--seconds`. The script prints
+p50/p99 latency, throughput and errors per mode.
+
+Запуск из backend/ (нужна БД с данными, например после seed_demo.py):
+    python -m benchmarks.async_load --db task_manager.db --clients 1000 --seconds 20
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import httpx
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def percentile(values: list[float], q: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+async def wait_ready(base_url: str, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient() as client:
+        while time.monotonic() < deadline:
+            try:
+                if (await client.get(f"{base_url}/")).status_code == 200:
+                    return
+            except httpx.TransportError:
+                pass
+            await asyncio.sleep(0.2)
+    raise RuntimeError("server did not start")
+
+
+async def load(base_url: str, username: str, password: str, clients: int, seconds: float) -> dict:
+    limits = httpx.Limits(max_connections=clients, max_keepalive_connections=clients)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+        login = await client.post("/auth/login", json={"username": username, "password": password})
+        login.raise_for_status()
+        headers = {"Authorization": f"Bearer {login.json()['access_token']}"}
+        task_ids = [t["id"] for t in (await client.get("/tasks/", headers=headers)).json()] or [1]
+
+        latencies: list[float] = []
+        errors = 0
+        deadline = time.monotonic() + seconds
+
+        async def worker(n: int):
+            nonlocal errors
+            rnd = random.Random(n)
+            while time.monotonic() < deadline:
+                task_id = rnd.choice(task_ids)
+                path = rnd.choice([
+                    "/tasks/?limit=50",
+                    f"/tasks/{task_id}",
+                    f"/tasks/{task_id}/messages/?limit=50",
+                    "/users/me",
+                ])
+                started = time.perf_counter()
+                try:
+                    response = await client.get(path, headers=headers)
+                    if response.status_code >= 500:
+                        errors += 1
+                except httpx.HTTPError:
+                    errors += 1
+                    continue
+                latencies.append(time.perf_counter() - started)
+
+        started = time.monotonic()
+        await asyncio.gather(*(worker(n) for n in range(clients)))
+        elapsed = time.monotonic() - started
+
+    return {
+        "requests": len(latencies),
+        "rps": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 1),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 1),
+        "errors": errors,
+    }
+
+
+def run_mode(db_path: Path, db_async: bool, args) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        db_copy = Path(tmp) / "bench.db"
+        shutil.copy(db_path, db_copy)
+        port = free_port()
+        env = dict(
+            os.environ,
+            DATABASE_URL=f"sqlite:///{db_copy}",
+            DB_ASYNC="1" if db_async else "0",
+        )
+        server = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+            cwd=BACKEND_DIR,
+            env=env,
+        )
+        try:
+            base_url = f"http://127.0.0.1:{port}"
+            asyncio.run(wait_ready(base_url))
+            return asyncio.run(load(base_url, args.username, args.password, args.clients, args.seconds))
+        finally:
+            server.terminate()
+            server.wait(timeout=30)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Sync vs async DB path under concurrent load")
+    parser.add_argument("--db", default=str(BACKEND_DIR / "task_manager.db"), help="SQLite file with data")
+    parser.add_argument("--clients", type=int, default=1000)
+    parser.add_argument("--seconds", type=float, default=20.0)
+    parser.add_argument("--username", default="admin")
+    parser.add_argument("--password", default="admin123")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    results = {
+        "sync (DB_ASYNC=0)": run_mode(Path(args.db), False, args),
+        "async (DB_ASYNC=1)": run_mode(Path(args.db), True, args),
+    }
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    for mode, r in results.items():
+        print(
+            f"{mode:<20} requests={r['requests']:<8} rps={r['rps']:<8} "
+            f"p50={r['p50_ms']}ms p99={r['p99_ms']}ms errors={r['errors']}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""CPU cost of response compression against bytes saved.
+
+Board and chat JSON of several sizes (the same bytes the API sends) is
+compressed with gzip at several levels and, if the `brotli` package is
+installed, with brotli. For each case the script prints compressed size,
+compression time and the transfer time saved on a link of `--mbit`
+megabits per second (e.g. a tunnel).
+
+Запуск из backend/:
+    python -m benchmarks.compression --mbit 10
+"""
+from __future__ import annotations
+
+import argparse
+import gzip
+import json
+import time
+
+from pydantic import TypeAdapter
+
+from app.core.compression import brotli
+from app.schemas.message import MessageOut
+from app.schemas.task import TaskBoardItem
+from benchmarks.serialization import board, chat
+
+DEFAULT_CASES = ["gzip=1", "gzip=6", "gzip=9", "br=1", "br=4", "br=11"]
+
+
+def payloads(sizes: list[int]) -> dict[str, bytes]:
+    boards = TypeAdapter(list[TaskBoardItem])
+    chats = TypeAdapter(list[MessageOut])
+    result = {}
+    for n in sizes:
+        result[f"board x{n}"] = boards.dump_json(boards.validate_python(board(n)))
+        result[f"chat x{n}"] = chats.dump_json(chats.validate_python(chat(n)))
+    return result
+
+
+def compressor(case: str):
+    encoding, _, level = case.partition("=")
+    level = int(level)
+    if encoding == "gzip":
+        return lambda body: gzip.compress(body, compresslevel=level, mtime=0)
+    if encoding == "br" and brotli is not None:
+        return lambda body: brotli.compress(body, quality=level)
+    return None
+
+
+def measure(fn, body: bytes, repeat: int) -> tuple[float, int]:
+    best = float("inf")
+    size = 0
+    for _ in range(repeat):
+        started = time.perf_counter()
+        size = len(fn(body))
+        best = min(best, time.perf_counter() - started)
+    return best, size
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Compression CPU cost vs bytes saved")
+    parser.add_argument("--size", type=int, action="append", help="rows per payload (default: 50, 1000, 10000)")
+    parser.add_argument("--case", action="append", help="encoding=level, can be repeated")
+    parser.add_argument("--mbit", type=float, default=10.0, help="link speed for the transfer estimate")
+    parser.add_argument("--repeat", type=int, default=5, help="best of N runs")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    bytes_per_ms = args.mbit * 1_000_000 / 8 / 1000
+
+    results = []
+    for name, body in payloads(args.size or [50, 1000, 10_000]).items():
+        for case in args.case or DEFAULT_CASES:
+            fn = compressor(case)
+            if fn is None:
+                results.append({"payload": name, "case": case, "error": "brotli is not installed"})
+                continue
+            seconds, size = measure(fn, body, args.repeat)
+            saved = len(body) - size
+            results.append({
+                "payload": name,
+                "case": case,
+                "bytes": len(body),
+                "compressed": size,
+                "ratio": round(len(body) / size, 1),
+                "cpu_ms": round(seconds * 1000, 3),
+                "transfer_saved_ms": round(saved / bytes_per_ms, 1),
+            })
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"{'payload':<14}{'case':<9}{'bytes':>10}{'compressed':>12}{'ratio':>7}{'cpu ms':>9}{'saved ms':>10}")
+    for r in results:
+        if "error" in r:
+            print(f"{r['payload']:<14}{r['case']:<9}  {r['error']}")
+            continue
+        print(
+            f"{r['payload']:<14}{r['case']:<9}{r['bytes']:>10}{r['compressed']:>12}"
+            f"{r['ratio']:>7}{r['cpu_ms']:>9}{r['transfer_saved_ms']:>10}"
+        )
+
+
+if __name__ == "__main__":
+    main()
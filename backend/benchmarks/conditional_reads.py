@@ -0,0 +1,112 @@
+"""Bytes and CPU per read with and without If-None-Match.
+
+The app runs in-process on a copy of the database. Every case sends the
+same GET `--requests` times: once as a plain request and once revalidating
+with the ETag of the first response, which is what the browser cache does
+for the 5-second chat poll and board refreshes. Process CPU time includes
+the test client, which is the same in both modes.
+
+Запуск из backend/ (нужна БД с данными, например после seed_demo.py):
+    python -m benchmarks.conditional_reads --db task_manager.db --requests 500
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+
+def measure(client, path: str, headers: dict, requests: int) -> dict:
+    first = client.get(path, headers=headers)
+    first.raise_for_status()
+    etag = first.headers.get("etag")
+
+    results = {}
+    for mode, extra in (("full", {}), ("conditional", {"If-None-Match": etag} if etag else {})):
+        body_bytes = 0
+        statuses = set()
+        cpu = time.process_time()
+        for _ in range(requests):
+            response = client.get(path, headers={**headers, **extra})
+            body_bytes += len(response.content)
+            statuses.add(response.status_code)
+        cpu = time.process_time() - cpu
+        results[mode] = {
+            "status": sorted(statuses),
+            "bytes_per_request": round(body_bytes / requests, 1),
+            "cpu_ms_per_request": round(cpu / requests * 1000, 3),
+        }
+    return results
+
+
+def run(db_path: Path, args) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        db_copy = Path(tmp) / "bench.db"
+        shutil.copy(db_path, db_copy)
+        os.environ["DATABASE_URL"] = f"sqlite:///{db_copy}"
+
+        from fastapi.testclient import TestClient
+
+        from app.main import app
+
+        with TestClient(app) as client:
+            login = client.post("/auth/login", json={"username": args.username, "password": args.password})
+            login.raise_for_status()
+            headers = {"Authorization": f"Bearer {login.json()['access_token']}"}
+
+            tasks = client.get("/tasks/", headers=headers).json()
+            if not tasks:
+                raise SystemExit("no visible tasks in the database")
+            # задача с самым длинным чатом
+            task_id = max(
+                (t["id"] for t in tasks),
+                key=lambda tid: len(client.get(f"/tasks/{tid}/messages/", headers=headers).json()),
+            )
+            messages = client.get(f"/tasks/{task_id}/messages/", headers=headers).json()
+            last_id = messages[-1]["id"] if messages else 0
+
+            cases = {
+                "chat poll (since_id)": f"/tasks/{task_id}/messages/?since_id={last_id}",
+                "chat history": f"/tasks/{task_id}/messages/",
+                "board": "/tasks/",
+                "task": f"/tasks/{task_id}",
+                "users": "/users/",
+            }
+            return {name: measure(client, path, headers, args.requests) for name, path in cases.items()}
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Conditional GET savings per endpoint")
+    parser.add_argument("--db", default=str(BACKEND_DIR / "task_manager.db"), help="SQLite file with data")
+    parser.add_argument("--requests", type=int, default=500, help="requests per case and mode")
+    parser.add_argument("--username", default="admin")
+    parser.add_argument("--password", default="admin123")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    results = run(Path(args.db), args)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"{'case':<22}{'full B':>10}{'304 B':>8}{'full ms':>10}{'304 ms':>10}")
+    for name, r in results.items():
+        full, cond = r["full"], r["conditional"]
+        print(
+            f"{name:<22}{full['bytes_per_request']:>10}{cond['bytes_per_request']:>8}"
+            f"{full['cpu_ms_per_request']:>10}{cond['cpu_ms_per_request']:>10}"
+        )
+
+
+if __name__ == "__main__":
+    main()
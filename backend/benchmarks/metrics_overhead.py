@@ -0,0 +1,122 @@
+"""Cost of recording metrics on the request path.
+
+Three measurements:
+- one Counter.inc / Histogram.observe call (ns), what every request pays
+  a few times;
+- rendering /metrics with `--series` label combinations per metric;
+- a full ASGI request to a small FastAPI route with and without
+  MetricsMiddleware (called directly, no HTTP), i.e. the overhead per
+  request in microseconds.
+
+Запуск из backend/:
+    python -m benchmarks.metrics_overhead --requests 20000
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import time
+
+from fastapi import FastAPI
+
+from app.core.metrics import Counter, Histogram, MetricsMiddleware, Registry, render
+
+
+def per_call_ns(fn, count: int) -> float:
+    started = time.perf_counter()
+    for _ in range(count):
+        fn()
+    return (time.perf_counter() - started) / count * 1e9
+
+
+def render_ms(series: int) -> float:
+    registry = Registry()
+    counter = registry.counter("bench_total", "bench", ("route", "status"))
+    histogram = registry.histogram("bench_seconds", "bench", ("route",))
+    for n in range(series):
+        counter.inc(f"/route/{n}", "200")
+        histogram.observe(0.01, f"/route/{n}")
+    started = time.perf_counter()
+    render(registry.snapshot())
+    return (time.perf_counter() - started) * 1000
+
+
+def asgi_app(with_metrics: bool):
+    app = FastAPI()
+
+    @app.get("/items/{item_id}")
+    async def item(item_id: int):
+        return {"id": item_id}
+
+    return MetricsMiddleware(app) if with_metrics else app
+
+
+async def asgi_us(app, count: int) -> float:
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": "/items/1",
+        "raw_path": b"/items/1",
+        "query_string": b"",
+        "root_path": "",
+        "headers": [(b"host", b"bench")],
+        "server": ("bench", 80),
+        "client": ("127.0.0.1", 1),
+    }
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    for _ in range(200):
+        await app(dict(scope), receive, send)
+    started = time.perf_counter()
+    for _ in range(count):
+        await app(dict(scope), receive, send)
+    return (time.perf_counter() - started) / count * 1e6
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Metrics recording overhead")
+    parser.add_argument("--calls", type=int, default=500_000, help="calls for the per-call timings")
+    parser.add_argument("--series", type=int, default=200, help="label combinations for the render timing")
+    parser.add_argument("--requests", type=int, default=20_000, help="ASGI requests per variant")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    counter = Counter("bench_total", "bench", ("method", "route", "status"))
+    histogram = Histogram("bench_seconds", "bench", ("method", "route"))
+
+    plain_us = asyncio.run(asgi_us(asgi_app(False), args.requests))
+    metered_us = asyncio.run(asgi_us(asgi_app(True), args.requests))
+    results = {
+        "counter_inc_ns": round(per_call_ns(lambda: counter.inc("GET", "/tasks/", "200"), args.calls)),
+        "histogram_observe_ns": round(per_call_ns(lambda: histogram.observe(0.012, "GET", "/tasks/"), args.calls)),
+        "render_ms": round(render_ms(args.series), 2),
+        "series": args.series,
+        "request_us_without": round(plain_us, 1),
+        "request_us_with": round(metered_us, 1),
+        "overhead_us": round(metered_us - plain_us, 1),
+    }
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"Counter.inc:            {results['counter_inc_ns']} ns")
+    print(f"Histogram.observe:      {results['histogram_observe_ns']} ns")
+    print(f"render ({args.series} series x2): {results['render_ms']} ms")
+    print(f"ASGI request:           {results['request_us_without']} us -> {results['request_us_with']} us "
+          f"(+{results['overhead_us']} us with MetricsMiddleware)")
+
+
+if __name__ == "__main__":
+    main()
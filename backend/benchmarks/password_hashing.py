@@ -0,0 +1,90 @@
+"""Hashes/sec and verifies/sec per password scheme and cost.
+
+Запуск из backend/:
+    python -m benchmarks.password_hashing
+    python -m benchmarks.password_hashing --case sha256_crypt=535000 --case bcrypt=12 --seconds 3
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import time
+
+from app.core.security import build_pwd_context
+
+DEFAULT_CASES = [
+    "sha256_crypt=5000",
+    "sha256_crypt=100000",
+    "sha256_crypt=535000",
+    "pbkdf2_sha256=29000",
+    "bcrypt=10",
+    "bcrypt=12",
+]
+
+
+def parse_case(case: str) -> tuple[str, int | None]:
+    scheme, _, rounds = case.partition("=")
+    return scheme, int(rounds) if rounds else None
+
+
+def measure(fn, seconds: float) -> tuple[int, float]:
+    count = 0
+    started = time.perf_counter()
+    while True:
+        fn()
+        count += 1
+        elapsed = time.perf_counter() - started
+        if elapsed >= seconds:
+            return count, elapsed
+
+
+def run_case(case: str, seconds: float, password: str) -> dict:
+    scheme, rounds = parse_case(case)
+    result = {"scheme": scheme, "rounds": rounds}
+    try:
+        context = build_pwd_context([scheme], {scheme: rounds} if rounds else None)
+        hashed = context.hash(password)
+        count, elapsed = measure(lambda: context.hash(password), seconds)
+        result["hashes_per_sec"] = round(count / elapsed, 2)
+        count, elapsed = measure(lambda: context.verify(password, hashed), seconds)
+        result["verifies_per_sec"] = round(count / elapsed, 2)
+        result["verify_ms"] = round(elapsed / count * 1000, 3)
+    except Exception as exc:  # схема может быть недоступна (нет backend'а)
+        result["error"] = f"{type(exc).__name__}: {exc}"
+    return result
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Password hashing microbenchmark")
+    parser.add_argument(
+        "--case",
+        action="append",
+        help="scheme=rounds, can be repeated (default: a built-in matrix)",
+    )
+    parser.add_argument("--seconds", type=float, default=1.0, help="time per measurement")
+    parser.add_argument("--password", default="employee-password-123")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    results = [run_case(case, args.seconds, args.password) for case in args.case or DEFAULT_CASES]
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"{'scheme':<16}{'rounds':>10}{'hash/s':>12}{'verify/s':>12}{'verify ms':>12}")
+    for r in results:
+        if "error" in r:
+            print(f"{r['scheme']:<16}{str(r['rounds']):>10}  {r['error']}")
+            continue
+        print(
+            f"{r['scheme']:<16}{str(r['rounds']):>10}"
+            f"{r['hashes_per_sec']:>12}{r['verifies_per_sec']:>12}{r['verify_ms']:>12}"
+        )
+
+
+if __name__ == "__main__":
+    main()
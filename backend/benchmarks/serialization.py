@@ -0,0 +1,127 @@
+"""JSON encoding of a large board and chat: the former path vs response models.
+
+Encoders compared on the same list of dicts:
+- `jsonable_encoder`: the path without a response_model
+  (jsonable_encoder + JSONResponse);
+- `orjson`: ORJSONResponse with a response_model
+  (validate, dump to Python, orjson.dumps);
+- `pydantic`: the response_model path the app uses now
+  (validate, then Pydantic's dump_json straight to bytes).
+
+Запуск из backend/:
+    python -m benchmarks.serialization --tasks 10000
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import time
+from datetime import datetime, timedelta
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
+
+from app.schemas.message import MessageOut
+from app.schemas.task import TaskBoardItem
+
+try:
+    import orjson
+except ImportError:  # orjson — необязательная зависимость
+    orjson = None
+
+
+def board(tasks: int) -> list[dict]:
+    return [
+        {
+            "id": i,
+            "title": f"Задача {i}",
+            "short_description": "Короткое описание задачи для карточки",
+            "status": ["сделать", "в работе", "на проверке", "готово"][i % 4],
+            "assignee": None if i % 5 == 0 else f"employee{i % 23}",
+            "assignee_id": None if i % 5 == 0 else i % 23,
+            "assignee_role": None if i % 5 == 0 else "employee",
+            "created_by": "manager",
+            "is_mine": i % 5 == 0,
+            "is_lower": i % 5 != 0,
+        }
+        for i in range(1, tasks + 1)
+    ]
+
+
+def chat(messages: int) -> list[dict]:
+    started = datetime(2024, 1, 1, 9, 0)
+    return [
+        {
+            "id": i,
+            "user": f"employee{i % 23}",
+            "content": f"Сообщение {i}: статус обновлён, проверьте, пожалуйста",
+            "created_at": started + timedelta(seconds=37 * i, microseconds=i),
+        }
+        for i in range(1, messages + 1)
+    ]
+
+
+def encoders(adapter: TypeAdapter, exclude_unset: bool) -> dict:
+    def default_path(items):
+        return JSONResponse(jsonable_encoder(items)).body
+
+    def orjson_path(items):
+        value = adapter.validate_python(items)
+        return orjson.dumps(adapter.dump_python(value, mode="json", exclude_unset=exclude_unset))
+
+    def pydantic_path(items):
+        return adapter.dump_json(adapter.validate_python(items), exclude_unset=exclude_unset)
+
+    result = {"jsonable_encoder": default_path, "pydantic": pydantic_path}
+    if orjson is not None:
+        result["orjson"] = orjson_path
+    return result
+
+
+def measure(fn, items, repeat: int) -> tuple[float, int]:
+    best = float("inf")
+    size = 0
+    for _ in range(repeat):
+        started = time.perf_counter()
+        size = len(fn(items))
+        best = min(best, time.perf_counter() - started)
+    return best, size
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Response serialization microbenchmark")
+    parser.add_argument("--tasks", type=int, default=10_000, help="board size")
+    parser.add_argument("--messages", type=int, default=10_000, help="chat size")
+    parser.add_argument("--repeat", type=int, default=10, help="best of N runs")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    cases = {
+        f"board x{args.tasks}": (board(args.tasks), TypeAdapter(list[TaskBoardItem]), True),
+        f"chat x{args.messages}": (chat(args.messages), TypeAdapter(list[MessageOut]), False),
+    }
+
+    results = {}
+    for case, (items, adapter, exclude_unset) in cases.items():
+        results[case] = {}
+        for name, fn in encoders(adapter, exclude_unset).items():
+            seconds, size = measure(fn, items, args.repeat)
+            results[case][name] = {"ms": round(seconds * 1000, 2), "bytes": size}
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    for case, by_encoder in results.items():
+        baseline = by_encoder["jsonable_encoder"]["ms"]
+        print(case)
+        for name, r in by_encoder.items():
+            print(f"  {name:<18}{r['ms']:>10} ms{r['bytes']:>10} B  x{baseline / r['ms']:.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,193 @@
+"""Board reads during chat writes: SQLite defaults vs the tuned engine profile.
+
+Reader threads run the GET /tasks/ board query, writer threads insert chat
+messages and commit one by one. For each profile the script reports read
+latency percentiles, the longest read stall and write throughput.
+
+The board read is CPU-bound Python (row materialization under the GIL), so
+with unthrottled writers the tuned profile commits ~10x more messages and
+those commits take CPU from the readers: read p50 rises although no read
+waits for a lock. `--write-rate` caps commits per writer so both profiles
+do the same write work and the read numbers compare locking only;
+`read_solo_ms` is one read on an idle database, the CPU floor.
+
+Запуск из backend/:
+    python -m benchmarks.sqlite_concurrency --tasks 5000 --readers 8 --writers 4 --seconds 5 --write-rate 3
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import statistics
+import tempfile
+import threading
+import time
+
+from sqlalchemy.orm import sessionmaker
+
+from app.api.deps import CurrentUser
+from app.api.tasks import _board_query, _visibility_filter
+from app.db.base import Base
+from app.db.session import create_db_engine
+from app.models import change, message, status, task, user  # noqa: F401
+from app.models.message import Message
+from app.models.status import Status
+from app.models.task import Task
+from app.models.user import User
+
+
+def populate(url: str, tasks: int) -> None:
+    engine = create_db_engine(url, pragmas=None)
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        conn.execute(Status.__table__.insert(), [
+            {"id": i, "name": f"status-{i}", "order_index": i} for i in range(1, 5)
+        ])
+        conn.execute(User.__table__.insert(), [
+            {"id": i, "username": f"user{i}", "password_hash": "-", "role": role}
+            for i, role in enumerate(["admin", "ceo", "manager"] + ["employee"] * 20, start=1)
+        ])
+        conn.execute(Task.__table__.insert(), [
+            {
+                "title": f"task {i}",
+                "short_description": "bench",
+                "description": "bench",
+                "status_id": i % 4 + 1,
+                "created_by": 1 + i % 3,
+                "assignee_id": None if i % 5 == 0 else 1 + i % 23,
+            }
+            for i in range(tasks)
+        ])
+    engine.dispose()
+
+
+def percentile(values: list[float], q: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+def run_profile(
+    url: str, pragmas: dict | None, readers: int, writers: int, seconds: float, write_rate: float = 0,
+) -> dict:
+    # по соединению на поток: ожидание пула не должно попадать в задержку чтения
+    engine = create_db_engine(url, pragmas=pragmas, pool_size=readers + writers, max_overflow=0)
+    Session = sessionmaker(bind=engine, autoflush=False)
+    viewer = CurrentUser(id=3, username="user3", role="manager", created_at=None)
+
+    def read_board(db):
+        return _board_query(db).filter(_visibility_filter(viewer)).all()
+
+    with Session() as db:
+        read_board(db)  # прогрев кэша страниц и компиляции запроса
+        started = time.perf_counter()
+        read_board(db)
+        read_solo = time.perf_counter() - started
+
+    stop = threading.Event()
+    read_latencies: list[float] = []
+    writes = [0]
+    errors = [0]
+    lock = threading.Lock()
+
+    def reader():
+        while not stop.is_set():
+            db = Session()
+            started = time.perf_counter()
+            try:
+                read_board(db)
+                elapsed = time.perf_counter() - started
+                with lock:
+                    read_latencies.append(elapsed)
+            except Exception:
+                with lock:
+                    errors[0] += 1
+            finally:
+                db.close()
+
+    def writer(n: int):
+        i = 0
+        interval = 1 / write_rate if write_rate else 0
+        next_at = time.perf_counter()
+        while not stop.is_set():
+            if interval:
+                next_at += interval
+                stop.wait(max(0.0, next_at - time.perf_counter()))
+                if stop.is_set():
+                    break
+            db = Session()
+            try:
+                db.add(Message(content=f"bench {n}-{i}", task_id=1 + i % 100, user_id=1 + n % 23))
+                db.commit()
+                with lock:
+                    writes[0] += 1
+            except Exception:
+                with lock:
+                    errors[0] += 1
+            finally:
+                db.close()
+            i += 1
+
+    threads = [threading.Thread(target=reader) for _ in range(readers)]
+    threads += [threading.Thread(target=writer, args=(n,)) for n in range(writers)]
+    for t in threads:
+        t.start()
+    time.sleep(seconds)
+    stop.set()
+    for t in threads:
+        t.join()
+    engine.dispose()
+
+    return {
+        "reads": len(read_latencies),
+        "read_solo_ms": round(read_solo * 1000, 2),
+        "read_p50_ms": round(percentile(read_latencies, 0.50) * 1000, 2),
+        "read_p99_ms": round(percentile(read_latencies, 0.99) * 1000, 2),
+        "read_max_stall_ms": round(max(read_latencies, default=0) * 1000, 2),
+        "read_mean_ms": round(statistics.fmean(read_latencies) * 1000, 2) if read_latencies else 0.0,
+        "writes_per_sec": round(writes[0] / seconds, 1),
+        "errors": errors[0],
+    }
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Concurrent board read / chat write load test")
+    parser.add_argument("--tasks", type=int, default=5000)
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--writers", type=int, default=4)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument(
+        "--write-rate", type=float, default=0,
+        help="commits per second per writer, 0 = as fast as possible",
+    )
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    return parser.parse_args()
+
+
+def main():
+    from app.core.config import SQLITE_PRAGMAS
+
+    args = parse_args()
+    results = {}
+    for name, pragmas in (("default", None), ("tuned", SQLITE_PRAGMAS)):
+        with tempfile.TemporaryDirectory() as tmp:
+            url = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+            populate(url, args.tasks)
+            results[name] = run_profile(
+                url, pragmas, args.readers, args.writers, args.seconds, args.write_rate,
+            )
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    keys = list(results["default"])
+    print(f"{'':<20}{'default':>12}{'tuned':>12}")
+    for key in keys:
+        print(f"{key:<20}{results['default'][key]:>12}{results['tuned'][key]:>12}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,45 +1,106 @@
-"""Reset SQLite и наполнение демо-данными (пользователи, задачи, чат)."""
+"""Reset БД (SQLite или PostgreSQL из DATABASE_URL) и наполнение демо-данными (пользователи, задачи, чат).
+
+    python seed_demo.py                      # демо: 23 пользователя, 24 задачи
+    python seed_demo.py --users 1000 --tasks 1000000 --messages-per-task 5 --seed 42
+
+Со --tasks данные генерируются для нагрузочных тестов: bulk-вставки Core
+порциями по --chunk строк, каждая порция — своя транзакция. При одном и том
+же --seed строки одинаковы (кроме солей в хешах паролей).
+"""
+import argparse
+import itertools
+import time
 from pathlib import Path
 from datetime import datetime, timedelta
 import random
 
+from sqlalchemy.engine import make_url
+
 from app.db.base import Base
 from app.db.session import engine, SessionLocal, DATABASE_URL
+from app.db.migrations import _create_search_index, run_migrations
+from app.models import change  # noqa: F401
 from app.models.user import User
 from app.models.status import Status
 from app.models.task import Task
 from app.models.message import Message
 from app.core.security import hash_password
 
+TASK_TITLES = [
+    "Настроить канбан",
+    "Подключить чат",
+    "UI: список пользователей",
+    "Документация",
+    "Рефакторинг API",
+    "Починить drag&drop",
+    "Добавить сортировку",
+    "Фикс авторизации",
+    "Интеграция туннеля",
+    "Тестирование ролей",
+    "Seed demo data",
+    "Градиент фона",
+    "Редактирование задачи",
+    "Список пространств",
+    "Оптимизация запросов",
+    "Деплой preview",
+    "Локализация",
+    "Добавить метки",
+    "Починить CORS",
+    "Таблица пользователей",
+    "Форма создания",
+    "Обновление паролей",
+    "Роли и доступ",
+    "Докеризация",
+]
+
+SHORT_DESCRIPTIONS = ["Коротко про задачу", "Проверить", "Срочно", "Нормальный приоритет", "Нужно обсудить"]
+
+MESSAGE_TEXTS = [
+    "Проверь, пожалуйста.",
+    "Сделано, жду ревью.",
+    "Нужна сортировка по роли.",
+    "Добавил, посмотри.",
+    "Встреча в 15:00.",
+    "Починил drag&drop.",
+    "Добавил автообновление чата.",
+    "Поменял фон, посмотри градиент.",
+    "Готово к деплою.",
+    "Нужен ещё один статус?",
+    "Подправил CORS.",
+    "Обновил README.",
+    "Сделал сиды.",
+    "Проверил роли.",
+]
+
+STATUS_NAMES = ["сделать", "в работе", "на проверке", "готово"]
 
-DB_FILE = Path(DATABASE_URL.replace("sqlite:///", "./"))
+# фиксированные учётки демо (логинятся бенчмарки) — есть и в сгенерированных данных
+DEMO_ACCOUNTS = [
+    ("admin", "admin123", "admin"),
+    ("ceo", "ceo123", "ceo"),
+    ("manager", "manager123", "manager"),
+]
 
 
 def reset_db():
-    # Удаляем файл SQLite, создаём заново схему
-    if DB_FILE.exists():
-        DB_FILE.unlink()
-    Base.metadata.create_all(bind=engine)
-
-
-def seed_statuses(session):
-    statuses = [
-        ("сделать", 1),
-        ("в работе", 2),
-        ("на проверке", 3),
-        ("готово", 4),
-    ]
-    for name, order_index in statuses:
-        session.add(Status(name=name, order_index=order_index))
-    session.commit()
+    url = make_url(DATABASE_URL)
+    if url.get_backend_name() == "sqlite" and url.database:
+        # Удаляем файл SQLite (и WAL-файлы рядом), создаём заново схему
+        engine.dispose()
+        for suffix in ("", "-wal", "-shm"):
+            db_file = Path(url.database + suffix)
+            if db_file.exists():
+                db_file.unlink()
+    else:
+        # серверная БД: файла нет, пересоздаём таблицы
+        Base.metadata.drop_all(bind=engine)
+        with engine.begin() as conn:
+            conn.exec_driver_sql("DROP TABLE IF EXISTS schema_version")
+    run_migrations(engine)
 
 
 def seed_users(session):
-    users = [
-        ("admin", "admin123", "admin"),
-        ("ceo", "ceo123", "ceo"),
-        ("manager", "manager123", "manager"),
-    ]
+    users = list(DEMO_ACCOUNTS)
     # добавим пачку сотрудников
     for i in range(1, 21):
         users.append((f"employee{i}", f"emp{i:03}", "employee"))
@@ -63,44 +124,15 @@ def seed_tasks(session, users):
     u = {usr.username: usr for usr in users}
 
     now = datetime.utcnow()
-    titles = [
-        "Настроить канбан",
-        "Подключить чат",
-        "UI: список пользователей",
-        "Документация",
-        "Рефакторинг API",
-        "Починить drag&drop",
-        "Добавить сортировку",
-        "Фикс авторизации",
-        "Интеграция туннеля",
-        "Тестирование ролей",
-        "Seed demo data",
-        "Градиент фона",
-        "Редактирование задачи",
-        "Список пространств",
-        "Оптимизация запросов",
-        "Деплой preview",
-        "Локализация",
-        "Добавить метки",
-        "Починить CORS",
-        "Таблица пользователей",
-        "Форма создания",
-        "Обновление паролей",
-        "Роли и доступ",
-        "Докеризация",
-    ]
-
     tasks = []
-    for i, title in enumerate(titles, start=1):
+    for i, title in enumerate(TASK_TITLES, start=1):
         creator = random.choice(["admin", "ceo", "manager"])
         # иногда без исполнителя, иногда любой сотрудник
         assignee_choice = random.choice(list(u.keys()) + [None])
-        status_name = random.choice(["сделать", "в работе", "на проверке", "готово"])
+        status_name = random.choice(STATUS_NAMES)
         task = Task(
             title=title,
-            short_description=random.choice(
-                ["Коротко про задачу", "Проверить", "Срочно", "Нормальный приоритет", "Нужно обсудить"]
-            ),
+            short_description=random.choice(SHORT_DESCRIPTIONS),
             description=f"{title}. Детали: auto-generated seed.",
             status_id=status_by_name[status_name].id,
             created_by=u[creator].id,
@@ -115,28 +147,12 @@ def seed_tasks(session, users):
 
 def seed_messages(session, tasks, users):
     u = {usr.username: usr for usr in users}
-    sample_texts = [
-        "Проверь, пожалуйста.",
-        "Сделано, жду ревью.",
-        "Нужна сортировка по роли.",
-        "Добавил, посмотри.",
-        "Встреча в 15:00.",
-        "Починил drag&drop.",
-        "Добавил автообновление чата.",
-        "Поменял фон, посмотри градиент.",
-        "Готово к деплою.",
-        "Нужен ещё один статус?",
-        "Подправил CORS.",
-        "Обновил README.",
-        "Сделал сиды.",
-        "Проверил роли.",
-    ]
 
     for task in tasks:
         msg_count = random.randint(5, 20)
         for _ in range(msg_count):
             author = random.choice(list(u.values()))
-            text = random.choice(sample_texts)
+            text = random.choice(MESSAGE_TEXTS)
             session.add(
                 Message(
                     content=text,
@@ -147,11 +163,180 @@ def seed_messages(session, tasks, users):
     session.commit()
 
 
+# =========================
+# Генератор больших объёмов (--tasks)
+# =========================
+GENERATED_BASE_TIME = datetime(2024, 1, 1)
+PASSWORD_POOL_SIZE = 8
+
+
+def _chunks(rows, size):
+    rows = iter(rows)
+    while chunk := list(itertools.islice(rows, size)):
+        yield chunk
+
+
+def bulk_insert(table, rows, chunk_size: int) -> tuple[int, float]:
+    """Inserts rows (an iterable of dicts) in chunks, one transaction per chunk."""
+    count = 0
+    started = time.perf_counter()
+    for chunk in _chunks(rows, chunk_size):
+        with engine.begin() as conn:
+            conn.execute(table.insert(), chunk)
+        count += len(chunk)
+    return count, time.perf_counter() - started
+
+
+def drop_search_index() -> None:
+    # FTS-триггеры на каждую строку замедляют вставку; индекс строится заново
+    # одним INSERT ... SELECT в rebuild_search_index
+    if engine.dialect.name != "sqlite":
+        return
+    with engine.begin() as conn:
+        for name in ("tasks_fts", "messages_fts"):
+            for suffix in ("ai", "ad", "au"):
+                conn.exec_driver_sql(f"DROP TRIGGER IF EXISTS {name}_{suffix}")
+            conn.exec_driver_sql(f"DROP TABLE IF EXISTS {name}")
+
+
+def rebuild_search_index() -> float:
+    started = time.perf_counter()
+    with engine.begin() as conn:
+        _create_search_index(conn)
+    return time.perf_counter() - started
+
+
+def sync_sequences(tables) -> None:
+    # id вставлены явно: на PostgreSQL последовательности нужно подвинуть вручную
+    if engine.dialect.name != "postgresql":
+        return
+    with engine.begin() as conn:
+        for table in tables:
+            conn.exec_driver_sql(
+                f"SELECT setval(pg_get_serial_sequence('{table.name}', 'id'), "
+                f"(SELECT coalesce(max(id), 0) + 1 FROM {table.name}), false)"
+            )
+
+
+def generate_users(rng: random.Random, count: int) -> list[dict]:
+    # хеш на пользователя — секунды CPU на тысячу, поэтому небольшой пул паролей
+    pool = [f"load{i:03}" for i in range(PASSWORD_POOL_SIZE)]
+    hashes = {password: hash_password(password) for password in pool}
+
+    users = [
+        {
+            "id": i,
+            "username": username,
+            "password_hash": hash_password(password),
+            "password_plain": password,
+            "role": role,
+            "created_at": GENERATED_BASE_TIME - timedelta(days=400),
+        }
+        for i, (username, password, role) in enumerate(DEMO_ACCOUNTS, start=1)
+    ]
+    for i in range(len(users) + 1, count + 1):
+        password = rng.choice(pool)
+        users.append({
+            "id": i,
+            "username": f"user{i}",
+            "password_hash": hashes[password],
+            "password_plain": password,
+            # примерно 1 из 20 — руководители, остальные сотрудники
+            "role": "manager" if rng.random() < 0.05 else "employee",
+            "created_at": GENERATED_BASE_TIME - timedelta(days=rng.randint(1, 365)),
+        })
+    return users
+
+
+def generate_tasks(rng: random.Random, count: int, users: list[dict], status_ids: list[int]):
+    creators = [u["id"] for u in users if u["role"] != "employee"]
+    user_ids = [u["id"] for u in users]
+    for i in range(1, count + 1):
+        title = f"{rng.choice(TASK_TITLES)} #{i}"
+        created_at = GENERATED_BASE_TIME - timedelta(minutes=rng.randint(1, 525_600))
+        yield {
+            "id": i,
+            "title": title,
+            "short_description": rng.choice(SHORT_DESCRIPTIONS),
+            "description": f"{title}. {rng.choice(MESSAGE_TEXTS)} {rng.choice(MESSAGE_TEXTS)}",
+            "status_id": rng.choice(status_ids),
+            "created_by": rng.choice(creators),
+            # примерно каждая шестая задача без исполнителя
+            "assignee_id": None if rng.random() < 1 / 6 else rng.choice(user_ids),
+            "created_at": created_at,
+            "updated_at": created_at,
+        }
+
+
+def generate_messages(rng: random.Random, tasks: int, per_task: int, users: list[dict]):
+    user_ids = [u["id"] for u in users]
+    message_id = 0
+    for task_id in range(1, tasks + 1):
+        # в среднем per_task сообщений на задачу
+        for n in range(rng.randint(per_task - per_task // 2, per_task + per_task // 2)):
+            message_id += 1
+            yield {
+                "id": message_id,
+                "content": rng.choice(MESSAGE_TEXTS),
+                "task_id": task_id,
+                "user_id": rng.choice(user_ids),
+                "created_at": GENERATED_BASE_TIME + timedelta(minutes=task_id % 10_000, seconds=n),
+            }
+
+
+def seed_generated(args):
+    rng = random.Random(args.seed)
+    session = SessionLocal()
+    try:
+        status_by_name = {s.name: s.id for s in session.query(Status).all()}
+    finally:
+        session.close()
+    status_ids = [status_by_name[name] for name in STATUS_NAMES]
+
+    users = generate_users(rng, max(args.users, len(DEMO_ACCOUNTS)))
+    drop_search_index()
+    report = {
+        "users": bulk_insert(User.__table__, users, args.chunk),
+        "tasks": bulk_insert(
+            Task.__table__, generate_tasks(rng, args.tasks, users, status_ids), args.chunk
+        ),
+        "messages": bulk_insert(
+            Message.__table__,
+            generate_messages(rng, args.tasks, args.messages_per_task, users),
+            args.chunk,
+        ),
+    }
+    index_seconds = rebuild_search_index()
+    sync_sequences([User.__table__, Task.__table__, Message.__table__])
+
+    total_rows = sum(rows for rows, _ in report.values())
+    total_seconds = sum(seconds for _, seconds in report.values()) + index_seconds
+    for name, (rows, seconds) in report.items():
+        print(f"{name:<14}{rows:>12} rows {seconds:>9.1f} s {rows / max(seconds, 1e-9):>12.0f} rows/s")
+    if engine.dialect.name == "sqlite":
+        print(f"{'search index':<14}{'':>17} {index_seconds:>9.1f} s")
+    print(f"{'total':<14}{total_rows:>12} rows {total_seconds:>9.1f} s {total_rows / max(total_seconds, 1e-9):>12.0f} rows/s")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Reset the database and fill it with demo or generated data")
+    parser.add_argument("--users", type=int, default=100, help="generated users (with --tasks)")
+    parser.add_argument("--tasks", type=int, help="generate this many tasks instead of the demo set")
+    parser.add_argument("--messages-per-task", type=int, default=5, help="average chat length (with --tasks)")
+    parser.add_argument("--seed", type=int, default=1, help="random seed (with --tasks)")
+    parser.add_argument("--chunk", type=int, default=10_000, help="rows per insert transaction")
+    return parser.parse_args()
+
+
 def main():
+    args = parse_args()
     reset_db()
+    if args.tasks is not None:
+        seed_generated(args)
+        return
+
     session = SessionLocal()
     try:
-        seed_statuses(session)
         users = seed_users(session)
         tasks = seed_tasks(session, users)
         seed_messages(session, tasks, users)
@@ -0,0 +1,193 @@
+"""Shared fixtures: a throwaway database, a TestClient and data helpers.
+
+app.db.session reads DATABASE_URL when it is imported, so the test
+database is chosen here, before any app module is imported:
+TEST_DATABASE_URL if set, otherwise PostgreSQL at TEST_POSTGRES_URL when
+it is reachable, otherwise a temporary SQLite file. The chosen database
+is wiped: every table is dropped and migrations run from scratch.
+"""
+import asyncio
+import os
+import tempfile
+from contextlib import contextmanager
+
+import pytest
+from sqlalchemy import create_engine, event, insert
+
+DEFAULT_POSTGRES_URL = "postgresql+psycopg://postgres@localhost:5432/task_manager_test"
+
+
+def _reachable(url: str) -> bool:
+    try:
+        probe = create_engine(url, connect_args={"connect_timeout": 2})
+    except ImportError:  # psycopg не установлен
+        return False
+    try:
+        with probe.connect():
+            return True
+    except Exception:
+        return False
+    finally:
+        probe.dispose()
+
+
+def _test_database_url() -> str:
+    url = os.getenv("TEST_DATABASE_URL")
+    if url:
+        return url
+    url = os.getenv("TEST_POSTGRES_URL", DEFAULT_POSTGRES_URL)
+    if url and _reachable(url):
+        return url
+    return f"sqlite:///{tempfile.mkdtemp(prefix='task-manager-tests-')}/test.db"
+
+
+os.environ["DATABASE_URL"] = _test_database_url()
+os.environ.pop("ASYNC_DATABASE_URL", None)
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+from app.api.deps import token_cache, token_versions  # noqa: E402
+from app.api.statuses import status_catalog  # noqa: E402
+from app.core.security import create_access_token  # noqa: E402
+from app.db.base import Base  # noqa: E402
+from app.db.migrations import schema_version  # noqa: E402
+from app.db.session import SessionLocal, async_engine, engine  # noqa: E402
+from app.main import app  # noqa: E402
+from app.models.status import Status  # noqa: E402
+from app.models.task import Task  # noqa: E402
+from app.models.user import User  # noqa: E402
+
+# справочники, которые создают миграции и старт приложения
+_KEPT_TABLES = {"statuses", "change_counter"}
+
+
+def pytest_report_header(config):
+    return f"database: {engine.url.render_as_string(hide_password=True)}"
+
+
+def reset_database() -> None:
+    """Drops every table, so the next start applies all migrations."""
+    with engine.begin() as conn:
+        Base.metadata.drop_all(bind=conn)
+        schema_version.drop(bind=conn, checkfirst=True)
+        if conn.dialect.name == "sqlite":
+            for name in ("tasks_fts", "messages_fts"):
+                conn.exec_driver_sql(f"DROP TABLE IF EXISTS {name}")
+
+
+@pytest.fixture(scope="session")
+def client():
+    reset_database()
+    # старт приложения применяет миграции и заводит статусы
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+@pytest.fixture(autouse=True)
+def clean_db(client):
+    yield
+    with engine.begin() as conn:
+        for table in reversed(Base.metadata.sorted_tables):
+            if table.name not in _KEPT_TABLES:
+                conn.execute(table.delete())
+    token_cache.clear()
+    token_versions.clear()
+    status_catalog.invalidate()
+
+
+@pytest.fixture
+def db():
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+@pytest.fixture
+def status_ids(db) -> list[int]:
+    return [s.id for s in db.query(Status).order_by(Status.order_index)]
+
+
+@pytest.fixture
+def make_user(db):
+    def make(username: str, role: str = "employee") -> User:
+        # хеш не настоящий: тесты входят токеном из auth_headers
+        user = User(username=username, password_hash="-", role=role)
+        db.add(user)
+        db.commit()
+        return user
+
+    return make
+
+
+@pytest.fixture
+def make_tasks(db, status_ids):
+    def make(count: int, created_by: int, assignee_ids: list[int | None]) -> None:
+        """Bulk insert; assignees and statuses are taken round-robin."""
+        rows = [
+            {
+                "title": f"Task {n}",
+                "short_description": f"Short {n}",
+                "description": f"Description {n}",
+                "status_id": status_ids[n % len(status_ids)],
+                "created_by": created_by,
+                "assignee_id": assignee_ids[n % len(assignee_ids)],
+            }
+            for n in range(count)
+        ]
+        db.execute(insert(Task), rows)
+        db.commit()
+
+    return make
+
+
+@pytest.fixture
+def auth_headers():
+    def headers(user: User) -> dict:
+        token = create_access_token({
+            "sub": user.username,
+            "role": user.role,
+            "uid": user.id,
+            "ver": user.token_version,
+        })
+        return {"Authorization": f"Bearer {token}"}
+
+    return headers
+
+
+def _on_event_loop() -> bool:
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return False
+    return True
+
+
+@pytest.fixture
+def on_event_loop():
+    """Callable: is the calling code running on the event loop thread?"""
+    return _on_event_loop
+
+
+@pytest.fixture
+def count_statements():
+    """Context manager collecting SQL statements of both engines."""
+    engines = [engine] + ([async_engine.sync_engine] if async_engine is not None else [])
+
+    @contextmanager
+    def counting():
+        statements = []
+
+        def record(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        for eng in engines:
+            event.listen(eng, "before_cursor_execute", record)
+        try:
+            yield statements
+        finally:
+            for eng in engines:
+                event.remove(eng, "before_cursor_execute", record)
+
+    return counting
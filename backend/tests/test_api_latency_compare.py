@@ -0,0 +1,78 @@
+"""benchmarks.api_latency.compare: regressions only between comparable runs."""
+import copy
+import json
+import sys
+
+import pytest
+
+from benchmarks import api_latency
+from benchmarks.api_latency import EXIT_BASELINE_MISMATCH, EXIT_REGRESSION, BaselineMismatch, compare
+
+BASELINE = {
+    "meta": {
+        "python": "3.11.7",
+        "machine": "x86_64",
+        "dataset": {"users": 200, "tasks": 5000, "messages_per_task": 5, "seed": 1},
+        "requests": 200,
+        "board_limit": 200,
+    },
+    "results": {
+        "manager": {
+            "GET /tasks/": {"p95_ms": 10.0},
+            "GET /users/": {"p95_ms": 4.0},
+        },
+    },
+}
+
+
+def _run(**meta) -> dict:
+    current = copy.deepcopy(BASELINE)
+    current["meta"].update(meta)
+    current["results"]["manager"]["GET /tasks/"]["p95_ms"] = 13.0
+    current["results"]["manager"]["GET /users/"]["p95_ms"] = 4.4
+    return current
+
+
+def test_reports_slowdowns_above_threshold():
+    regressions = compare(_run(), BASELINE, "p95_ms", 0.2)
+    assert len(regressions) == 1
+    assert "GET /tasks/" in regressions[0] and "+30%" in regressions[0]
+
+
+@pytest.mark.parametrize("meta", [
+    {"dataset": {"users": 20, "tasks": 500, "messages_per_task": 5, "seed": 1}},
+    {"dataset": "/tmp/copy.db"},
+    {"requests": 50},
+    {"board_limit": 0},
+])
+def test_refuses_runs_with_other_load(meta):
+    key = next(iter(meta))
+    with pytest.raises(BaselineMismatch, match=key):
+        compare(_run(**meta), BASELINE, "p95_ms", 0.2)
+
+
+def test_refuses_baseline_without_meta():
+    baseline = {"results": BASELINE["results"]}
+    with pytest.raises(BaselineMismatch):
+        compare(_run(), baseline, "p95_ms", 0.2)
+
+
+def test_warns_about_other_environment(capsys):
+    regressions = compare(_run(python="3.12.1", machine="arm64"), BASELINE, "p95_ms", 0.2)
+    assert len(regressions) == 1
+    warnings = capsys.readouterr().err
+    assert "python" in warnings and "machine" in warnings
+
+
+@pytest.mark.parametrize("meta, code", [({}, EXIT_REGRESSION), ({"requests": 50}, EXIT_BASELINE_MISMATCH)])
+def test_exit_status_tells_mismatch_from_regression(tmp_path, monkeypatch, capsys, meta, code):
+    baseline = tmp_path / "baseline.json"
+    baseline.write_text(json.dumps(BASELINE))
+    # сам прогон не нужен: проверяется только разбор результата
+    monkeypatch.setattr(api_latency, "run", lambda args: _run(**meta))
+    monkeypatch.setattr(sys, "argv", ["api_latency", "--baseline", str(baseline), "--json"])
+    with pytest.raises(SystemExit) as exc:
+        api_latency.main()
+    assert exc.value.code == code
+    printed = json.loads(capsys.readouterr().out)
+    assert bool(printed["baseline_mismatch"]) == (code == EXIT_BASELINE_MISMATCH)
@@ -0,0 +1,116 @@
+"""Unbounded lists are built in the threadpool, bounded pages on the async session.
+
+The threaded path holds one pooled connection and reads ETag and body from one snapshot.
+"""
+import pytest
+from sqlalchemy import event
+
+from app.api import messages, tasks
+from app.api.deps import token_cache
+from app.db.session import AsyncSessionLocal, async_engine, engine
+from app.models.task import Task
+
+
+@pytest.fixture
+def spy(monkeypatch, on_event_loop):
+    """Wraps a module function; records whether each call ran on the event loop thread."""
+    calls = []
+
+    def install(module, name):
+        original = getattr(module, name)
+
+        def wrapper(*args, **kwargs):
+            calls.append(on_event_loop())
+            return original(*args, **kwargs)
+
+        monkeypatch.setattr(module, name, wrapper)
+        return calls
+
+    return install
+
+
+@pytest.fixture
+def task_with_chat(client, db, make_user, make_tasks, auth_headers):
+    manager = make_user("manager", "manager")
+    make_tasks(30, manager.id, [manager.id, None])
+    task_id = db.query(Task.id).limit(1).scalar()
+    headers = auth_headers(manager)
+    for n in range(3):
+        client.post(f"/tasks/{task_id}/messages/", json={"content": f"m{n}"}, headers=headers)
+    return task_id, headers
+
+
+@pytest.mark.parametrize("limit, on_loop", [(None, False), (10, AsyncSessionLocal is not None)])
+def test_board_list(client, task_with_chat, spy, limit, on_loop):
+    _, headers = task_with_chat
+    calls = spy(tasks, "_list_tasks")
+    params = {"limit": limit} if limit else {}
+    response = client.get("/tasks/", params=params, headers=headers)
+    assert response.status_code == 200
+    assert len(response.json()) == (limit or 30)
+    assert calls == [on_loop]
+
+
+@pytest.mark.parametrize("limit, on_loop", [(None, False), (2, AsyncSessionLocal is not None)])
+def test_chat_history(client, task_with_chat, spy, limit, on_loop):
+    task_id, headers = task_with_chat
+    calls = spy(messages, "_list_messages")
+    params = {"limit": limit} if limit else {}
+    response = client.get(f"/tasks/{task_id}/messages/", params=params, headers=headers)
+    assert response.status_code == 200
+    assert len(response.json()) == (limit or 3)
+    assert calls == [on_loop]
+
+
+@pytest.fixture
+def checked_out():
+    """Counts pooled connections checked out of both engines; keeps the peak."""
+    engines = [engine] + ([async_engine.sync_engine] if async_engine is not None else [])
+    state = {"now": 0, "peak": 0}
+
+    def checkout(dbapi_connection, record, proxy):
+        state["now"] += 1
+        state["peak"] = max(state["peak"], state["now"])
+
+    def checkin(dbapi_connection, record):
+        state["now"] -= 1
+
+    for eng in engines:
+        event.listen(eng, "checkout", checkout)
+        event.listen(eng, "checkin", checkin)
+    yield state
+    for eng in engines:
+        event.remove(eng, "checkout", checkout)
+        event.remove(eng, "checkin", checkin)
+
+
+@pytest.mark.parametrize("url", ["/tasks/", "/tasks/{task_id}/messages/"])
+def test_unbounded_list_holds_one_connection(client, task_with_chat, checked_out, url):
+    task_id, headers = task_with_chat
+    # промах кэша токенов: проверка токена тоже идёт в БД через сессию запроса
+    token_cache.clear()
+    checked_out["peak"] = checked_out["now"]
+    response = client.get(url.format(task_id=task_id), headers=headers)
+    assert response.status_code == 200
+    assert checked_out["peak"] - checked_out["now"] <= 1
+
+
+def test_board_etag_and_body_come_from_one_snapshot(client, task_with_chat, make_tasks, monkeypatch):
+    _, headers = task_with_chat
+    original = tasks._board_etag
+
+    def etag_then_write(db, user, *args):
+        etag = original(db, user, *args)
+        # коммит другого клиента между ETag и выборкой строк
+        make_tasks(1, user.id, [user.id])
+        return etag
+
+    monkeypatch.setattr(tasks, "_board_etag", etag_then_write)
+    response = client.get("/tasks/", headers=headers)
+    assert len(response.json()) == 30
+    monkeypatch.undo()
+
+    # тело соответствует ETag: с ним доска из 31 задачи уже не 304
+    fresh = client.get("/tasks/", headers={**headers, "If-None-Match": response.headers["ETag"]})
+    assert fresh.status_code == 200
+    assert len(fresh.json()) == 31
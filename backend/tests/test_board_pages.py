@@ -0,0 +1,81 @@
+"""Keyset pagination of GET /tasks/ by (status_id, id)."""
+import base64
+
+import pytest
+
+from app.models.status import Status
+from app.models.task import Task
+
+
+@pytest.fixture
+def board(db, make_user, make_tasks, auth_headers):
+    manager = make_user("manager", "manager")
+    employee = make_user("employee", "employee")
+    make_tasks(47, manager.id, [None, manager.id, employee.id])
+    return manager, employee, auth_headers(manager)
+
+
+def _walk(client, headers: dict, limit: int, on_page=None, **params) -> list[dict]:
+    items, cursor, pages = [], None, 0
+    while True:
+        query = {**params, "limit": limit}
+        if cursor:
+            query["cursor"] = cursor
+        response = client.get("/tasks/", params=query, headers=headers)
+        assert response.status_code == 200
+        page = response.json()
+        assert len(page) <= limit
+        items.extend(page)
+        pages += 1
+        if on_page is not None:
+            on_page(pages)
+        cursor = response.headers.get("X-Next-Cursor")
+        if cursor is None:
+            return items
+        assert len(page) == limit
+
+
+def test_pages_cover_board_without_duplicates_during_inserts(client, db, board, make_tasks):
+    manager, employee, headers = board
+    before = {task_id for task_id, in db.query(Task.id)}
+    status_order = {s.name: s.id for s in db.query(Status)}
+
+    # между страницами появляются новые задачи во всех статусах
+    items = _walk(client, headers, 10, on_page=lambda _: make_tasks(4, manager.id, [employee.id]))
+
+    ids = [item["id"] for item in items]
+    assert len(ids) == len(set(ids))
+    assert before <= set(ids)
+    keys = [(status_order[item["status"]], item["id"]) for item in items]
+    assert keys == sorted(keys)
+
+
+@pytest.mark.parametrize("params", [
+    {"status_id": "first"},
+    {"assignee_id": 0},
+    {"is_mine": "false"},
+    {"created_by": "manager"},
+])
+def test_cursor_respects_filters(client, db, board, status_ids, params):
+    manager, _, headers = board
+    params = {
+        key: status_ids[0] if value == "first" else manager.id if value == "manager" else value
+        for key, value in params.items()
+    }
+    whole = client.get("/tasks/", params=params, headers=headers).json()
+    assert whole
+    assert _walk(client, headers, 4, **params) == whole
+
+
+@pytest.mark.parametrize("cursor", [
+    "not base64!",
+    base64.urlsafe_b64encode(b"1").decode(),
+    base64.urlsafe_b64encode(b"a:b").decode(),
+    base64.urlsafe_b64encode(b"1:2:3").decode(),
+    base64.urlsafe_b64encode(b"\xff\xfe").decode(),
+])
+def test_malformed_cursor_is_rejected(client, board, cursor):
+    _, _, headers = board
+    response = client.get("/tasks/", params={"limit": 5, "cursor": cursor}, headers=headers)
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Invalid cursor"
@@ -0,0 +1,32 @@
+"""Board reads run the same number of statements whatever the board size."""
+import pytest
+
+from app.models.task import Task
+
+N = 20
+
+
+@pytest.mark.parametrize("path", ["/tasks/", "/tasks/{task_id}"])
+def test_statement_count_does_not_grow_with_board(
+    client, db, make_user, make_tasks, auth_headers, count_statements, path
+):
+    manager = make_user("manager", "manager")
+    employees = [make_user(f"employee{n}", "employee") for n in range(3)]
+    assignees = [None, manager.id] + [e.id for e in employees]
+    headers = auth_headers(manager)
+
+    def statements_for(total: int) -> int:
+        make_tasks(total - db.query(Task).count(), manager.id, assignees)
+        task_id = db.query(Task.id).order_by(Task.id.desc()).limit(1).scalar()
+        url = path.format(task_id=task_id)
+
+        # прогрев: кэш версии токена и справочник статусов
+        client.get(url, headers=headers)
+        with count_statements() as statements:
+            response = client.get(url, headers=headers)
+        assert response.status_code == 200
+        if path == "/tasks/":
+            assert len(response.json()) == total
+        return len(statements)
+
+    assert statements_for(N) == statements_for(10 * N)
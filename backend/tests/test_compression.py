@@ -0,0 +1,50 @@
+"""Compression middleware: gzip for bodies, untouched start for other message types."""
+import asyncio
+import gzip
+
+from starlette.responses import FileResponse, JSONResponse
+
+from app.core.compression import CompressionMiddleware
+
+
+def _call(app, extensions: dict | None = None) -> list[dict]:
+    scope = {
+        "type": "http",
+        "method": "GET",
+        "path": "/",
+        "headers": [(b"accept-encoding", b"gzip")],
+        "extensions": extensions or {},
+    }
+    sent = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        sent.append(message)
+
+    asyncio.run(CompressionMiddleware(app, encodings=["gzip"], minimum_size=16)(scope, receive, send))
+    return sent
+
+
+def _headers(message: dict) -> dict:
+    return {key.decode(): value.decode() for key, value in message["headers"]}
+
+
+def test_compresses_json_body():
+    payload = {"items": ["x" * 10] * 50}
+    start, body = _call(JSONResponse(payload))
+    assert _headers(start)["content-encoding"] == "gzip"
+    assert gzip.decompress(body["body"]) == JSONResponse(payload).body
+
+
+def test_pathsend_gets_start_first_and_uncompressed(tmp_path):
+    path = tmp_path / "report.txt"
+    path.write_text("line\n" * 100)
+    sent = _call(FileResponse(path), extensions={"http.response.pathsend": {}})
+
+    assert [m["type"] for m in sent] == ["http.response.start", "http.response.pathsend"]
+    headers = _headers(sent[0])
+    assert "content-encoding" not in headers
+    assert headers["content-length"] == str(path.stat().st_size)
+    assert sent[1]["path"] == str(path)
@@ -0,0 +1,42 @@
+"""Login keeps database work off the event loop thread, rehash included."""
+import pytest
+from passlib.hash import md5_crypt
+from sqlalchemy import event
+
+from app.core import security
+from app.core.security import build_pwd_context
+from app.db.session import engine
+from app.models.user import User
+
+
+@pytest.fixture
+def statement_threads(on_event_loop):
+    """(statement, ran on the event loop thread) for each statement of the sync engine."""
+    recorded = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        recorded.append((statement, on_event_loop()))
+
+    event.listen(engine, "before_cursor_execute", record)
+    yield recorded
+    event.remove(engine, "before_cursor_execute", record)
+
+
+def test_rehash_on_login_runs_in_threadpool(client, db, monkeypatch, statement_threads):
+    # md5_crypt принимается, но устарел: вход перехеширует пароль в sha256_crypt
+    monkeypatch.setattr(
+        security, "pwd_context", build_pwd_context(["sha256_crypt", "md5_crypt"], {"sha256_crypt": 1000})
+    )
+    user = User(username="legacy", password_hash=md5_crypt.hash("secret"), role="employee")
+    db.add(user)
+    db.commit()
+
+    response = client.post("/auth/login", json={"username": "legacy", "password": "secret"})
+    assert response.status_code == 200
+    assert response.json()["access_token"]
+
+    db.refresh(user)
+    assert user.password_hash.startswith("$5$")
+    assert any(statement.startswith("UPDATE users") for statement, _ in statement_threads)
+    assert [statement for statement, on_loop in statement_threads if on_loop] == []
+
@@ -0,0 +1,81 @@
+"""Chat WebSocket: pushes messages and drops subscribers that lost access."""
+import pytest
+from starlette.websockets import WebSocketDisconnect
+
+from app.api import messages
+from app.models.task import Task
+from app.models.user import User
+
+
+@pytest.fixture
+def chat(db, make_user, make_tasks):
+    manager = make_user("manager", "manager")
+    employee = make_user("employee", "employee")
+    make_tasks(1, manager.id, [employee.id])
+    task_id = db.query(Task.id).scalar()
+    return manager, employee, task_id
+
+
+def _socket_url(task_id: int, headers: dict) -> str:
+    token = headers["Authorization"].split()[1]
+    return f"/tasks/{task_id}/messages/ws?token={token}"
+
+
+def _post(client, task_id: int, headers: dict, content: str) -> None:
+    response = client.post(f"/tasks/{task_id}/messages/", json={"content": content}, headers=headers)
+    assert response.status_code == 201
+
+
+def test_pushes_new_messages(client, chat, auth_headers):
+    manager, employee, task_id = chat
+    with client.websocket_connect(_socket_url(task_id, auth_headers(employee))) as ws:
+        _post(client, task_id, auth_headers(manager), "hello")
+        message = ws.receive_json()
+    assert (message["user"], message["content"]) == ("manager", "hello")
+
+
+def test_rejects_hidden_task(client, db, chat, make_user, auth_headers):
+    manager, _, task_id = chat
+    db.query(Task).filter(Task.id == task_id).update({"assignee_id": manager.id})
+    db.commit()
+    outsider = make_user("outsider", "employee")
+    with pytest.raises(WebSocketDisconnect) as exc:
+        with client.websocket_connect(_socket_url(task_id, auth_headers(outsider))) as ws:
+            ws.receive_json()
+    assert exc.value.code == 1008
+
+
+def test_closes_when_task_is_reassigned(client, db, chat, make_user, auth_headers):
+    manager, employee, task_id = chat
+    other_manager = make_user("other", "manager")
+    with client.websocket_connect(_socket_url(task_id, auth_headers(employee))) as ws:
+        db.query(Task).filter(Task.id == task_id).update({"assignee_id": other_manager.id})
+        db.commit()
+        _post(client, task_id, auth_headers(manager), "secret")
+        with pytest.raises(WebSocketDisconnect) as exc:
+            ws.receive_json()
+    assert exc.value.code == 1008
+
+
+def test_closes_when_token_is_revoked(client, db, chat, auth_headers):
+    manager, employee, task_id = chat
+    with client.websocket_connect(_socket_url(task_id, auth_headers(employee))) as ws:
+        # смена пароля/роли в другом воркере: кэши этого процесса не знают о ней
+        db.query(User).filter(User.id == employee.id).update({"token_version": User.token_version + 1})
+        db.commit()
+        _post(client, task_id, auth_headers(manager), "secret")
+        with pytest.raises(WebSocketDisconnect) as exc:
+            ws.receive_json()
+    assert exc.value.code == 1008
+
+
+def test_rechecks_without_new_messages(client, db, chat, make_user, auth_headers, monkeypatch):
+    monkeypatch.setattr(messages, "WS_RECHECK_SECONDS", 0.05)
+    _, employee, task_id = chat
+    other_manager = make_user("other", "manager")
+    with client.websocket_connect(_socket_url(task_id, auth_headers(employee))) as ws:
+        db.query(Task).filter(Task.id == task_id).update({"assignee_id": other_manager.id})
+        db.commit()
+        with pytest.raises(WebSocketDisconnect) as exc:
+            ws.receive_json()
+    assert exc.value.code == 1008
@@ -0,0 +1,108 @@
+"""Workers starting together on an empty database migrate and seed it once."""
+import subprocess
+import sys
+import threading
+from pathlib import Path
+
+import pytest
+from sqlalchemy import create_engine, select
+
+from app.db.base import Base
+from app.db.migrations import DEFAULT_STATUSES, LATEST_VERSION, run_migrations, schema_version
+from app.db.session import create_db_engine, engine
+
+WORKERS = 4
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+statuses = Base.metadata.tables["statuses"]
+
+
+@pytest.fixture
+def fresh_url(tmp_path):
+    """URL of an empty database; on PostgreSQL — a separate schema of the test database."""
+    if engine.dialect.name != "postgresql":
+        yield f"sqlite:///{tmp_path}/fresh.db"
+        return
+    with engine.begin() as conn:
+        conn.exec_driver_sql("DROP SCHEMA IF EXISTS migration_test CASCADE")
+        conn.exec_driver_sql("CREATE SCHEMA migration_test")
+    yield engine.url.render_as_string(hide_password=False)
+    with engine.begin() as conn:
+        conn.exec_driver_sql("DROP SCHEMA migration_test CASCADE")
+
+
+def _worker_engine(url: str):
+    if url.startswith("sqlite"):
+        return create_db_engine(url)
+    return create_engine(url, connect_args={"options": "-c search_path=migration_test"})
+
+
+def test_concurrent_startup_applies_migrations_once(fresh_url):
+    engines = [_worker_engine(fresh_url) for _ in range(WORKERS)]
+    barrier = threading.Barrier(WORKERS)
+    applied, errors = [], []
+
+    def start(worker_engine):
+        barrier.wait()
+        try:
+            applied.append(run_migrations(worker_engine))
+        except Exception as exc:
+            errors.append(exc)
+
+    threads = [threading.Thread(target=start, args=(e,)) for e in engines]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    try:
+        assert errors == []
+        assert sorted(applied) == [0] * (WORKERS - 1) + [LATEST_VERSION]
+        with engines[0].connect() as conn:
+            assert conn.execute(select(schema_version.c.version)).scalars().all() == [LATEST_VERSION]
+            names = conn.execute(select(statuses.c.name).order_by(statuses.c.order_index)).scalars().all()
+            assert names == [name for name, _ in DEFAULT_STATUSES]
+        assert run_migrations(engines[0]) == 0
+    finally:
+        for worker_engine in engines:
+            worker_engine.dispose()
+
+
+def test_status_seeding_keeps_existing_statuses(fresh_url):
+    worker_engine = _worker_engine(fresh_url)
+    try:
+        run_migrations(worker_engine)
+        # БД, где статусы завёл прежний сидинг при старте, а миграции 8 ещё не было
+        with worker_engine.begin() as conn:
+            conn.execute(statuses.delete())
+            conn.execute(statuses.insert().values(name="бэклог", order_index=1))
+            conn.execute(schema_version.update().values(version=7))
+
+        assert run_migrations(worker_engine) == LATEST_VERSION - 7
+        with worker_engine.connect() as conn:
+            assert conn.execute(select(statuses.c.name)).scalars().all() == ["бэклог"]
+    finally:
+        worker_engine.dispose()
+
+
+def test_migrations_register_models_themselves(tmp_path):
+    # новый процесс, в котором до миграций не импортирована ни одна модель
+    url = f"sqlite:///{tmp_path}/bare.db"
+    script = (
+        "from sqlalchemy import create_engine\n"
+        "from app.db.migrations import run_migrations\n"
+        f"print(run_migrations(create_engine({url!r})))\n"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", script], cwd=BACKEND_DIR, capture_output=True, text=True, timeout=60,
+    )
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip() == str(LATEST_VERSION)
+
+    bare_engine = create_engine(url)
+    try:
+        with bare_engine.connect() as conn:
+            names = conn.execute(select(statuses.c.name).order_by(statuses.c.order_index)).scalars().all()
+            assert names == [name for name, _ in DEFAULT_STATUSES]
+            assert conn.exec_driver_sql("SELECT count(*) FROM tasks").scalar() == 0
+    finally:
+        bare_engine.dispose()
@@ -0,0 +1,46 @@
+"""Per-request SQL statistics survive failing statements."""
+import time
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.exc import OperationalError
+
+from app.core import query_stats
+from app.core.query_stats import QueryStats, instrument_engine
+
+
+@pytest.fixture
+def stats_engine(tmp_path):
+    # одно соединение в пуле: все запросы идут через него
+    engine = create_engine(f"sqlite:///{tmp_path}/stats.db", pool_size=1, max_overflow=0)
+    instrument_engine(engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def request_stats():
+    """Makes the test body count statements like one HTTP request."""
+    stats = QueryStats()
+    token = query_stats._current.set(stats)
+    yield stats
+    query_stats._current.reset(token)
+
+
+def test_failing_statement_does_not_skew_later_timings(stats_engine, request_stats):
+    with stats_engine.connect() as conn:
+        info_before = dict(conn.info)
+        for _ in range(3):
+            with pytest.raises(OperationalError):
+                conn.exec_driver_sql("SELECT * FROM no_such_table")
+        # упавшие запросы не оставили на соединении ничего
+        assert dict(conn.info) == info_before
+
+    time.sleep(0.2)
+    with stats_engine.connect() as conn:
+        conn.exec_driver_sql("SELECT 1").scalar()
+
+    assert request_stats.count == 1
+    assert request_stats.slowest_statement == "SELECT 1"
+    # замер не включает время с момента упавшего запроса
+    assert request_stats.seconds < 0.1
@@ -0,0 +1,70 @@
+"""A renamed user's new name shows up in chat immediately, on any worker.
+
+The chat ETag must change with it, or clients keep the old name via 304s.
+"""
+import pytest
+
+from app.models.task import Task
+from app.models.user import User
+
+
+@pytest.fixture
+def chat(client, db, make_user, make_tasks, auth_headers):
+    admin = make_user("admin", "admin")
+    author = make_user("author", "employee")
+    make_tasks(1, admin.id, [author.id])
+    task_id = db.query(Task.id).scalar()
+    response = client.post(f"/tasks/{task_id}/messages/", json={"content": "hi"}, headers=auth_headers(author))
+    assert response.status_code == 201
+    return admin, author, task_id
+
+
+def _authors(client, task_id: int, headers: dict) -> list[str]:
+    response = client.get(f"/tasks/{task_id}/messages/", headers=headers)
+    assert response.status_code == 200
+    return [m["user"] for m in response.json()]
+
+
+def test_rename_through_api_shows_up_immediately(client, chat, auth_headers):
+    admin, author, task_id = chat
+    headers = auth_headers(admin)
+    assert _authors(client, task_id, headers) == ["author"]
+
+    response = client.patch(f"/users/{author.id}", json={"username": "renamed"}, headers=headers)
+    assert response.status_code == 200
+    assert _authors(client, task_id, headers) == ["renamed"]
+
+
+def test_rename_in_another_worker_shows_up_immediately(client, db, chat, auth_headers):
+    admin, author, task_id = chat
+    headers = auth_headers(admin)
+    assert _authors(client, task_id, headers) == ["author"]
+
+    # то же, что делает update_user другого процесса: ни одна инвалидация
+    # в памяти этого процесса не срабатывает
+    db.query(User).filter(User.id == author.id).update(
+        {"username": "renamed", "token_version": User.token_version + 1}
+    )
+    db.commit()
+    assert _authors(client, task_id, headers) == ["renamed"]
+
+
+def test_rename_in_another_worker_invalidates_chat_etag(client, db, chat, auth_headers):
+    admin, author, task_id = chat
+    headers = auth_headers(admin)
+    url = f"/tasks/{task_id}/messages/"
+    first = client.get(url, headers=headers)
+    etag = first.headers["ETag"]
+    assert client.get(url, headers={**headers, "If-None-Match": etag}).status_code == 304
+
+    db.query(User).filter(User.id == author.id).update(
+        {"username": "renamed", "token_version": User.token_version + 1}
+    )
+    db.commit()
+
+    response = client.get(url, headers={**headers, "If-None-Match": etag})
+    assert response.status_code == 200
+    assert [m["user"] for m in response.json()] == ["renamed"]
+    # новый ETag соответствует новому телу
+    repeat = client.get(url, headers={**headers, "If-None-Match": response.headers["ETag"]})
+    assert repeat.status_code == 304
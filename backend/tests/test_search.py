@@ -0,0 +1,56 @@
+"""GET /search/ on both backends: SQLite FTS5 and PostgreSQL tsvector."""
+import pytest
+
+from app.models.message import Message
+from app.models.task import Task
+
+
+@pytest.fixture
+def board(db, make_user, status_ids):
+    manager = make_user("manager", "manager")
+    employee = make_user("employee", "employee")
+    tasks = {
+        "api": Task(title="Разработка API", short_description="REST", description="эндпоинты задач",
+                    status_id=status_ids[0], created_by=manager.id, assignee_id=employee.id),
+        "tree": Task(title="Купить ёлку", short_description="к празднику", description="",
+                     status_id=status_ids[1], created_by=manager.id, assignee_id=None),
+        "hidden": Task(title="Разработка бюджета", short_description="план", description="секретно",
+                       status_id=status_ids[2], created_by=manager.id, assignee_id=manager.id),
+    }
+    db.add_all(tasks.values())
+    db.commit()
+    db.add(Message(content="Ёлка уже стоит в холле", task_id=tasks["tree"].id, user_id=manager.id))
+    db.commit()
+    return manager, employee, {name: task.id for name, task in tasks.items()}
+
+
+def _search(client, headers: dict, q: str) -> list[tuple[str, int]]:
+    response = client.get("/search/", params={"q": q}, headers=headers)
+    assert response.status_code == 200
+    return sorted((hit["kind"], hit["task_id"]) for hit in response.json()["items"])
+
+
+def test_matches_word_prefixes(client, board, auth_headers):
+    manager, _, ids = board
+    assert _search(client, auth_headers(manager), "разраб") == sorted(
+        [("task", ids["api"]), ("task", ids["hidden"])]
+    )
+    # все слова запроса должны найтись
+    assert _search(client, auth_headers(manager), "разраб бюдж") == [("task", ids["hidden"])]
+
+
+def test_folds_yo_in_text_and_query(client, board, auth_headers):
+    manager, _, ids = board
+    expected = [("message", ids["tree"]), ("task", ids["tree"])]
+    assert _search(client, auth_headers(manager), "елк") == expected
+    assert _search(client, auth_headers(manager), "ЁЛК") == expected
+
+
+def test_hides_invisible_tasks(client, board, auth_headers):
+    _, employee, ids = board
+    assert _search(client, auth_headers(employee), "разработка") == [("task", ids["api"])]
+
+
+def test_ignores_query_syntax(client, board, auth_headers):
+    manager, _, _ = board
+    assert _search(client, auth_headers(manager), '"*:) & |') == []
@@ -0,0 +1,81 @@
+"""Reads on the tuned SQLite profile are not blocked by an open write transaction.
+
+In the rollback-journal mode a writer holds an EXCLUSIVE lock while it
+writes the database file (at commit or when its cache spills); every
+reader waits for it. `BEGIN EXCLUSIVE` keeps a transaction in that state.
+Under WAL the same transaction only appends to the log and readers keep
+reading the last committed snapshot.
+"""
+import time
+
+import pytest
+from sqlalchemy import func, select
+from sqlalchemy.exc import OperationalError
+
+from app.core.config import SQLITE_PRAGMAS
+from app.db.base import Base
+from app.db.session import create_db_engine
+from app.models.status import Status
+
+# старый профиль отличается только режимом журнала; короткий busy_timeout,
+# чтобы заблокированное чтение падало быстро
+ROLLBACK_JOURNAL = {**SQLITE_PRAGMAS, "journal_mode": "DELETE", "busy_timeout": 200}
+
+
+@pytest.fixture
+def make_engine(tmp_path):
+    engines = []
+
+    def make(pragmas: dict):
+        engine = create_db_engine(f"sqlite:///{tmp_path / 'journal.db'}", pragmas=pragmas)
+        Base.metadata.create_all(bind=engine)
+        with engine.begin() as conn:
+            conn.execute(Status.__table__.insert(), [{"name": "todo", "order_index": 1}])
+        engines.append(engine)
+        return engine
+
+    yield make
+    for engine in engines:
+        engine.dispose()
+
+
+def _hold_write_transaction(engine):
+    """A connection in the middle of a write, with the transaction left open."""
+    raw = engine.raw_connection()
+    cursor = raw.cursor()
+    cursor.execute("BEGIN EXCLUSIVE")
+    cursor.execute("INSERT INTO statuses (name, order_index) VALUES ('doing', 2)")
+    return raw
+
+
+def _count_statuses(conn) -> int:
+    return conn.execute(select(func.count()).select_from(Status)).scalar()
+
+
+def test_wal_read_is_not_blocked_by_open_write(make_engine):
+    engine = make_engine(SQLITE_PRAGMAS)
+    with engine.connect() as reader:
+        writer = _hold_write_transaction(engine)
+        try:
+            started = time.perf_counter()
+            # незакоммиченная строка не видна, но и ждать писателя не нужно
+            assert _count_statuses(reader) == 1
+            assert time.perf_counter() - started < 0.1
+        finally:
+            writer.rollback()
+            writer.close()
+
+
+def test_rollback_journal_read_blocks_on_open_write(make_engine):
+    engine = make_engine(ROLLBACK_JOURNAL)
+    with engine.connect() as reader:
+        writer = _hold_write_transaction(engine)
+        try:
+            started = time.perf_counter()
+            with pytest.raises(OperationalError, match="database is locked"):
+                _count_statuses(reader)
+            # чтение простояло весь busy_timeout
+            assert 0.2 <= time.perf_counter() - started < 2
+        finally:
+            writer.rollback()
+            writer.close()
@@ -0,0 +1,114 @@
+"""GET /tasks/changes: deltas after a sync token, tombstones and resets."""
+import pytest
+
+from app.db.session import engine
+from app.models import task as task_model
+from app.models.change import prune_tombstones, tombstone_horizon
+from app.models.task import Task
+
+
+@pytest.fixture
+def board(db, make_user, make_tasks):
+    manager = make_user("manager", "manager")
+    employee = make_user("employee", "employee")
+    make_tasks(4, manager.id, [employee.id])
+    task_ids = [task_id for (task_id,) in db.query(Task.id).order_by(Task.id)]
+    return manager, employee, task_ids
+
+
+def _sync(client, headers: dict, since: str | None = None) -> dict:
+    params = {"since": since} if since is not None else {}
+    response = client.get("/tasks/changes", params=params, headers=headers)
+    assert response.status_code == 200
+    return response.json()
+
+
+def _delete(db, task_id: int) -> None:
+    db.delete(db.get(Task, task_id))
+    db.commit()
+
+
+def test_returns_only_rows_changed_after_token(client, db, board, status_ids, auth_headers):
+    manager, _, task_ids = board
+    headers = auth_headers(manager)
+    first = _sync(client, headers)
+    assert first["reset"] is True
+    assert sorted(t["id"] for t in first["changes"]) == task_ids
+
+    db.get(Task, task_ids[1]).title = "Renamed"
+    added = Task(
+        title="New", short_description="New", description="New",
+        status_id=status_ids[0], created_by=manager.id,
+    )
+    db.add(added)
+    db.commit()
+
+    delta = _sync(client, headers, first["token"])
+    assert delta["reset"] is False
+    assert sorted(t["id"] for t in delta["changes"]) == sorted([task_ids[1], added.id])
+    assert delta["deleted"] == []
+    # повтор с новым токеном ничего не возвращает
+    assert _sync(client, headers, delta["token"])["changes"] == []
+
+
+def test_deleted_task_is_reported_as_tombstone(client, db, board, auth_headers):
+    manager, _, task_ids = board
+    headers = auth_headers(manager)
+    token = _sync(client, headers)["token"]
+
+    _delete(db, task_ids[0])
+
+    delta = _sync(client, headers, token)
+    assert delta["reset"] is False
+    assert delta["changes"] == []
+    assert delta["deleted"] == [task_ids[0]]
+
+
+def test_task_reassigned_away_is_reported_as_deleted(client, db, board, make_user, auth_headers):
+    _, employee, task_ids = board
+    other_manager = make_user("other", "manager")
+    headers = auth_headers(employee)
+    token = _sync(client, headers)["token"]
+
+    db.get(Task, task_ids[2]).assignee_id = other_manager.id
+    db.commit()
+
+    delta = _sync(client, headers, token)
+    assert delta["reset"] is False
+    assert delta["changes"] == []
+    assert delta["deleted"] == [task_ids[2]]
+
+
+def test_token_older_than_tombstone_horizon_gets_reset(client, db, board, auth_headers):
+    manager, _, task_ids = board
+    headers = auth_headers(manager)
+    old_token = _sync(client, headers)["token"]
+
+    _delete(db, task_ids[0])
+    with engine.begin() as conn:
+        prune_tombstones(conn, conn.exec_driver_sql("SELECT value FROM change_counter").scalar())
+
+    # надгробие забыто: старому токену отдаётся вся доска, а не неполная дельта
+    delta = _sync(client, headers, old_token)
+    assert delta["reset"] is True
+    assert sorted(t["id"] for t in delta["changes"]) == task_ids[1:]
+    assert delta["deleted"] == []
+    # токен, выданный после чистки, снова работает как дельта
+    assert _sync(client, headers, delta["token"])["reset"] is False
+
+
+def test_deletes_prune_tombstones_beyond_retention(client, db, board, auth_headers, monkeypatch):
+    manager, _, task_ids = board
+    monkeypatch.setattr(task_model, "SYNC_TOMBSTONE_RETENTION", 1)
+    headers = auth_headers(manager)
+    old_token = _sync(client, headers)["token"]
+
+    _delete(db, task_ids[0])
+    _delete(db, task_ids[1])
+
+    with engine.connect() as conn:
+        tombstones = conn.exec_driver_sql("SELECT task_id, change_seq FROM task_tombstones").all()
+        horizon = tombstone_horizon(conn)
+    assert [task_id for task_id, _ in tombstones] == [task_ids[1]]
+    assert horizon == tombstones[0][1] - 1
+    assert _sync(client, headers, old_token)["reset"] is True
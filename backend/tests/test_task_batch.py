@@ -0,0 +1,129 @@
+"""PATCH /tasks/batch: per-item errors, one transaction, fresh board ETag."""
+import pytest
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.models.task import Task
+
+
+@pytest.fixture
+def team(db, make_user, make_tasks):
+    manager = make_user("manager", "manager")
+    employee = make_user("employee", "employee")
+    # задачи 0 и 1 у сотрудника, 2 — у менеджера (сотруднику не видна)
+    make_tasks(3, manager.id, [employee.id, employee.id, manager.id])
+    task_ids = [task_id for (task_id,) in db.query(Task.id).order_by(Task.id)]
+    return manager, employee, task_ids
+
+
+@pytest.fixture
+def commits():
+    """Number of ORM commits made while the test runs."""
+    counter = [0]
+
+    def count(session):
+        counter[0] += 1
+
+    event.listen(Session, "after_commit", count)
+    yield counter
+    event.remove(Session, "after_commit", count)
+
+
+def _batch(client, headers: dict, *items: dict) -> list[dict]:
+    response = client.patch("/tasks/batch", json={"items": list(items)}, headers=headers)
+    assert response.status_code == 200
+    return response.json()
+
+
+def _task(db, task_id: int) -> Task:
+    db.expire_all()
+    return db.get(Task, task_id)
+
+
+def test_employee_may_change_only_status(client, db, team, auth_headers):
+    _, employee, task_ids = team
+    results = _batch(
+        client, auth_headers(employee),
+        {"id": task_ids[0], "status": "готово"},
+        {"id": task_ids[1], "title": "Renamed"},
+        {"id": task_ids[1], "status": "готово", "assignee_id": 0},
+    )
+    assert results == [
+        {"id": task_ids[0], "status": "updated"},
+        {"id": task_ids[1], "status": "error", "code": 403, "detail": "Access denied"},
+        {"id": task_ids[1], "status": "error", "code": 403, "detail": "Access denied"},
+    ]
+    assert _task(db, task_ids[1]).title == "Task 1"
+
+
+def test_hidden_and_missing_tasks_are_reported_per_item(client, db, team, auth_headers):
+    _, employee, task_ids = team
+    missing = max(task_ids) + 100
+    results = _batch(
+        client, auth_headers(employee),
+        {"id": task_ids[2], "status": "готово"},
+        {"id": missing, "status": "готово"},
+        {"id": task_ids[0], "status": "готово"},
+    )
+    assert results == [
+        {"id": task_ids[2], "status": "error", "code": 403, "detail": "Access denied"},
+        {"id": missing, "status": "error", "code": 404, "detail": "Task not found"},
+        {"id": task_ids[0], "status": "updated"},
+    ]
+    assert _task(db, task_ids[2]).status_id != _task(db, task_ids[0]).status_id
+
+
+def test_invalid_status_and_assignee_are_reported_per_item(client, db, team, status_ids, auth_headers):
+    manager, _, task_ids = team
+    results = _batch(
+        client, auth_headers(manager),
+        {"id": task_ids[0], "status_id": max(status_ids) + 1},
+        {"id": task_ids[0], "status": "Нет такого"},
+        {"id": task_ids[0], "status": "готово", "status_id": status_ids[0]},
+        {"id": task_ids[1], "assignee_id": 999_999},
+        {"id": task_ids[2], "assignee_id": 0},
+    )
+    assert [(r["status"], r.get("code"), r.get("detail")) for r in results] == [
+        ("error", 400, "Invalid status_id"),
+        ("error", 400, "Invalid status"),
+        ("error", 400, "Use either status or status_id"),
+        ("error", 400, "Invalid assignee_id"),
+        ("updated", None, None),
+    ]
+    assert _task(db, task_ids[1]).assignee_id is not None
+    assert _task(db, task_ids[2]).assignee_id is None
+
+
+def test_applied_items_are_committed_together(client, db, team, status_ids, auth_headers, commits):
+    manager, _, task_ids = team
+    results = _batch(
+        client, auth_headers(manager),
+        {"id": task_ids[0], "status_id": status_ids[-1], "title": "First"},
+        {"id": max(task_ids) + 100, "title": "Missing"},
+        {"id": task_ids[1], "assignee_id": manager.id},
+        {"id": task_ids[2], "description": "Third"},
+    )
+    assert [r["status"] for r in results] == ["updated", "error", "updated", "updated"]
+    assert commits[0] == 1
+
+    tasks = [_task(db, task_id) for task_id in task_ids]
+    assert (tasks[0].title, tasks[0].status_id) == ("First", status_ids[-1])
+    assert tasks[1].assignee_id == manager.id
+    assert tasks[2].description == "Third"
+    # один flush — один номер изменения на весь пакет
+    assert len({task.change_seq for task in tasks}) == 1
+
+
+def test_batch_invalidates_board_etag(client, team, auth_headers):
+    manager, _, task_ids = team
+    headers = auth_headers(manager)
+    first = client.get("/tasks/", headers=headers)
+    etag = first.headers["ETag"]
+    assert client.get("/tasks/", headers={**headers, "If-None-Match": etag}).status_code == 304
+
+    _batch(client, headers, {"id": task_ids[0], "title": "Changed"})
+
+    response = client.get("/tasks/", headers={**headers, "If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+    assert {t["id"]: t["title"] for t in response.json()}[task_ids[0]] == "Changed"
@@ -0,0 +1,57 @@
+"""SQL `_visibility_filter` agrees with the Python `_can_view_task` predicate."""
+import random
+
+import pytest
+from sqlalchemy import insert, text
+
+from app.api.tasks import _can_view_task, _visibility_filter
+from app.models.task import Task
+from app.models.user import User
+
+ROLES = ["employee", "manager", "ceo", "admin", "intern"]  # intern — роль вне ROLE_RANK
+
+
+def _insert_tasks(db, rows: list[dict]) -> None:
+    # исполнитель может ссылаться на удалённого пользователя: проверку
+    # внешних ключей отключаем только на время вставки
+    if db.bind.dialect.name == "postgresql":
+        db.execute(text("SET LOCAL session_replication_role = replica"))
+    db.execute(insert(Task), rows)
+    db.commit()
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_sql_filter_matches_python_predicate(db, make_user, status_ids, seed):
+    rnd = random.Random(seed)
+    users = [make_user(f"user{seed}_{n}", rnd.choice(ROLES)) for n in range(12)]
+    user_ids = [u.id for u in users]
+    dangling_ids = [max(user_ids) + 1000 + n for n in range(3)]
+
+    def row(created_by: int, assignee_id: int | None) -> dict:
+        return {
+            "title": "t",
+            "short_description": "s",
+            "description": "d",
+            "status_id": rnd.choice(status_ids),
+            "created_by": created_by,
+            "assignee_id": assignee_id,
+        }
+
+    rows = []
+    for _ in range(150):
+        assignee = rnd.choice([None, *user_ids, rnd.choice(dangling_ids)])
+        rows.append(row(rnd.choice(user_ids), assignee))
+    for user_id in user_ids:
+        # свои задачи: автор, исполнитель, автор без исполнителя,
+        # автор с исполнителем, которого уже нет
+        rows.append(row(user_id, rnd.choice(user_ids)))
+        rows.append(row(rnd.choice(user_ids), user_id))
+        rows.append(row(user_id, None))
+        rows.append(row(user_id, rnd.choice(dangling_ids)))
+    _insert_tasks(db, rows)
+
+    tasks = db.query(Task).all()
+    for user in db.query(User).all():
+        in_sql = {task_id for task_id, in db.query(Task.id).filter(_visibility_filter(user))}
+        in_python = {task.id for task in tasks if _can_view_task(user, task, db)}
+        assert in_sql == in_python, f"{user.username} ({user.role})"
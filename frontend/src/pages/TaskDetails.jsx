@@ -1,7 +1,14 @@
-import { useEffect, useMemo, useState } from "react";
+import { useEffect, useMemo, useRef, useState } from "react";
 import { useNavigate, useParams } from "react-router-dom";
 import { useAuth } from "../auth/useAuth";
-import { createTaskMessage, getTask, getTaskMessages, getStatuses, updateTask } from "../services/tasks";
+import {
+  createTaskMessage,
+  getTask,
+  getTaskMessages,
+  getStatuses,
+  openTaskMessagesSocket,
+  updateTask,
+} from "../services/tasks";
 import { getUsers } from "../services/users";
 import UserMenu from "../components/UserMenu";
 
@@ -15,6 +22,12 @@ function formatTime(iso) {
   }
 }
 
+function mergeMessages(prev, incoming) {
+  const known = new Set(prev.map((m) => m.id));
+  const fresh = incoming.filter((m) => !known.has(m.id));
+  return fresh.length ? [...prev, ...fresh] : prev;
+}
+
 export default function TaskDetails() {
   const navigate = useNavigate();
   const { id } = useParams();
@@ -24,6 +37,7 @@ export default function TaskDetails() {
 
   const [task, setTask] = useState(null);
   const [messages, setMessages] = useState([]);
+  const lastMessageIdRef = useRef(0);
   const [messageText, setMessageText] = useState("");
   const [error, setError] = useState("");
   const [loading, setLoading] = useState(true);
@@ -88,18 +102,50 @@ export default function TaskDetails() {
     // eslint-disable-next-line react-hooks/exhaustive-deps
   }, [taskId]);
 
-  // Пуллинг сообщений для обновления у всех пользователей без перезагрузки
+  useEffect(() => {
+    lastMessageIdRef.current = messages.reduce((max, m) => Math.max(max, m.id), 0);
+  }, [messages]);
+
+  const fetchNewMessages = async () => {
+    try {
+      const m = await getTaskMessages(taskId, { since_id: lastMessageIdRef.current });
+      setMessages((prev) => mergeMessages(prev, m));
+    } catch {
+      /* игнорируем временные ошибки сети */
+    }
+  };
+
+  // Новые сообщения приходят по WebSocket; если сокет недоступен —
+  // раз в 5 секунд запрашиваем только сообщения новее последнего (since_id)
   useEffect(() => {
     if (!Number.isFinite(taskId) || taskId <= 0) return undefined;
-    const interval = setInterval(async () => {
-      try {
-        const m = await getTaskMessages(taskId);
-        setMessages(m);
-      } catch {
-        /* игнорируем временные ошибки сети */
+    let socket = null;
+    let interval = null;
+
+    const startPolling = () => {
+      if (!interval) interval = setInterval(fetchNewMessages, 5000);
+    };
+
+    try {
+      socket = openTaskMessagesSocket(taskId);
+      // сообщения, отправленные между загрузкой чата и подпиской
+      socket.onopen = fetchNewMessages;
+      socket.onmessage = (event) => {
+        setMessages((prev) => mergeMessages(prev, [JSON.parse(event.data)]));
+      };
+      socket.onclose = startPolling;
+    } catch {
+      startPolling();
+    }
+
+    return () => {
+      if (socket) {
+        socket.onclose = null;
+        socket.close();
       }
-    }, 5000);
-    return () => clearInterval(interval);
+      clearInterval(interval);
+    };
+    // eslint-disable-next-line react-hooks/exhaustive-deps
   }, [taskId]);
 
   const findStatusIdByName = (name) => {
@@ -142,8 +188,7 @@ export default function TaskDetails() {
     try {
       await createTaskMessage(taskId, text);
       setMessageText("");
-      const m = await getTaskMessages(taskId);
-      setMessages(m);
+      await fetchNewMessages();
     } catch (e2) {
       setError("Не удалось отправить сообщение");
     } finally {
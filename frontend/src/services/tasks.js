@@ -1,7 +1,19 @@
 import api from "./api";
 
-export const getTasks = async () => {
-  const res = await api.get("/tasks/");
+export const getTasks = async (params = {}) => {
+  const res = await api.get("/tasks/", { params });
+  return res.data;
+};
+
+// Страница колонки: { items, nextCursor } (nextCursor = null на последней странице)
+export const getTasksPage = async (params = {}) => {
+  const res = await api.get("/tasks/", { params });
+  return { items: res.data, nextCursor: res.headers["x-next-cursor"] || null };
+};
+
+// Дельта доски: { token, reset, changes, deleted }
+export const getTaskChanges = async (since) => {
+  const res = await api.get("/tasks/changes", { params: since ? { since } : {} });
   return res.data;
 };
 
@@ -21,11 +33,18 @@ export const getTask = async (taskId) => {
   return res.data;
 };
 
-export const getTaskMessages = async (taskId) => {
-  const res = await api.get(`/tasks/${taskId}/messages/`);
+export const getTaskMessages = async (taskId, params = {}) => {
+  const res = await api.get(`/tasks/${taskId}/messages/`, { params });
   return res.data;
 };
 
+// WebSocket с новыми сообщениями чата (JWT в query, заголовки в WS недоступны)
+export const openTaskMessagesSocket = (taskId) => {
+  const token = localStorage.getItem("access_token") || "";
+  const base = api.defaults.baseURL.replace(/^http/, "ws");
+  return new WebSocket(`${base}/tasks/${taskId}/messages/ws?token=${encodeURIComponent(token)}`);
+};
+
 export const createTaskMessage = async (taskId, content) => {
   const res = await api.post(`/tasks/${taskId}/messages/`, { content });
   return res.data;